@@ -0,0 +1,47 @@
+import numpy as np
+
+
+def condensation_groups(counts, k):
+    """
+    Partition sorted distinct values into contiguous groups of at least `k` records.
+
+    `counts` holds how many records carry each distinct value, in sorted
+    value order. Returns the index of the first value of every group, for
+    use with np.add.reduceat. Records are cut into runs of `k` by their
+    position in one sweep of the cumulative counts; a run that a frequent
+    value leaves with fewer than `k` records joins the group before it.
+    When there are fewer than `k` records in total they form one group.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    if len(counts) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    first_record = np.cumsum(counts) - counts
+    run = first_record // k
+    starts = np.flatnonzero(np.diff(run, prepend=-1))
+    keep = np.add.reduceat(counts, starts) >= k
+    keep[0] = True  # The first group always spans k records unless there are fewer in total
+    return starts[keep]
+
+
+def condense(values, k, epsilon=1.0, sensitivity=1.0, rng=None):
+    """
+    Replace every value with the mean of its group of at least `k` records, plus Laplace noise.
+
+    Values are sorted once (as distinct values with counts), grouped by
+    `condensation_groups` and averaged with np.add.reduceat; the noise,
+    Laplace(sensitivity / epsilon), is drawn for all records in one call.
+    Returns float64 values in the input order.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rng = rng if rng is not None else np.random.default_rng()
+    if len(values) == 0:
+        return values.copy()
+
+    unique_values, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    starts = condensation_groups(counts, k)
+    means = np.add.reduceat(unique_values * counts, starts) / np.add.reduceat(counts, starts)
+    group = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(unique_values))))
+
+    noise = rng.laplace(0.0, sensitivity / epsilon, size=len(values))
+    return means[group][inverse] + noise
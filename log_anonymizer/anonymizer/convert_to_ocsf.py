@@ -0,0 +1,134 @@
+import pandas as pd
+from anonymizer.eve import dumps
+from anonymizer.io_utils import open_log
+from anonymizer.timestamp_anonymizer import parse_timestamps, resolve_timestamp_format
+
+OCSF_VERSION = "1.1.0"
+DEFAULT_OCSF_BATCH_SIZE = 10_000
+
+# Every record is an OCSF Network Activity (4001) "Traffic" event
+NETWORK_ACTIVITY = {
+    "category_uid": 4,
+    "category_name": "Network Activity",
+    "class_uid": 4001,
+    "class_name": "Network Activity",
+    "activity_id": 6,
+    "activity_name": "Traffic",
+    "type_uid": 400106,
+}
+PRODUCTS = {
+    "suricata": {"name": "Suricata", "vendor_name": "OISF"},
+    "eve": {"name": "Suricata", "vendor_name": "OISF"},
+    "zeek": {"name": "Zeek", "vendor_name": "Zeek"},
+    "pfsense": {"name": "pfSense", "vendor_name": "Netgate"},
+}
+# Suricata priorities 1-3 as OCSF severity_id (4 High, 3 Medium, 2 Low)
+SEVERITY_IDS = {"1": 4, "2": 3, "3": 2}
+
+# Parsed columns that have a place of their own in the OCSF event; the rest go to "unmapped"
+MAPPED_COLUMNS = {"line_no", "timestamp", "src_ip", "src_port", "dest_ip", "dest_port",
+                  "protocol", "proto", "alert", "message", "priority"}
+
+
+def ocsf_settings(config):
+    """
+    Return {"output", "batch_size"} when the config enables the OCSF export, else None.
+
+    The export is off unless the config has an `ocsf:` section (or
+    `ocsf: true`); `enabled: false` in the section switches it off again.
+    """
+    settings = config.get("ocsf")
+    if not settings:
+        return None
+    if settings is True:
+        settings = {}
+    if not settings.get("enabled", True):
+        return None
+    return {"output": settings.get("output", "ocsf_logs.ndjson"),
+            "batch_size": settings.get("batch_size", DEFAULT_OCSF_BATCH_SIZE)}
+
+
+def write_ocsf(df_logs, log_type, f_out, batch_size=DEFAULT_OCSF_BATCH_SIZE, fmt=None):
+    """
+    Write each row of an anonymized DataFrame to `f_out` as one OCSF JSON line.
+
+    Rows are converted and written `batch_size` at a time, so no more than
+    one batch of events is held as JSON at once. Returns the rows written.
+    """
+    for start in range(0, len(df_logs), batch_size):
+        batch = df_logs.iloc[start:start + batch_size]
+        f_out.writelines(dumps(event) + "\n" for event in _ocsf_events(batch, log_type, fmt))
+    return len(df_logs)
+
+
+def convert_to_ocsf(df_logs, log_type, ocsf_file, batch_size=DEFAULT_OCSF_BATCH_SIZE, fmt=None):
+    """Write an anonymized DataFrame to `ocsf_file` as OCSF NDJSON (compressed per its extension)."""
+    with open_log(ocsf_file, "w") as f_out:
+        count = write_ocsf(df_logs, log_type, f_out, batch_size, fmt)
+    print(f"✅ OCSF events saved in {ocsf_file}")
+    return count
+
+
+def _ocsf_events(df_logs, log_type, fmt=None):
+    """Yield the OCSF event dict of every row."""
+    n = len(df_logs)
+    columns = set(df_logs.columns)
+
+    def column(name):
+        return df_logs[name].tolist() if name in columns else [None] * n
+
+    def ports(name):
+        if name not in columns:
+            return [None] * n
+        numbers = pd.to_numeric(df_logs[name], errors="coerce").astype("Int64")
+        return [None if pd.isna(value) else int(value) for value in numbers]
+
+    times = [None] * n
+    if "timestamp" in columns:
+        ns, valid = parse_timestamps(df_logs["timestamp"].astype(object), resolve_timestamp_format(log_type, fmt))
+        times = [time if ok else None for time, ok in zip((ns // 1_000_000).tolist(), valid)]
+
+    src_ips, dest_ips = column("src_ip"), column("dest_ip")
+    src_ports, dest_ports = ports("src_port"), ports("dest_port")
+    protocols = column("protocol") if "protocol" in columns else column("proto")
+    messages = column("alert") if "alert" in columns else column("message")
+    priorities = column("priority")
+    extra = [name for name in df_logs.columns if name not in MAPPED_COLUMNS]
+    extra_values = [column(name) for name in extra]
+
+    metadata = {"version": OCSF_VERSION, "log_name": log_type,
+                "product": PRODUCTS.get(log_type, {"name": log_type})}
+
+    for i in range(n):
+        event = dict(NETWORK_ACTIVITY)
+        event["severity_id"] = SEVERITY_IDS.get(str(priorities[i]), 0) if log_type == "suricata" else 0
+        if times[i] is not None:
+            event["time"] = times[i]
+        event["metadata"] = metadata
+        src = _endpoint(src_ips[i], src_ports[i])
+        if src:
+            event["src_endpoint"] = src
+        dst = _endpoint(dest_ips[i], dest_ports[i])
+        if dst:
+            event["dst_endpoint"] = dst
+        if _present(protocols[i]):
+            event["connection_info"] = {"protocol_name": str(protocols[i]).lower()}
+        if _present(messages[i]):
+            event["message"] = str(messages[i])
+        unmapped = {name: values[i] for name, values in zip(extra, extra_values) if _present(values[i])}
+        if unmapped:
+            event["unmapped"] = unmapped
+        yield event
+
+
+def _endpoint(ip, port):
+    endpoint = {}
+    if _present(ip):
+        endpoint["ip"] = str(ip)
+    if port is not None:
+        endpoint["port"] = port
+    return endpoint
+
+
+def _present(value):
+    return not pd.isna(value) and value != ""
@@ -0,0 +1,7 @@
+# Defaults shared by main.py and the pipeline. This module imports nothing,
+# so the CLI can build its --help without loading pandas.
+DEFAULT_CHUNK_SIZE = 100_000  # Lines per chunk in the file modes
+DEFAULT_FLUSH_INTERVAL = 1.0  # Seconds new lines may wait in follow mode
+DEFAULT_QUEUE_SIZE = 10_000  # Syslog messages held while a batch is anonymized
+DEFAULT_BATCH_SIZE = 1_000
+DEFAULT_BATCH_DELAY = 0.05  # Seconds a message may wait for others to fill its batch
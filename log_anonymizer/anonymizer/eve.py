@@ -0,0 +1,154 @@
+import json
+
+try:  # Optional: several times faster JSON decoding and encoding for eve.json
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON paths anonymized in every event, and the kind of value each holds.
+# A kind is "ip", "port" or "timestamp" (anonymized with the config's strategy
+# for that kind) or "mask" (masked like other free-text identifiers).
+EVE_PATHS = {
+    "timestamp": "timestamp",
+    "src_ip": "ip",
+    "dest_ip": "ip",
+    "src_port": "port",
+    "dest_port": "port",
+}
+EVE_PATH_KINDS = ("ip", "port", "timestamp", "mask")
+SCALAR_TYPES = (str, int, float)  # Values that can be anonymized; bool flags are not identifiers
+
+
+if orjson is not None:
+    loads = orjson.loads
+
+    def dumps(event):
+        return orjson.dumps(event).decode("utf-8")
+else:
+    loads = json.loads
+
+    def dumps(event):
+        return json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+
+
+def eve_paths(anonymization):
+    """
+    Map each JSON path to anonymize to its kind.
+
+    The built-in top-level fields are anonymized when the config selects a
+    strategy for their kind; `eve_paths` in the config adds nested fields
+    (e.g. {"http.hostname": "mask", "dns.rrname": "mask"}) or, with a kind
+    of null, drops a built-in one.
+    """
+    paths = {path: kind for path, kind in EVE_PATHS.items() if kind in anonymization}
+    for path, kind in (anonymization.get("eve_paths") or {}).items():
+        if kind is None:
+            paths.pop(path, None)
+        elif kind not in EVE_PATH_KINDS:
+            raise ValueError(f"Unknown kind {kind!r} for eve path {path}; expected one of {', '.join(EVE_PATH_KINDS)}")
+        else:
+            paths[path] = kind
+    return paths
+
+
+def _path_getter(keys):
+    """Return a function reading the string or number at `keys` from an event, or None."""
+    if len(keys) == 1:  # Most targets are top-level; skip the walk
+        key = keys[0]
+
+        def get(event):
+            value = event.get(key)
+            return value if type(value) in SCALAR_TYPES else None
+        return get
+
+    def get(event):
+        for key in keys:
+            if type(event) is not dict:
+                return None
+            event = event.get(key)
+        return event if type(event) in SCALAR_TYPES else None
+    return get
+
+
+def _set_path(event, keys, value):
+    for key in keys[:-1]:
+        event = event[key]
+    event[keys[-1]] = value
+
+
+def parse_eve(lines, paths, start_line_no=1):
+    """
+    Decode Suricata EVE JSON lines and pull out the values at `paths`.
+
+    Returns (events, logs): `logs` holds one column per path plus
+    "line_no" for every event that has at least one targeted value, and
+    `events` the decoded objects of those rows, for `rewrite_eve`. Lines
+    that are not JSON objects or carry none of the paths are left out.
+    """
+    getters = [_path_getter(path.split(".")) for path in paths]
+    columns = [[] for _ in paths]
+    line_nos = []
+    events = []
+
+    for line_no, line in enumerate(lines, start=start_line_no):
+        try:
+            event = loads(line)
+        except ValueError:
+            continue
+        if type(event) is not dict:
+            continue
+        values = [get(event) for get in getters]
+        if values.count(None) == len(values):
+            continue
+        for column, value in zip(columns, values):
+            column.append(value)
+        line_nos.append(line_no)
+        events.append(event)
+
+    logs = dict(zip(paths, columns))
+    logs["line_no"] = line_nos
+    return events, logs
+
+
+def rewrite_eve(lines, events, logs, df_logs, start_line_no=1):
+    """
+    Yield `lines` with the anonymized values of `df_logs` written back into their events.
+
+    `events` and `logs` come from `parse_eve`. Only events where a value
+    actually changed are re-encoded; every other line is yielded as read.
+    Numbers stay numbers when the anonymized value is numeric.
+    """
+    paths = [path for path in logs if path != "line_no" and path in df_logs.columns]
+    split_paths = [path.split(".") for path in paths]
+    original = [logs[path] for path in paths]
+    anonymized = [df_logs[path].tolist() for path in paths]
+    rows = dict(zip(logs["line_no"], range(len(events))))
+
+    for line_no, line in enumerate(lines, start=start_line_no):
+        row = rows.get(line_no)
+        if row is None:
+            yield line
+            continue
+
+        event = events[row]
+        changed = False
+        for keys, before, after in zip(split_paths, original, anonymized):
+            old, new = before[row], after[row]
+            if old is None or new == old:
+                continue
+            if type(old) is not str and isinstance(new, str):
+                new = _to_number(new, type(old))
+            _set_path(event, keys, new)
+            changed = True
+
+        if changed:
+            yield dumps(event) + ("\n" if line.endswith("\n") else "")
+        else:
+            yield line
+
+
+def _to_number(value, kind):
+    try:
+        return kind(value)
+    except ValueError:
+        return value
@@ -0,0 +1,64 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+class ValueCache:
+    """
+    Bounded LRU map from original to anonymized values for one deterministic strategy.
+
+    Kept for a whole run, so values that recur across chunks are
+    transformed once; the least recently used entries are dropped beyond
+    `maxsize`.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def map(self, uniques, transform):
+        """Return `transform` of the distinct `uniques`, computing only those not cached, in one call."""
+        out = np.empty(len(uniques), dtype=object)
+        missing = []
+        entries = self.entries
+        for i, value in enumerate(uniques):
+            if value in entries:
+                out[i] = entries[value]
+                entries.move_to_end(value)
+            else:
+                missing.append(i)
+        self.hits += len(uniques) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            missing = np.array(missing)
+            computed = np.asarray(transform(uniques[missing]), dtype=object)
+            out[missing] = computed
+            entries.update(zip(uniques[missing].tolist(), computed.tolist()))
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+        return out
+
+
+def map_unique(values, transform, cache=None):
+    """
+    Apply `transform` to the distinct values of a column only and broadcast the results back.
+
+    The column is factorized with pd.factorize; `transform` gets the
+    distinct values as an object array and returns one result per value.
+    Missing values are not passed to it and stay missing. With a ValueCache,
+    values it already holds are not transformed again.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    codes, uniques = pd.factorize(series)
+    uniques = np.asarray(uniques, dtype=object)
+
+    if cache is not None:
+        mapped = cache.map(uniques, transform)
+    else:
+        mapped = np.asarray(transform(uniques), dtype=object) if len(uniques) else np.empty(0, dtype=object)
+
+    out = np.append(mapped, np.nan)[codes]  # code -1 marks missing values
+    return pd.Series(out, index=series.index, name=series.name)
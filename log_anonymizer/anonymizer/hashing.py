@@ -1,4 +1,5 @@
 import hashlib
+import hmac
 import os
 
 SALT = os.urandom(16)  # Generate a unique salt for this session
@@ -7,3 +8,32 @@ def hash_with_salt(value):
     """Hashes a value using SHA-256 with a salt."""
     salted_value = SALT + value.encode()
     return hashlib.sha256(salted_value).hexdigest()
+
+def keyed_permutation(salt, domain, size):
+    """
+    Returns a salt-keyed permutation of range(size) as a NumPy array.
+
+    Each value is ranked by SHA-256(salt + domain + value), so the table is
+    bijective and depends only on the salt and the domain label.
+    """
+    import numpy as np
+
+    prefix = salt + domain.encode()
+    keys = np.fromiter(
+        (int.from_bytes(hashlib.sha256(prefix + i.to_bytes(4, "big")).digest()[:8], "big")
+         for i in range(size)),
+        dtype=np.uint64, count=size,
+    )
+    return np.argsort(keys, kind="stable")
+
+def salt_text_column(column, SALT, digest_chars=16):
+    """
+    Replace each value of a column with its salt-keyed HMAC-SHA256, as `digest_chars` hex digits.
+
+    Equal values get equal digests under one salt (or vault key), so joins
+    across fields and runs still work; missing values stay missing.
+    """
+    from anonymizer.factorize import map_unique
+
+    return map_unique(column, lambda values: [
+        hmac.new(SALT, b"text" + str(value).encode(), hashlib.sha256).hexdigest()[:digest_chars] for value in values])
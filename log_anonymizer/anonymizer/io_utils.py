@@ -0,0 +1,67 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+
+try:  # Optional: only needed for .zst logs
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compression picked from the file name when none is configured
+COMPRESSION_EXTENSIONS = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".zst": "zstd",
+}
+COMPRESSIONS = {"none", *COMPRESSION_EXTENSIONS.values()}
+
+IO_BUFFER_SIZE = 1024 * 1024
+GZIP_LEVEL = 6  # gzip's default of 9 costs a lot of CPU for little gain on logs
+
+
+def detect_compression(path, compression=None):
+    """
+    Return the compression to use for `path`: `compression` if it is set
+    (and not "auto"), otherwise the one implied by the file extension, or "none".
+    """
+    if compression and compression != "auto":
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        return compression
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(path)[1].lower(), "none")
+
+def open_log(path, mode="r", compression=None, encoding="utf-8", errors=None):
+    """
+    Open a log file for streaming, decompressing or compressing on the fly.
+
+    `mode` is "r", "w" or "a", optionally with "b" for bytes. Reads and
+    writes go through a large buffer, so compressed logs are processed
+    without ever being written out uncompressed.
+    """
+    binary = "b" in mode
+    raw_mode = mode.replace("b", "").replace("t", "") + "b"
+    kind = detect_compression(path, compression)
+
+    if kind == "none":
+        stream = open(path, raw_mode, buffering=IO_BUFFER_SIZE)
+    elif kind == "gzip":
+        stream = gzip.open(path, raw_mode, compresslevel=GZIP_LEVEL)
+    elif kind == "bz2":
+        stream = bz2.open(path, raw_mode)
+    elif kind == "xz":
+        stream = lzma.open(path, raw_mode)
+    else:
+        if zstandard is None:
+            raise ImportError("Reading or writing .zst logs requires the zstandard package")
+        stream = zstandard.open(path, raw_mode)
+
+    if kind != "none":
+        buffered = io.BufferedReader if raw_mode == "rb" else io.BufferedWriter
+        stream = buffered(stream, buffer_size=IO_BUFFER_SIZE)
+
+    if binary:
+        return stream
+    return io.TextIOWrapper(stream, encoding=encoding, errors=errors)
@@ -1,44 +1,142 @@
-import struct
-import hashlib
+import ipaddress
 import os
+import numpy as np
 import pandas as pd
-import random
-
-# Global dictionary to store mappings for each octet
-ip_octet_map = [{} for _ in range(4)]  # One dict for each octet position
-
-
-def hash_with_salt(value,SALT):
-    """Hashes a value using SHA-256 with a salt."""
-    salted_value = SALT + value.encode()
-    return hashlib.sha256(salted_value).hexdigest()
-
-def anonymize_ip_column(ip_series: pd.Series,SALT) -> pd.Series:
-    """Anonymize IP addresses while preserving subnet structure."""
-    unique_ips = ip_series.unique()
-
-    anonymized_ips = {}
-    for ip in unique_ips:
-        if ip not in anonymized_ips:
-            parts = ip.split(".")
-            if len(parts) != 4:
-                anonymized_ips[ip] = ip  # Skip invalid IPs
-                continue
-
-            anonymized_parts = []
-            for i, part in enumerate(parts):
-                if part not in ip_octet_map[i]:  # If not already mapped
-                    hashed_value = hash_with_salt(part,SALT)
-                    # get integer from hash
-                    int_hash = int(hashed_value, 16)
-                    mapped_octet = int_hash % 256   # Map to 0-255
-                    ip_octet_map[i][part] = str(mapped_octet)  # Store mapping
-                
-                anonymized_parts.append(ip_octet_map[i][part])
-
-            anonymized_ips[ip] = ".".join(anonymized_parts)
-
-    return ip_series.map(anonymized_ips)
+from functools import lru_cache
+from anonymizer.hashing import keyed_permutation
+from anonymizer.vault import map_with_vault
+
+OCTET_STRINGS = np.array([str(i) for i in range(256)], dtype=object)
+
+
+@lru_cache(maxsize=None)
+def ip_octet_tables(SALT):
+    """
+    Bijective octet permutation tables for a salt, one 256-entry row per octet position.
+
+    The tables depend only on the salt, so every process that sees the same
+    salt produces the same mapping, and no two octets share an output.
+    """
+    return np.stack([keyed_permutation(SALT, f"ip_octet_{i}", 256) for i in range(4)]).astype(np.uint8)
+
+@lru_cache(maxsize=None)
+def ipv6_hextet_tables(SALT):
+    """
+    Bijective hextet permutation tables for a salt, one 65536-entry row per
+    16-bit group of an IPv6 address; the IPv6 counterpart of ip_octet_tables.
+    """
+    return np.stack([keyed_permutation(SALT, f"ip6_hextet_{i}", 65536) for i in range(8)]).astype(np.uint16)
+
+def ip_to_int(ip_values):
+    """
+    Parse dotted-quad strings into uint32 integers in bulk.
+
+    The strings are viewed as a fixed-width character matrix and scanned one
+    column at a time, so the work is a handful of array operations per
+    character position rather than a Python call per address.
+
+    Returns the integers and a boolean mask of the entries that were valid IPv4 addresses.
+    """
+    chars = np.ascontiguousarray(
+        np.asarray(ip_values, dtype=object).astype("U16").view(np.uint32).reshape(-1, 16).T)
+    n = chars.shape[1]
+    octets = np.zeros((4, n), dtype=np.uint32)
+    digit_counts = np.zeros((4, n), dtype=np.uint8)
+    position = np.zeros(n, dtype=np.uint8)
+    valid = chars[15] == 0  # Longer than 15 characters
+
+    for column in range(15):
+        c = chars[column]
+        is_digit = (c >= 48) & (c <= 57)
+        is_dot = c == 46
+        valid &= is_digit | is_dot | (c == 0)
+
+        for k in range(4):
+            in_octet = position == k
+            step = is_digit & in_octet
+            octets[k] = np.where(step, octets[k] * 10 + (c - 48), octets[k])
+            digit_counts[k] += step
+            valid &= ~(is_dot & in_octet & (digit_counts[k] == 0))
+        position += is_dot
+
+    valid &= (position == 3) & (digit_counts >= 1).all(axis=0) & (digit_counts <= 3).all(axis=0)
+    valid &= (octets <= 255).all(axis=0)
+
+    ints = (octets[0] << 24) | (octets[1] << 16) | (octets[2] << 8) | octets[3]
+    return np.where(valid, ints, 0).astype(np.uint32), valid
+
+def int_to_ip(ints):
+    """Format uint32 integers back into dotted-quad strings."""
+    ints = np.asarray(ints, dtype=np.uint32)
+    return (OCTET_STRINGS[ints >> 24] + "." + OCTET_STRINGS[(ints >> 16) & 0xff] + "."
+            + OCTET_STRINGS[(ints >> 8) & 0xff] + "." + OCTET_STRINGS[ints & 0xff])
+
+def anonymize_ip_ints(ints, SALT):
+    """Apply the salt's octet permutation tables to an array of uint32 IPs."""
+    tables = ip_octet_tables(SALT)
+    ints = np.asarray(ints, dtype=np.uint32)
+    return ((tables[0][ints >> 24].astype(np.uint32) << 24)
+            | (tables[1][(ints >> 16) & 0xff].astype(np.uint32) << 16)
+            | (tables[2][(ints >> 8) & 0xff].astype(np.uint32) << 8)
+            | tables[3][ints & 0xff].astype(np.uint32))
+
+def ipv6_to_hextets(ip_values):
+    """
+    Parse IPv6 strings into an (n, 8) uint16 array of hextets.
+
+    Returns the hextets, the zone index suffix of each address ("%eth0" or
+    "") and a boolean mask of the entries that were valid IPv6 addresses.
+    """
+    hextets = np.zeros((len(ip_values), 8), dtype=np.uint16)
+    zones = np.full(len(ip_values), "", dtype=object)
+    valid = np.zeros(len(ip_values), dtype=bool)
+    for i, value in enumerate(ip_values):
+        address, percent, zone = str(value).partition("%")
+        try:
+            packed = ipaddress.IPv6Address(address).packed
+        except ValueError:
+            continue
+        hextets[i] = np.frombuffer(packed, dtype=">u2")
+        zones[i] = percent + zone
+        valid[i] = True
+    return hextets, zones, valid
+
+def anonymize_ipv6(ip_values, SALT):
+    """Anonymize valid IPv6 address strings through the salt's hextet tables, in compressed form."""
+    hextets, zones, _ = ipv6_to_hextets(ip_values)
+    tables = ipv6_hextet_tables(SALT)
+    permuted = np.stack([tables[i][hextets[:, i]] for i in range(8)], axis=1).astype(">u2")
+    return np.array([ipaddress.IPv6Address(address.tobytes()).compressed + zone
+                     for address, zone in zip(permuted, zones)], dtype=object)
+
+def anonymize_ip_column(ip_series: pd.Series,SALT, vault=None) -> pd.Series:
+    """
+    Anonymize IP addresses while preserving subnet structure.
+
+    Each distinct IPv4 address is parsed once, pushed through the per-octet
+    permutation tables as a uint32 array and broadcast back to the rows;
+    IPv6 addresses go through the per-hextet tables. Values that are not IP
+    addresses are kept as is. With a KeyVault, addresses it already knows
+    are taken from it and new ones are added.
+    """
+    codes, unique_ips = pd.factorize(ip_series)
+    unique_ips = np.asarray(unique_ips, dtype=object)
+
+    ints, valid = ip_to_int(unique_ips)
+    anonymized_ips = unique_ips.copy()
+    anonymized_ips[valid] = map_with_vault(
+        vault, "ip", unique_ips[valid],
+        lambda ips: int_to_ip(anonymize_ip_ints(ip_to_int(ips)[0], SALT)))
+
+    # Only values with a colon can be IPv6; parse those one by one
+    maybe_v6 = ~valid & np.array([":" in str(value) for value in unique_ips], dtype=bool)
+    if maybe_v6.any():
+        is_v6 = np.flatnonzero(maybe_v6)[ipv6_to_hextets(unique_ips[maybe_v6])[2]]
+        anonymized_ips[is_v6] = map_with_vault(
+            vault, "ip", unique_ips[is_v6], lambda ips: anonymize_ipv6(ips, SALT))
+
+    values = np.append(anonymized_ips, np.nan)[codes]  # code -1 marks missing values
+    return pd.Series(values, index=ip_series.index, name=ip_series.name)
 
 
 
@@ -1,4 +1,5 @@
 import ipaddress
+from anonymizer.factorize import map_unique
 
 def generalize_ip(ip_column, subnet_mask=24):
     """
@@ -10,6 +11,8 @@ def generalize_ip(ip_column, subnet_mask=24):
     
     Returns:
     Series: Generalized IPs.
+
+    Each distinct address is masked once; missing values stay missing.
     """
     def mask_ip(ip):
         try:
@@ -18,4 +21,4 @@ def generalize_ip(ip_column, subnet_mask=24):
         except ValueError:
             return "INVALID_IP"
 
-    return ip_column.apply(mask_ip)
+    return map_unique(ip_column, lambda ips: [mask_ip(ip) for ip in ips])
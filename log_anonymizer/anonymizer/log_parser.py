@@ -1,169 +1,350 @@
 import re
 import pandas as pd
-from datetime import datetime
+from itertools import islice
+from functools import lru_cache
+from anonymizer.mapping_store import MappingBuilder, save_mapping
+from anonymizer.io_utils import open_log
+
+# Zeek column names that the anonymization strategies know under another name
+ZEEK_FIELD_NAMES = {
+    "ts": "timestamp",
+    "id.orig_h": "src_ip",
+    "id.orig_p": "src_port",
+    "id.resp_h": "dest_ip",
+    "id.resp_p": "dest_port",
+    "proto": "protocol",
+}
+# Columns assumed for Zeek files that come without a #fields header
+ZEEK_DEFAULT_FIELDS = ["ts", "uid", "id.orig_h", "id.orig_p", "id.resp_h", "id.resp_p", "proto", "service"]
+
+# Fields whose offsets are recorded for reconstruction
+MAPPING_FIELDS = ["timestamp", "src_ip", "src_port", "dest_ip", "dest_port"]
+SYSLOG_MAPPING_FIELDS = ["timestamp", "hostname", "app_name", "src_ip", "src_port", "dest_ip", "dest_port"]
+
+# RFC 5424: <PRI>VERSION TIMESTAMP HOSTNAME APP-NAME PROCID MSGID STRUCTURED-DATA [MSG]
+SYSLOG_HEADER = re.compile(
+    r"<(?P<priority>\d+)>"
+    r"(?P<version>\d+)? "
+    r"(?P<timestamp>\S+) "
+    r"(?P<hostname>\S+) "
+    r"(?P<app_name>\S+) "
+    r"(?P<proc_id>\S+) "
+    r"(?P<msg_id>\S+) "
+    # "-" or one or more [SD-ID PARAM="VALUE" ...] elements; quoted values may hold ] and \"
+    r'(?P<structured_data>-|(?:\[[^"\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\]]*)*\])+)'
+    r"(?: (?P<message>.*))?"
+)
+SYSLOG_HEADER_FIELDS = ["timestamp", "hostname", "app_name"]
+SYSLOG_SD_PARAM = re.compile(r'(?P<param_name>[^\s=\]"]+)="(?P<param_value>(?:[^"\\]|\\.)*)"')
+SYSLOG_KV_PAIR = re.compile(r"\b(?P<key>\w+)=[\"']?(?P<value>[^\"'\s]+)")
+
+LOG_PATTERNS = {
+    "suricata": re.compile(
+        r"(?P<timestamp>\d{2}/\d{2}/\d{4}-\d{2}:\d{2}:\d{2}\.\d+)  \[\*\*\] (?P<alert>.*?) \[\*\*\] "
+        r"\[Classification: (?P<classification>.*?)\] \[Priority: (?P<priority>\d+)\] "
+        r"\{(?P<protocol>.*?)\} (?P<src_ip>\d+\.\d+\.\d+\.\d+):(?P<src_port>\d+) -> "
+        r"(?P<dest_ip>\d+\.\d+\.\d+\.\d+):(?P<dest_port>\d+)"
+    ),
+    "firewall": re.compile(
+        r"(?P<timestamp>[\w\s:]+) SRC=(?P<src_ip>\d+\.\d+\.\d+\.\d+) DST=(?P<dest_ip>\d+\.\d+\.\d+\.\d+) "
+        r"SPT=(?P<src_port>\d+) DPT=(?P<dest_port>\d+)"
+    ),
+    "pfsense": re.compile(
+        r"(?P<timestamp>\w{3} \d{1,2} \d{2}:\d{2}:\d{2}) (?P<hostname>\S+) (?P<process>\S+): "
+        r"(?P<rule>\d+) rule \S+ \((?P<match>.*?)\) (?P<action>\w+) (?P<direction>\w+) on (?P<interface>\S+): "
+        r"\(proto (?P<protocol>\S+) .*?\) (?P<src_ip>\d+\.\d+\.\d+\.\d+):(?P<src_port>\d+) > "
+        r"(?P<dest_ip>\d+\.\d+\.\d+\.\d+):(?P<dest_port>\d+)"
+    ),
+}
+
 
 def parse_logs(log_file, log_type, temp_csv, mapping_file,config=None):
-    
-    logs = []
-    mapping = []
+    compression = (config or {}).get("input_compression")
+    if log_type == "zeek":
+        return _handle_zeek(log_file, temp_csv, compression)
 
-    if log_type == "syslog":
-        # Syslog-specific parsing with message decomposition
-        syslog_header = re.compile(
-            r"<(?P<priority>\d+)>"
-            r"(?P<version>\d+)? "  # Optional RFC 5424 version
-            r"(?P<timestamp>\S+)\s"  # RFC 3339 timestamp
-            r"(?P<hostname>\S+)\s"
-            r"(?P<app_name>\S+)\s"
-            r"(?P<proc_id>\S+)\s"
-            r"(?P<msg_id>\S+)\s"
-            r"(?P<structured_data>\S+)\s"  # RFC 5424 structured data
-            r"?(?P<message>.*)"  # Free-form message
-        )
-        
-        with open(log_file, "r") as f:
-            for line_no, line in enumerate(f, start=1):
-                header_match = syslog_header.match(line)
-                if not header_match:
-                    continue
-                
-                log_entry = header_match.groupdict()
-                log_entry["line_no"] = line_no
-                
-                # Additional parsing for structured data
-                if log_entry['structured_data'] != '-':
-                    sd_parser = re.finditer(
-                        r"(?P<param_name>\w+)=\"(?P<param_value>[^\"]*)\"",
-                        log_entry['structured_data']
-                    )
-                    for match in sd_parser:
-                        log_entry[match.group('param_name')] = match.group('param_value')
-                
-                # Extract key-value pairs from message body
-                kv_pairs = re.findall(
-                    r"\b(?P<key>\w+)=[\"']?(?P<value>[^\"'\s]+)", 
-                    log_entry['message']
-                )
-                for key, value in kv_pairs:
-                    log_entry[key] = value
-                
-                logs.append(log_entry)
-                
-                # Store mapping
-                mapping_fields = ["timestamp", "hostname", "app_name", "src_ip", "dest_ip"]
-                for field in mapping_fields:
-                    if field in log_entry:
-                        mapping.append({
-                            "line_no": line_no,
-                            "field": field,
-                            "original_value": log_entry[field]
-                        })
-
-    elif log_type == "pfsense":
-        # Existing pfSense parsing
-        pattern = re.compile(
-            r"(?P<timestamp>\w{3} \d{1,2} \d{2}:\d{2}:\d{2}) (?P<hostname>\S+) (?P<process>\S+): "
-            r"(?P<rule>\d+) rule \S+ \((?P<match>.*?)\) (?P<action>\w+) (?P<direction>\w+) on (?P<interface>\S+): "
-            r"\(proto (?P<protocol>\S+) .*?\) (?P<src_ip>\d+\.\d+\.\d+\.\d+):(?P<src_port>\d+) > "
-            r"(?P<dest_ip>\d+\.\d+\.\d+\.\d+):(?P<dest_port>\d+)"
-        )
+    with open_log(log_file, "r", compression, errors="replace") as f:
+        logs, mapping = parse_lines(f, log_type, config)
 
-        logs, mapping = _generic_parser(log_file, pattern)
-
-    elif log_type in ["suricata", "firewall", "zeek"]:
-        # Existing parsers for other types
-        if log_type == "zeek":
-            return _handle_zeek(log_file, temp_csv)
-            
-        pattern = {
-            "suricata": re.compile(
-                r"(?P<timestamp>\d{2}/\d{2}/\d{4}-\d{2}:\d{2}:\d{2}\.\d+)  \[\*\*\] (?P<alert>.*?) \[\*\*\] "
-                r"\[Classification: (?P<classification>.*?)\] \[Priority: (?P<priority>\d+)\] "
-                r"\{(?P<protocol>.*?)\} (?P<src_ip>\d+\.\d+\.\d+\.\d+):(?P<src_port>\d+) -> "
-                r"(?P<dest_ip>\d+\.\d+\.\d+\.\d+):(?P<dest_port>\d+)"
-            ),
-            "firewall": re.compile(
-                r"(?P<timestamp>[\w\s:]+) SRC=(?P<src_ip>\d+\.\d+\.\d+\.\d+) DST=(?P<dest_ip>\d+\.\d+\.\d+\.\d+) "
-                r"SPT=(?P<src_port>\d+) DPT=(?P<dest_port>\d+)"
-            )
-        }[log_type]
-        logs, mapping = _generic_parser(log_file, pattern)
-
-    elif log_type == "custom":
-        pattern = config.get("anonymization", {}).get("custom_format", {}).get("pattern")
-        # print(config)
-        if not pattern:
-            raise ValueError("Custom format specified but no pattern provided in config.")
-        pattern = re.compile(pattern)
-        logs, mapping = _custom_parser(log_file, pattern,config)
     # Save results
     df_logs = pd.DataFrame(logs)
-    df_mapping = pd.DataFrame(mapping)
 
     df_logs.to_csv(temp_csv, index=False)
-    df_mapping.to_csv(mapping_file, index=False)
+    if mapping_file:
+        save_mapping(mapping, mapping_file)
 
     print(f"✅ Temporary structured logs saved in {temp_csv}")
-    return df_logs, df_mapping
+    return df_logs, mapping
 
-def _generic_parser(log_file, pattern):
-    """Handles common parsing flow for non-Syslog types"""
-    logs = []
-    mapping = []
-    
-    with open(log_file, "r") as f:
-        for line_no, line in enumerate(f, start=1):
-            match = pattern.search(line)
-            if match:
-                log_entry = match.groupdict()
-                log_entry["line_no"] = line_no
-                logs.append(log_entry)
-
-                for field in ["timestamp", "src_ip", "src_port", "dest_ip", "dest_port"]:
-                    if field in log_entry:
-                        if field in match.re.groupindex:
-                            offset = match.start(field)  # 👈 this gives position of field in line
-                        else:
-                            offset = -1 
-                        mapping.append({
-                            "line_no": line_no,
-                            "field": field,
-                            "original_value": log_entry[field],
-                            "offset" : offset
-                        })
-    return logs, mapping
-
-def _custom_parser(log_file, pattern, config):
+def parse_lines(lines, log_type, config=None, start_line_no=1, fields=None):
+    """
+    Parse an iterable of raw log lines into structured entries and a
+    MappingTable of the fields to anonymize.
+
+    Line numbers start at `start_line_no` so chunks of a larger file keep
+    their absolute positions. `fields` restricts the parsed columns to the
+    ones that are needed (all by default).
+    """
+    if log_type == "syslog":
+        return _syslog_parser(lines, start_line_no, fields)
+
+    return get_extractor(log_type, config, fields).parse(lines, start_line_no)
+
+def iter_log_chunks(f, chunk_size):
+    """Yield (start_line_no, lines) tuples of at most `chunk_size` lines from an open file or any iterable of lines."""
+    f = iter(f)  # A list would otherwise restart from its first line on every islice
+    line_no = 1
+    while True:
+        lines = list(islice(f, chunk_size))
+        if not lines:
+            return
+        yield line_no, lines
+        line_no += len(lines)
+
+def _syslog_parser(lines, start_line_no=1, fields=None):
+    """
+    Parse RFC 5424 syslog lines: the header, the parameters of every
+    SD-ELEMENT and the key=value pairs of the message body.
+
+    Offsets are recorded for the SYSLOG_MAPPING_FIELDS wherever in the line
+    they were found, so the lines can be rewritten like any other format.
+    When a name appears more than once the last occurrence wins, with the
+    message body after the structured data. `fields` restricts the parsed
+    columns; the mapping fields always get a column, even if no line has them.
+    """
     logs = []
-    mapping = []
-
-    with open(log_file, "r", encoding="utf-8", errors="replace") as f:
-        for line_no, line in enumerate(f, start=1):
-            match = pattern.search(line)
-            if match:
-                log_entry = match.groupdict()
-                log_entry["line_no"] = line_no
-                logs.append(log_entry)
-                fields_from_config = config.get("anonymization", {}).get("custom_format", {}).get("fields", [])
-                for field in fields_from_config:
-                    # print(f"field is {field}")
-                    if field in log_entry:
-                        if field in match.re.groupindex:
-                            offset = match.start(field)  # 👈 this gives position of field in line
-                        else:
-                            offset = -1 
-                        mapping.append({
-                            "line_no": line_no,
-                            "field": field,
-                            "original_value": log_entry[field],
-                            "offset" : offset
-                        })
-    return logs, mapping
-
-def _handle_zeek(log_file, temp_csv):
+    mapping = MappingBuilder()
+    add = mapping.add
+    match_header = SYSLOG_HEADER.match
+    find_params = SYSLOG_SD_PARAM.finditer
+    find_pairs = SYSLOG_KV_PAIR.finditer
+    groups = SYSLOG_HEADER.groupindex
+    sd_group, message_group = groups["structured_data"], groups["message"]
+
+    mapped = {f for f in SYSLOG_MAPPING_FIELDS if fields is None or f in fields}
+    header_mapped = [(f, groups[f]) for f in SYSLOG_HEADER_FIELDS if f in mapped]
+    columns = SYSLOG_MAPPING_FIELDS if fields is None else list(fields)
+    missing_columns = [f for f in columns if f not in groups]
+
+    for line_no, line in enumerate(lines, start=start_line_no):
+        header = match_header(line)
+        if header is None:
+            continue
+
+        log_entry = header.groupdict()
+        offsets = {field: header.start(group) for field, group in header_mapped}
+
+        structured_data = log_entry["structured_data"]
+        if structured_data != "-":
+            base = header.start(sd_group)
+            for param in find_params(structured_data):
+                name, value = param.groups()
+                log_entry[name] = value
+                if name in mapped:
+                    offsets[name] = base + param.start(2)
+
+        message = log_entry["message"]
+        if message:
+            base = header.start(message_group)
+            for pair in find_pairs(message):
+                key, value = pair.groups()
+                log_entry[key] = value
+                if key in mapped:
+                    offsets[key] = base + pair.start(2)
+
+        for field, offset in offsets.items():
+            add(line_no, field, log_entry[field], offset)
+
+        if fields is None:
+            for field in missing_columns:
+                log_entry.setdefault(field, None)
+        else:
+            log_entry = {field: log_entry.get(field) for field in columns}
+        log_entry["line_no"] = line_no
+        logs.append(log_entry)
+    return logs, mapping.build()
+
+class LineExtractor:
+    """
+    Compiled extractor for one log format.
+
+    Lines without the format's literal `prefilter` are skipped before any
+    regex work, the pattern is tried anchored at the start of the line
+    first (falling back to a search only when that fails), and only the
+    requested `fields` are materialized, as columns. Offsets are recorded
+    for the fields in `mapping_fields`.
+    """
+
+    def __init__(self, pattern, mapping_fields, fields=None, prefilter=None):
+        self.pattern = pattern
+        self.prefilter = prefilter
+        groups = pattern.groupindex
+        self.fields = [f for f in groups if fields is None or f in fields]
+        self.mapped = [(f, groups[f]) for f in mapping_fields if f in self.fields]
+        self._group_numbers = [groups[f] - 1 for f in self.fields]  # Indexes into match.groups()
+
+    def parse(self, lines, start_line_no=1):
+        columns = [[] for _ in self.fields]
+        line_nos = []
+        mapping = MappingBuilder()
+        add = mapping.add
+        prefilter = self.prefilter
+        match_at_start = self.pattern.match
+        search = self.pattern.search
+        numbered_columns = list(zip(self._group_numbers, columns))
+        mapped = self.mapped
+
+        for line_no, line in enumerate(lines, start=start_line_no):
+            if prefilter is not None and prefilter not in line:
+                continue
+            match = match_at_start(line) or search(line)
+            if match is None:
+                continue
+
+            groups = match.groups()
+            for number, column in numbered_columns:
+                column.append(groups[number])
+            line_nos.append(line_no)
+
+            for field, group in mapped:
+                add(line_no, field, match.group(group), match.start(group))
+
+        logs = dict(zip(self.fields, columns))
+        logs["line_no"] = line_nos
+        return logs, mapping.build()
+
+# Literal every line of a built-in format contains; lines without it are skipped unparsed
+LOG_PREFILTERS = {
+    "suricata": "[**]",
+    "firewall": "SRC=",
+    "pfsense": " rule ",
+}
+
+@lru_cache(maxsize=None)
+def _builtin_extractor(log_type, fields):
+    return LineExtractor(LOG_PATTERNS[log_type], MAPPING_FIELDS, fields, LOG_PREFILTERS.get(log_type))
+
+def get_extractor(log_type, config=None, fields=None):
+    """
+    Return the LineExtractor for `log_type`.
+
+    `fields` limits the parsed columns (default: every named group); the
+    custom format records offsets for its configured `fields` and may set
+    an optional literal `prefilter`.
+    """
+    fields = None if fields is None else tuple(fields)
+    if log_type == "custom":
+        custom_format = (config or {}).get("anonymization", {}).get("custom_format", {})
+        pattern = custom_format.get("pattern")
+        if not pattern:
+            raise ValueError("Custom format specified but no pattern provided in config.")
+        return LineExtractor(re.compile(pattern), custom_format.get("fields", []), fields,
+                             custom_format.get("prefilter"))
+
+    if log_type not in LOG_PATTERNS:
+        raise ValueError(f"Unsupported log type: {log_type}")
+    return _builtin_extractor(log_type, fields)
+
+class ZeekHeader:
+    """
+    Schema of a Zeek TSV log, taken from its #separator, #fields and #types
+    directives. The header lines are kept verbatim so they can be written
+    back out, and `trailer` collects the comment lines (#close) that follow
+    the data.
+    """
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.trailer = []
+        self.separator = "\t"
+        self.fields = list(ZEEK_DEFAULT_FIELDS)
+        self.types = []
+
+        for line in lines:
+            directive = line.rstrip("\r\n")
+            if directive.startswith("#separator "):
+                self.separator = directive.split(" ", 1)[1].encode("ascii").decode("unicode_escape")
+            elif directive.startswith("#fields" + self.separator):
+                self.fields = directive.split(self.separator)[1:]
+            elif directive.startswith("#types" + self.separator):
+                self.types = directive.split(self.separator)[1:]
+
+    @property
+    def columns(self):
+        """DataFrame column names, with the connection fields renamed for the strategies."""
+        return [ZEEK_FIELD_NAMES.get(field, field) for field in self.fields]
+
+
+def read_zeek(f, chunk_size):
+    """
+    Read a Zeek TSV log in bounded chunks.
+
+    Returns the ZeekHeader and an iterator of DataFrames of at most
+    `chunk_size` rows. Every column is kept as text so values that are not
+    anonymized are written back byte for byte; the Zeek types stay
+    available on the header.
+    """
+    lines = iter(f)
+    header_lines = []
+    first_row = None
+    for line in lines:
+        if not line.startswith("#"):
+            first_row = line
+            break
+        header_lines.append(line)
+    header = ZeekHeader(header_lines)
+
+    def chunks():
+        rows = lines if first_row is None else _prepend(first_row, lines)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            data = []
+            for line in chunk:
+                if line.startswith("#"):
+                    header.trailer.append(line)
+                elif line.strip():
+                    data.append(line.rstrip("\r\n"))
+            yield _zeek_frame(data, header)
+
+    return header, chunks()
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+@lru_cache(maxsize=None)
+def _pyarrow():
+    """pyarrow and its CSV reader, imported on the first Zeek chunk; None when it is not installed."""
+    try:  # Optional: faster TSV splitting for wide Zeek logs
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+    except ImportError:
+        return None
+    return pa, pa_csv
+
+def _zeek_frame(rows, header):
+    """Split TSV rows into a DataFrame of strings, with pyarrow when it is installed."""
+    columns = header.columns
+    if rows and _pyarrow() is not None:
+        pa, pa_csv = _pyarrow()
+        table = pa_csv.read_csv(
+            pa.py_buffer("\n".join(rows).encode("utf-8")),
+            read_options=pa_csv.ReadOptions(column_names=columns),
+            parse_options=pa_csv.ParseOptions(delimiter=header.separator, quote_char=False,
+                                              double_quote=False, escape_char=False),
+            convert_options=pa_csv.ConvertOptions(column_types={c: pa.string() for c in columns},
+                                                  strings_can_be_null=False),
+        )
+        return table.to_pandas()
+    return pd.DataFrame([row.split(header.separator) for row in rows], columns=columns, dtype=object)
+
+def _handle_zeek(log_file, temp_csv, compression=None):
     """Special handling for Zeek logs"""
-    df = pd.read_csv(log_file, delimiter="\t", comment='#', header=None)
-    df.columns = ["timestamp", "uid", "src_ip", "src_port", "dest_ip", "dest_port", "protocol", "service"]
+    with open_log(log_file, "r", compression, errors="replace") as f:
+        _, chunks = read_zeek(f, 100_000)
+        df = pd.concat(list(chunks), ignore_index=True)
     df.to_csv(temp_csv, index=False)
     print(f"✅ Temporary structured logs saved in {temp_csv}")
     return df, None
@@ -1,52 +1,126 @@
+import numpy as np
 import pandas as pd
+from anonymizer.mapping_store import MappingTable, NO_OFFSET, load_mapping
+from anonymizer.io_utils import open_log
 
-def replace_anonymized_values(mapping_file, anonymized_csv, original_log_file, output_log_file):
-    """Replace anonymized values back into the original log format using exact field offsets."""
+def replace_anonymized_values(mapping_file, anonymized_csv, original_log_file, output_log_file,
+                              input_compression=None, output_compression=None):
+    """
+    Replace anonymized values back into the original log format using exact field offsets.
 
-    import pandas as pd
+    Compressed originals are read and compressed output written as streams;
+    the compression comes from the file extension unless one is given.
+    """
 
-    df_mapping = pd.read_csv(mapping_file)
-    df_anonymized = pd.read_csv(anonymized_csv)
+    mapping = load_mapping(mapping_file)
 
-    # Build dynamic lookup for anonymized fields
-    anon_lookup = {}
-    for _, row in df_anonymized.iterrows():
-        line_no = row['line_no']
-        for field in df_anonymized.columns:
-            if field == 'line_no':
-                continue
-            anon_lookup[(line_no, field)] = str(row[field])
+    # Read everything as text so values round-trip exactly (no "57621.0" ports)
+    df_anonymized = pd.read_csv(anonymized_csv, dtype=str, keep_default_na=False)
+    df_anonymized["line_no"] = df_anonymized["line_no"].astype(np.int64)
 
-    # Group mapping entries by line number
-    grouped_mappings = df_mapping.groupby("line_no")
+    replacements = build_replacements(mapping, df_anonymized)
 
-    reconstructed_logs = []
+    with open_log(original_log_file, "r", input_compression, errors="replace") as f, \
+            open_log(output_log_file, "w", output_compression) as f_out:
+        f_out.writelines(apply_replacements(f, replacements))
 
-    with open(original_log_file, "r", encoding="utf-8") as f:
-        for current_line_no, line in enumerate(f, start=1):
-            line = list(line)  # Convert to list of characters for safe in-place mutation
+    print(f"✅ Reconstructed logs saved in {output_log_file}")
 
-            if current_line_no in grouped_mappings.groups:
-                line_mappings = grouped_mappings.get_group(current_line_no)
+def build_replacements(mapping, df_anonymized):
+    """
+    Turn the field mapping and the anonymized rows into columnar replacement arrays.
 
-                # Sort by offset descending to avoid messing up indexes
-                line_mappings = line_mappings.sort_values("offset", ascending=False)
+    `mapping` is a MappingTable (or a DataFrame in the log_mapping.csv
+    layout). Returns a dict of equally long arrays (line_no, field_id,
+    offset, length, original, replacement) sorted once by (line_no, offset),
+    plus the interned field names under "fields".
+    """
+    if isinstance(mapping, pd.DataFrame):
+        mapping = MappingTable.from_dataframe(mapping)
 
-                for _, entry in line_mappings.iterrows():
-                    field = entry["field"]
-                    offset = int(entry["offset"])
-                    original_val = str(entry["original_value"])
-                    anon_val = anon_lookup.get((current_line_no, field), original_val)
+    if "line_no" not in df_anonymized.columns:  # No line of the chunk parsed
+        df_anonymized = pd.DataFrame({"line_no": np.empty(0, dtype=np.int64)})
 
-                    # Replace in-place
-                    if line[offset:offset+len(original_val)] == list(original_val):
-                        line[offset:offset+len(original_val)] = list(anon_val)
+    line_no = mapping.line_no.astype(np.int64)
+    offsets = mapping.offset.astype(np.int64)
+    lengths = mapping.length.astype(np.int64)
+    field_ids = mapping.field_id.astype(np.int32)
+    fields = mapping.fields
+    original = mapping.original_values()
+    replacement = original.copy()
 
-            reconstructed_logs.append("".join(line))
+    anonymized = df_anonymized.set_index("line_no")
+    for field_id, field in enumerate(fields):
+        if field not in anonymized.columns:
+            continue
+        rows = field_ids == field_id
+        values = anonymized[field].reindex(line_no[rows]).to_numpy(dtype=object)
+        found = ~pd.isna(values)
+        replacement[np.flatnonzero(rows)[found]] = [str(value) for value in values[found]]
 
-    # Write reconstructed logs
-    with open(output_log_file, "w", encoding="utf-8") as f_out:
-        f_out.writelines(reconstructed_logs)
+    # Fields without a known position cannot be rewritten
+    keep = offsets != NO_OFFSET
+    _warn_unplaced_fields(fields, field_ids[~keep], original[~keep] != replacement[~keep])
+    line_no, offsets, lengths, field_ids = line_no[keep], offsets[keep], lengths[keep], field_ids[keep]
+    original, replacement = original[keep], replacement[keep]
 
+    order = np.lexsort((offsets, line_no))
+    return {
+        "line_no": line_no[order], "field_id": field_ids[order],
+        "offset": offsets[order], "length": lengths[order],
+        "original": original[order], "replacement": replacement[order],
+        "fields": list(fields),
+    }
 
-    print(f"✅ Reconstructed logs saved in {output_log_file}")
+def _warn_unplaced_fields(fields, field_ids, changed):
+    """Flag anonymized values that have no offset, since the originals stay in the output."""
+    leaked = sorted({fields[field_id] for field_id in field_ids[changed.astype(bool)]})
+    if leaked:
+        print(f"⚠️ No offsets for {', '.join(leaked)}: these values are NOT replaced in the output log")
+
+def apply_replacements(lines, replacements, start_line_no=1):
+    """
+    Yield each line with its replacements applied, as a single join of slices.
+
+    Replacements are applied left to right against the original offsets, so
+    values that change length never require rescanning the line. A
+    replacement is skipped if the line does not hold the original value at
+    its offset.
+    """
+    # Plain lists make the per-line scalar access cheap
+    line_nos = replacements["line_no"].tolist()
+    offsets = replacements["offset"].tolist()
+    lengths = replacements["length"].tolist()
+    originals = replacements["original"].tolist()
+    values = replacements["replacement"].tolist()
+    total = len(line_nos)
+    ptr = 0
+
+    for current_line_no, line in enumerate(lines, start=start_line_no):
+        while ptr < total and line_nos[ptr] < current_line_no:
+            ptr += 1
+        if ptr >= total or line_nos[ptr] != current_line_no:
+            yield line
+            continue
+
+        pieces = []
+        cursor = 0
+        while ptr < total and line_nos[ptr] == current_line_no:
+            offset = offsets[ptr]
+            end = offset + lengths[ptr]
+            if offset >= cursor and line[offset:end] == originals[ptr]:
+                pieces.append(line[cursor:offset])
+                pieces.append(values[ptr])
+                cursor = end
+            ptr += 1
+        pieces.append(line[cursor:])
+        yield "".join(pieces)
+
+def rewrite_lines(lines, mapping, df_anonymized, start_line_no=1):
+    """
+    Yield each line with its mapped fields replaced by their anonymized values.
+
+    `lines` may be a whole file or a chunk of one; `start_line_no` is the
+    line number of its first line, matching the numbering used by the parser.
+    """
+    return apply_replacements(lines, build_replacements(mapping, df_anonymized), start_line_no)
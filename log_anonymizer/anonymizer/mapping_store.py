@@ -0,0 +1,210 @@
+import json
+import os
+from array import array
+import numpy as np
+import pandas as pd
+
+# Offset recorded for fields whose position in the line is unknown
+NO_OFFSET = 0xFFFFFFFF
+
+# One fixed-size record per mapped field; the file can be memory-mapped as is
+RECORD_DTYPE = np.dtype([
+    ("line_no", "<u4"),
+    ("field_id", "<u2"),
+    ("offset", "<u4"),
+    ("length", "<u4"),
+    ("value_id", "<u4"),
+])
+
+RECORDS_FILE = "records.bin"
+VALUES_FILE = "values.bin"
+VALUE_ENDS_FILE = "value_ends.bin"
+FIELDS_FILE = "fields.json"
+
+
+class MappingTable:
+    """
+    Struct-of-arrays field mapping: one row per (line, field) with the field's
+    offset and length in the line, and its original value stored by reference
+    into a dictionary of distinct values.
+    """
+
+    def __init__(self, records, fields, values):
+        self.records = records
+        self.fields = list(fields)
+        self.values = values
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def line_no(self):
+        return self.records["line_no"]
+
+    @property
+    def field_id(self):
+        return self.records["field_id"]
+
+    @property
+    def offset(self):
+        return self.records["offset"]
+
+    @property
+    def length(self):
+        return self.records["length"]
+
+    @property
+    def value_id(self):
+        return self.records["value_id"]
+
+    def original_values(self):
+        """Original value of every row, as an object array."""
+        values = np.asarray(self.values, dtype=object)
+        return values[self.value_id] if len(values) else np.empty(0, dtype=object)
+
+    def to_dataframe(self):
+        """Row-per-field DataFrame in the layout of the old log_mapping.csv."""
+        offsets = self.offset.astype(np.int64)
+        offsets[offsets == NO_OFFSET] = -1
+        return pd.DataFrame({
+            "line_no": self.line_no.astype(np.int64),
+            "field": np.asarray(self.fields, dtype=object)[self.field_id] if len(self) else np.empty(0, dtype=object),
+            "original_value": self.original_values(),
+            "offset": offsets,
+        })
+
+    @classmethod
+    def from_dataframe(cls, df_mapping):
+        """Build a table from a DataFrame with line_no, field, original_value and optional offset columns."""
+        builder = MappingBuilder()
+        offsets = df_mapping["offset"] if "offset" in df_mapping.columns else [-1] * len(df_mapping)
+        for line_no, field, value, offset in zip(df_mapping["line_no"], df_mapping["field"],
+                                                 df_mapping["original_value"], offsets):
+            builder.add(int(line_no), field, str(value), -1 if pd.isna(offset) else int(offset))
+        return builder.build()
+
+    def save(self, path):
+        """Write the table in the binary sidecar format."""
+        with MappingWriter(path) as writer:
+            writer.append(self)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a binary sidecar; records are memory-mapped unless `mmap` is False."""
+        records_path = os.path.join(path, RECORDS_FILE)
+        if os.path.getsize(records_path) == 0:
+            records = np.empty(0, dtype=RECORD_DTYPE)
+        elif mmap:
+            records = np.memmap(records_path, dtype=RECORD_DTYPE, mode="r")
+        else:
+            records = np.fromfile(records_path, dtype=RECORD_DTYPE)
+
+        with open(os.path.join(path, FIELDS_FILE), "r", encoding="utf-8") as f:
+            fields = json.load(f)
+
+        blob = np.fromfile(os.path.join(path, VALUES_FILE), dtype=np.uint8).tobytes()
+        ends = np.fromfile(os.path.join(path, VALUE_ENDS_FILE), dtype="<u8").tolist()
+        starts = [0] + ends[:-1]
+        values = [blob[start:end].decode("utf-8") for start, end in zip(starts, ends)]
+        return cls(records, fields, values)
+
+
+class MappingBuilder:
+    """Accumulates mapping rows while parsing, interning field names and values."""
+
+    def __init__(self):
+        self._line_no = array("I")
+        self._field_id = array("H")
+        self._offset = array("I")
+        self._length = array("I")
+        self._value_id = array("I")
+        self._fields = {}
+        self._values = {}
+
+    def add(self, line_no, field, value, offset=-1):
+        if value is None:  # Optional group that did not participate in the match
+            return
+        field_id = self._fields.get(field)
+        if field_id is None:
+            field_id = self._fields[field] = len(self._fields)
+        value_id = self._values.get(value)
+        if value_id is None:
+            value_id = self._values[value] = len(self._values)
+
+        self._line_no.append(line_no)
+        self._field_id.append(field_id)
+        self._offset.append(NO_OFFSET if offset is None or offset < 0 else offset)
+        self._length.append(len(value))
+        self._value_id.append(value_id)
+
+    def build(self):
+        records = np.empty(len(self._line_no), dtype=RECORD_DTYPE)
+        records["line_no"] = np.frombuffer(self._line_no, dtype=np.uint32) if self._line_no else 0
+        records["field_id"] = np.frombuffer(self._field_id, dtype=np.uint16) if self._field_id else 0
+        records["offset"] = np.frombuffer(self._offset, dtype=np.uint32) if self._offset else 0
+        records["length"] = np.frombuffer(self._length, dtype=np.uint32) if self._length else 0
+        records["value_id"] = np.frombuffer(self._value_id, dtype=np.uint32) if self._value_id else 0
+        return MappingTable(records, list(self._fields), list(self._values))
+
+
+class MappingWriter:
+    """
+    Appends mapping tables chunk by chunk to a binary sidecar directory.
+
+    Values are interned per chunk and their ids shifted by the number of
+    values already written, so memory stays bounded by the chunk size.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._records = open(os.path.join(path, RECORDS_FILE), "wb")
+        self._values = open(os.path.join(path, VALUES_FILE), "wb")
+        self._value_ends = open(os.path.join(path, VALUE_ENDS_FILE), "wb")
+        self._fields = {}
+        self._n_values = 0
+        self._blob_size = 0
+
+    def append(self, table):
+        if len(table.values):
+            encoded = [value.encode("utf-8") for value in table.values]
+            ends = self._blob_size + np.cumsum([len(b) for b in encoded], dtype=np.uint64)
+            self._values.write(b"".join(encoded))
+            self._value_ends.write(ends.astype("<u8").tobytes())
+            self._blob_size = int(ends[-1])
+
+        field_ids = np.array([self._fields.setdefault(field, len(self._fields)) for field in table.fields],
+                             dtype=np.uint16)
+        records = np.array(table.records, dtype=RECORD_DTYPE, copy=True)
+        if len(records):
+            records["field_id"] = field_ids[records["field_id"]]
+            records["value_id"] += self._n_values
+        self._records.write(records.tobytes())
+        self._n_values += len(table.values)
+
+    def close(self):
+        for f in (self._records, self._values, self._value_ends):
+            f.close()
+        with open(os.path.join(self.path, FIELDS_FILE), "w", encoding="utf-8") as f:
+            json.dump(list(self._fields), f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def save_mapping(mapping, mapping_file):
+    """Persist a mapping table; a .csv path writes the text layout for audits."""
+    if mapping_file.endswith(".csv"):
+        mapping.to_dataframe().to_csv(mapping_file, index=False)
+    else:
+        mapping.save(mapping_file)
+
+def load_mapping(mapping_file):
+    """Load a mapping table written by save_mapping, from either format."""
+    if mapping_file.endswith(".csv"):
+        df_mapping = pd.read_csv(mapping_file, dtype={"field": str, "original_value": str}, keep_default_na=False)
+        return MappingTable.from_dataframe(df_mapping)
+    return MappingTable.load(mapping_file)
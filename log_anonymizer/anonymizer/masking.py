@@ -1,3 +1,5 @@
+from anonymizer.factorize import map_unique
+
 def mask_data(column, mask_char="X", visible_chars=3):
     """
     Masks a column's values by replacing characters except for a few visible ones.
@@ -9,5 +11,7 @@ def mask_data(column, mask_char="X", visible_chars=3):
 
     Returns:
     Series: Masked column values.
+
+    Each distinct value is masked once; missing values stay missing.
     """
-    return column.apply(lambda x: x[:visible_chars] + mask_char * (len(x) - visible_chars))
+    return map_unique(column, lambda values: [x[:visible_chars] + mask_char * (len(x) - visible_chars) for x in values])
@@ -0,0 +1,225 @@
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_METRICS_INTERVAL = 60.0  # Seconds between metrics writes in follow and listen modes
+MAX_TRACKED_UNIQUES = 1_000_000  # Distinct values remembered per field; beyond it the count is a lower bound
+METRICS_FORMATS = ("json", "prometheus")
+PROMETHEUS_PREFIX = "log_anonymizer"
+
+
+def metrics_format(path, fmt=None):
+    """Return `fmt`, or "prometheus" for a .prom/.txt `path` and "json" otherwise."""
+    if fmt:
+        if fmt not in METRICS_FORMATS:
+            raise ValueError(f"Unsupported metrics format: {fmt}")
+        return fmt
+    return "prometheus" if os.path.splitext(path)[1].lower() in (".prom", ".txt") else "json"
+
+
+class PipelineMetrics:
+    """
+    Stage timers, row counts, distinct values per field and cache hit rates for one run.
+
+    Stages are always timed, which costs one clock read per chunk; distinct
+    values are only tracked once `configure` has been called. The report is
+    written at the end of the run with `write`, and by `maybe_write` every
+    `interval` seconds in runs that do not end on their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.enabled = False
+        self.output = None
+        self.format = "json"
+        self.interval = DEFAULT_METRICS_INTERVAL
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.uniques = {}
+        self.field_rows = {}
+        self.capped = set()
+        self.merged = {}  # field -> worker snapshots whose distinct counts were summed
+        self.caches = {}
+        self.worker_peak_rss = 0
+        self._last_write = time.monotonic()
+
+    def configure(self, output=None, fmt=None, interval=DEFAULT_METRICS_INTERVAL):
+        """Start tracking distinct values and set where (and how often) the report is written."""
+        self.enabled = True
+        self.output = output
+        self.format = metrics_format(output, fmt) if output else "json"
+        self.interval = interval
+
+    @contextmanager
+    def stage(self, name, rows=0):
+        """Time the enclosed block as (part of) stage `name`, which handled `rows` records."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start, rows)
+
+    def add_stage(self, name, seconds, rows=0, calls=1):
+        with self._lock:
+            stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0, "rows": 0})
+            stage["seconds"] += seconds
+            stage["calls"] += calls
+            stage["rows"] += rows
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, df_logs, fields):
+        """Remember the distinct values of `fields` in a parsed DataFrame (only when configured)."""
+        if not self.enabled:
+            return
+        for field in fields:
+            if field not in df_logs.columns:
+                continue
+            column = df_logs[field].dropna()
+            self.field_rows[field] = self.field_rows.get(field, 0) + len(column)
+            if field in self.capped:
+                continue
+            seen = self.uniques.setdefault(field, set())
+            seen.update(column.unique().tolist())
+            if len(seen) > MAX_TRACKED_UNIQUES:
+                self.capped.add(field)
+                self.uniques[field] = len(seen)
+
+    def add_cache(self, name, hits, misses):
+        with self._lock:
+            cache = self.caches.setdefault(name, {"hits": 0, "misses": 0})
+            cache["hits"] += hits
+            cache["misses"] += misses
+
+    def snapshot(self, vault=None):
+        """The report as a dict; `vault` adds its mapping cache hits and misses."""
+        caches = {name: dict(values) for name, values in self.caches.items()}
+        sources = []
+        if vault is not None:
+            sources.append(("vault", vault.hits, vault.misses))
+        paper_imple = sys.modules.get("anonymizer.paper_imple")  # Only if condensation was used
+        if paper_imple is not None and paper_imple.CRYPTOPAN_INSTANCES:
+            instances = paper_imple.CRYPTOPAN_INSTANCES.values()
+            sources.append(("cryptopan_prefix", sum(c.cache_hits for c in instances),
+                            sum(c.cache_misses for c in instances)))
+        for name, hits, misses in sources:
+            cache = caches.setdefault(name, {"hits": 0, "misses": 0})
+            cache["hits"] += hits
+            cache["misses"] += misses
+        for cache in caches.values():
+            total = cache["hits"] + cache["misses"]
+            cache["hit_rate"] = round(cache["hits"] / total, 6) if total else None
+
+        stages = {}
+        for name, stage in self.stages.items():
+            stages[name] = dict(stage, seconds=round(stage["seconds"], 6),
+                                rows_per_sec=round(stage["rows"] / stage["seconds"]) if stage["seconds"] and stage["rows"] else None)
+        fields = {}
+        for field, seen in self.uniques.items():
+            unique_values = seen if isinstance(seen, int) else len(seen)
+            rows = self.field_rows.get(field, 0)
+            # Share of rows whose value was already seen: what factorizing (or a mapping cache) saves
+            fields[field] = {"rows": rows, "unique_values": unique_values, "lower_bound": field in self.capped,
+                             "upper_bound": self.merged.get(field, 0) > 1,
+                             "repeat_rate": round(1 - unique_values / rows, 6) if rows else None}
+        report = {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+            "elapsed_seconds": round(time.time() - self.started, 6),
+            "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        }
+        if self.worker_peak_rss:
+            report["worker_peak_rss_bytes"] = self.worker_peak_rss
+        report.update(counters=dict(self.counters), stages=stages, fields=fields, caches=caches)
+        return report
+
+    def merge(self, snapshot):
+        """
+        Add the stages, counters, caches and fields of a worker process's snapshot.
+
+        Workers see disjoint rows, so a value seen by two of them is counted
+        twice: fields summed from several workers are flagged `upper_bound`.
+        The largest peak RSS of any worker is kept as `worker_peak_rss_bytes`.
+        """
+        for name, stage in snapshot["stages"].items():
+            self.add_stage(name, stage["seconds"], stage["rows"], stage["calls"])
+        for name, value in snapshot["counters"].items():
+            self.count(name, value)
+        for name, cache in snapshot["caches"].items():
+            self.add_cache(name, cache["hits"], cache["misses"])
+        for field, values in snapshot["fields"].items():
+            self.field_rows[field] = self.field_rows.get(field, 0) + values["rows"]
+            self.uniques[field] = self.uniques.get(field, 0) + values["unique_values"]
+            self.merged[field] = self.merged.get(field, 0) + 1
+            if values["lower_bound"]:
+                self.capped.add(field)
+        self.worker_peak_rss = max(self.worker_peak_rss, snapshot["peak_rss_bytes"],
+                                   snapshot.get("worker_peak_rss_bytes", 0))
+
+    def write(self, vault=None):
+        """Write the report to the configured output, replacing the previous one atomically."""
+        if not self.output:
+            return
+        snapshot = self.snapshot(vault)
+        text = to_prometheus(snapshot) if self.format == "prometheus" else json.dumps(snapshot, indent=2) + "\n"
+        temp_path = self.output + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, self.output)
+        self._last_write = time.monotonic()
+
+    def maybe_write(self, vault=None):
+        """Write the report if `interval` seconds have passed since the last write."""
+        if self.output and time.monotonic() - self._last_write >= self.interval:
+            self.write(vault)
+
+
+def to_prometheus(snapshot):
+    """Render a snapshot in the Prometheus text exposition format."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            lines.append(f"{PROMETHEUS_PREFIX}_{name}{{{label_text}}} {value}" if label_text
+                         else f"{PROMETHEUS_PREFIX}_{name} {value}")
+
+    metric("elapsed_seconds", "gauge", "Seconds since the run started.", [({}, snapshot["elapsed_seconds"])])
+    metric("peak_rss_bytes", "gauge", "Peak resident set size of the process.", [({}, snapshot["peak_rss_bytes"])])
+    if "worker_peak_rss_bytes" in snapshot:
+        metric("worker_peak_rss_bytes", "gauge", "Largest peak resident set size of a worker process.",
+               [({}, snapshot["worker_peak_rss_bytes"])])
+    metric("lines_total", "counter", "Lines by outcome.",
+           [({"outcome": name}, value) for name, value in snapshot["counters"].items()])
+    metric("stage_seconds_total", "counter", "Time spent in each pipeline stage.",
+           [({"stage": name}, stage["seconds"]) for name, stage in snapshot["stages"].items()])
+    metric("stage_rows_total", "counter", "Records handled by each pipeline stage.",
+           [({"stage": name}, stage["rows"]) for name, stage in snapshot["stages"].items()])
+    metric("field_rows_total", "counter", "Non-empty values seen per anonymized field.",
+           [({"field": name}, field["rows"]) for name, field in snapshot["fields"].items()])
+    metric("field_unique_values", "gauge", "Distinct values seen per anonymized field.",
+           [({"field": name}, field["unique_values"]) for name, field in snapshot["fields"].items()])
+    metric("cache_hits_total", "counter", "Mapping cache hits.",
+           [({"cache": name}, cache["hits"]) for name, cache in snapshot["caches"].items()])
+    metric("cache_misses_total", "counter", "Mapping cache misses.",
+           [({"cache": name}, cache["misses"]) for name, cache in snapshot["caches"].items()])
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Process-wide recorder: the pipeline stages report here, main.py configures and writes it
+METRICS = PipelineMetrics()
@@ -1,63 +1,44 @@
 import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.metrics import pairwise_distances
+from anonymizer.condensation import condense
 
-def laplace_noise(sensitivity, epsilon, size=1):
+def laplace_noise(sensitivity, epsilon, size=1, rng=None):
     """Generate Laplace noise based on given sensitivity and privacy parameter epsilon."""
-    return np.random.laplace(loc=0, scale=sensitivity / epsilon, size=size)
+    rng = rng if rng is not None else np.random.default_rng()
+    return rng.laplace(loc=0, scale=sensitivity / epsilon, size=size)
 
-def non_ip_diff_privacy(column, k=5, epsilon=1.0):
+def non_ip_diff_privacy(column, k=5, epsilon=1.0, sensitivity=1.0, seed=None):
     """
-    Applies Differentially Private Condensation to a single column.
-    
+    Applies Differentially Private Condensation to a single numeric column
+    (bytes, packets, durations, ...).
+
+    The values are sorted once and cut into contiguous groups of at least
+    k records; every value is replaced by its group's mean plus Laplace
+    noise, drawn for the whole column in one call.
+
     Parameters:
     - column: Pandas Series, the data to anonymize.
-    - k: Minimum cluster size for k-anonymity.
+    - k: Minimum group size for k-anonymity.
     - epsilon: Privacy budget for Laplace noise.
-    
+    - sensitivity: Sensitivity of the Laplace mechanism (noise scale is sensitivity / epsilon).
+    - seed: Optional seed for the random generator.
+
     Returns:
-    - A new Pandas Series with differentially private values.
+    - A new Pandas Series with differentially private values. Values that
+      are not numbers are left as they are.
     """
-    
-    column = column.values.reshape(-1, 1)  # Ensure correct shape for clustering
-    n = len(column)
+    column = pd.Series(column)
+    numbers = pd.to_numeric(column, errors="coerce").to_numpy(dtype=np.float64)
+    present = np.isfinite(numbers)
 
-    # Step 3: Cluster values based on their numerical similarity
-    kmeans = KMeans(n_clusters=min(k, n), n_init=10, random_state=42)
-    clusters = kmeans.fit_predict(column)
-    
-    # Step 4: Sort clusters by size
-    cluster_sizes = np.bincount(clusters)
-    sorted_clusters = np.argsort(cluster_sizes)
-    
-    # Step 5: Balance clusters (Reassigning small clusters)
-    for j in sorted_clusters:
-        if cluster_sizes[j] < k:
-            cluster_center = kmeans.cluster_centers_[j].reshape(1, -1)
-            distances = pairwise_distances(column, cluster_center)
-            closest_indices = np.argsort(distances.flatten())
-
-            # Move records to Cj
-            for idx in closest_indices:
-                if clusters[idx] != j and cluster_sizes[clusters[idx]] > k:
-                    cluster_sizes[clusters[idx]] -= 1
-                    cluster_sizes[j] += 1
-                    clusters[idx] = j
-                    if cluster_sizes[j] >= k:
-                        break
-    
-    # Step 6: Apply Differential Privacy
-    for j in range(k):
-        cluster_indices = np.where(clusters == j)[0]
-        print(cluster_indices)
-        if len(cluster_indices) > 0:
-            mean_value = np.mean(column[cluster_indices])
-            print(mean_value)
-            for idx in cluster_indices:
-                column[idx] = mean_value + laplace_noise(1, epsilon).item()
+    rng = np.random.default_rng(seed)
+    condensed = condense(numbers[present], k, epsilon, sensitivity, rng)
+    if present.all():
+        return pd.Series(condensed, index=column.index, name=column.name)
 
-    return pd.Series(column.flatten())
+    values = column.to_numpy(dtype=object, copy=True)
+    values[present] = condensed
+    return pd.Series(values, index=column.index, name=column.name)
 
 # Testing
 if __name__ == "__main__":
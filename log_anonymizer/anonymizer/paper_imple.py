@@ -1,116 +1,200 @@
-import csv
 import hashlib
-import json
-import sys
 import os
-import base64
+import ipaddress
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.metrics import pairwise_distances
 from Crypto.Cipher import AES
-from Crypto.Util.Padding import pad
+from anonymizer.condensation import condense
+
+DEFAULT_PREFIX_CACHE_SIZE = 1_000_000
+# Key -> its shared CryptoPAn instance; metrics sum their prefix cache hits
+CRYPTOPAN_INSTANCES = {}
+
 
 class CryptoPAn:
     """Crypto-PAn implementation for prefix-preserving anonymization."""
     
-    def __init__(self, key):
+    def __init__(self, key, cache_size=DEFAULT_PREFIX_CACHE_SIZE):
         """
         Initialize the CryptoPAn object with a key.
-        The key is hashed using SHA-256 to generate a 256-bit key for AES.
+        The key is hashed using SHA-256; the first half keys AES-128 and the
+        second half, encrypted once, becomes the 128-bit pad used to fill
+        the PRF input beyond the prefix.
+
+        PRF outputs are cached per (width, prefix length, prefix) with LRU
+        eviction, so addresses sharing a /16 or /24 reuse most of the AES work.
         """
-        self.key = hashlib.sha256(key.encode('utf-8')).digest()  # 256-bit key
-        self.cipher = AES.new(self.key, AES.MODE_ECB)  # AES in ECB mode
+        if isinstance(key, str):
+            key = key.encode('utf-8')
+        material = hashlib.sha256(key).digest()
+        self.cipher = AES.new(material[:16], AES.MODE_ECB)  # AES in ECB mode
+        self.pad = int.from_bytes(self.cipher.encrypt(material[16:]), 'big')
 
-    def anonymize_ip(self, ip_address):
+        self.cache_size = cache_size
+        self._prefix_cache = OrderedDict()
+        self.aes_calls = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def anonymize_ip(self, ip_address, prefix_bits=None):
+        """
+        Anonymize an IPv4 or IPv6 address while preserving its prefix structure.
+        Only the first `prefix_bits` bits are anonymized (all of them by
+        default); the remaining host bits stay unchanged.
         """
-        Anonymize an IP address while preserving its prefix structure.
-        The last octet (8 bits) remains unchanged.
+        return self.anonymize_ips([ip_address], prefix_bits)[0]
+
+    def anonymize_ips(self, ip_addresses, prefix_bits=None):
+        """Anonymize a batch of IPv4/IPv6 addresses, sharing one AES call for all uncached prefixes."""
+        unique_ips = list(dict.fromkeys(ip_addresses))
+        parsed = [ipaddress.ip_address(ip) for ip in unique_ips]
+        results = [None] * len(parsed)
+
+        for width, version in ((32, 4), (128, 6)):
+            indices = [i for i, ip in enumerate(parsed) if ip.version == version]
+            if not indices:
+                continue
+            n_bits = width if prefix_bits is None else min(prefix_bits, width)
+            values = [int(parsed[i]) for i in indices]
+            anonymized = self.anonymize_ints(values, width, n_bits)
+            for i, value in zip(indices, anonymized):
+                results[i] = str(ipaddress.ip_address(value) if version == 4 else ipaddress.IPv6Address(value))
+
+        anonymized = dict(zip(unique_ips, results))
+        return [anonymized[ip] for ip in ip_addresses]
+
+    def anonymize_ints(self, values, width, prefix_bits):
         """
-        ip_bin = self._ip_to_bin(ip_address)
-        anonymized_bin = self._prefix_preserving_encrypt(ip_bin[:24]) + ip_bin[24:]
-        return self._bin_to_ip(anonymized_bin)
-
-    def _ip_to_bin(self, ip_address):
-        parts = list(map(int, ip_address.split('.')))
-        ip_int = (parts[0] << 24) | (parts[1] << 16) | (parts[2] << 8) | parts[3]
-        return format(ip_int, '032b')
-
-    def _bin_to_ip(self, ip_bin):
-        ip_int = int(ip_bin, 2)
-        return f"{(ip_int >> 24) & 0xff}.{(ip_int >> 16) & 0xff}.{(ip_int >> 8) & 0xff}.{ip_int & 0xff}"
-
-    def _prefix_preserving_encrypt(self, ip_bin_24):
-        """Encrypt the first 24 bits of the IP address while preserving prefix structure."""
-        encrypted_bits = ""
-        
-        for i in range(24):
-            input_data = (encrypted_bits + ip_bin_24[len(encrypted_bits):]).ljust(32, '0')
-            input_data = int(input_data, 2).to_bytes(4, byteorder='big')
-            aes_input = input_data.ljust(16, b'\x00')
-            prf_output = self.cipher.encrypt(aes_input)
-            byte_index = i // 8
-            bit_index = 7 - (i % 8)
-            encrypted_bit = '1' if (prf_output[byte_index] & (1 << bit_index)) else '0'
-            encrypted_bits += encrypted_bit
-        
-        return encrypted_bits
-
-def hash_network_part(ip_address):
-    """Anonymize the network part of an IP address using Crypto-PAn."""
-    key = "my_secure_key"
-    cryptopan = CryptoPAn(key)
-    return cryptopan.anonymize_ip(ip_address)
-
-def add_laplace_noise(value, scale=1.0):
-    """Add Laplace noise to a numerical value for differential privacy."""
-    noise = np.random.laplace(loc=0, scale=scale)
-    return max(0, int(value + noise))
-
-def anonymize_ip_addresses(ip_column, k):
+        Prefix-preserving encryption of integer addresses of `width` bits.
+
+        Bit i of the result is bit i of the input XOR the first bit of
+        AES(first i input bits || pad), so two addresses sharing a k-bit
+        prefix keep sharing a k-bit prefix after anonymization.
+        """
+        unique_values = list(dict.fromkeys(values))
+        flips = self._prefix_flips(unique_values, width, prefix_bits)
+        anonymized = {}
+        for value in unique_values:
+            mask = 0
+            for i in range(prefix_bits):
+                if flips[(width, i, value >> (width - i))]:
+                    mask |= 1 << (width - 1 - i)
+            anonymized[value] = value ^ mask
+        return [anonymized[value] for value in values]
+
+    def _prefix_flips(self, values, width, prefix_bits):
+        """Return the PRF bit for every prefix of `values`, encrypting all cache misses in one batch."""
+        flips = {}
+        missing = []
+        cache = self._prefix_cache
+
+        for value in values:
+            for i in range(prefix_bits):
+                node = (width, i, value >> (width - i))
+                if node in flips:
+                    continue
+                bit = cache.get(node)
+                if bit is None:
+                    flips[node] = None
+                    missing.append(node)
+                    self.cache_misses += 1
+                else:
+                    cache.move_to_end(node)
+                    flips[node] = bit
+                    self.cache_hits += 1
+
+        if missing:
+            blocks = b''.join(self._prf_input(i, prefix).to_bytes(16, 'big') for _, i, prefix in missing)
+            output = self.cipher.encrypt(blocks)
+            self.aes_calls += len(missing)
+            for j, node in enumerate(missing):
+                bit = output[16 * j] >> 7
+                flips[node] = bit
+                cache[node] = bit
+
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+        return flips
+
+    def _prf_input(self, prefix_len, prefix):
+        """The first `prefix_len` address bits followed by the pad bits, as a 128-bit block."""
+        if prefix_len == 0:
+            return self.pad
+        free_bits = 128 - prefix_len
+        return (prefix << free_bits) | (self.pad & ((1 << free_bits) - 1))
+
+
+def get_cryptopan(key):
+    """Return a shared CryptoPAn instance for `key` so its cipher and prefix cache are reused."""
+    if key not in CRYPTOPAN_INSTANCES:
+        CRYPTOPAN_INSTANCES[key] = CryptoPAn(key)
+    return CRYPTOPAN_INSTANCES[key]
+
+# Leading bits Crypto-PAn anonymizes; the rest is the host part that is condensed
+NETWORK_BITS = {4: 24, 6: 64}
+# Bits of the trailing host field that condensation replaces (last octet / last hextet)
+HOST_BITS = {4: 8, 6: 16}
+
+def hash_network_part(ip_address, key):
+    """Anonymize the network part of an IP address using Crypto-PAn keyed by `key`."""
+    cryptopan = get_cryptopan(key)
+    return cryptopan.anonymize_ip(ip_address, NETWORK_BITS[ipaddress.ip_address(ip_address).version])
+
+def anonymize_ip_addresses(ip_column, k, epsilon=1.0, seed=None, *, key):
     """
-    Anonymize IP addresses using prefix-preserving anonymization and clustering.
+    Anonymize IP addresses using prefix-preserving anonymization and condensation.
+
+    The network part (/24 for IPv4, /64 for IPv6) goes through Crypto-PAn
+    keyed by `key` (the run's salt or vault key, kept secret);
+    the last octet (IPv4) or last 16-bit group (IPv6) is replaced by the
+    noisy mean of a group of at least k records with neighbouring host
+    numbers. IPv4 and IPv6 addresses are condensed separately. Each
+    distinct address is parsed and encrypted once, and each distinct
+    result formatted once, so the cost per record is a few array lookups.
+    Values that are not IP addresses raise ValueError.
     """
-    D = [{'ip': ip} for ip in ip_column]
-    
-    for record in D:
-        record['ip'] = hash_network_part(record['ip'])
-    
-    ip_addresses = [record['ip'] for record in D]
-    host_numbers = [int(ip.split('.')[-1]) for ip in ip_addresses]
-    host_numbers = np.array(host_numbers).reshape(-1, 1)
-    
-    kmeans = KMeans(n_clusters=k)
-    clusters = kmeans.fit_predict(host_numbers)
-    
-    cluster_sizes = np.bincount(clusters)
-    sorted_clusters = np.argsort(cluster_sizes)
-    
-    for j in sorted_clusters:
-        if cluster_sizes[j] < k:
-            cluster_center = kmeans.cluster_centers_[j]
-            distances = pairwise_distances(host_numbers, [cluster_center])
-            closest_indices = np.argsort(distances.flatten())
-            
-            for idx in closest_indices:
-                if clusters[idx] != j and cluster_sizes[clusters[idx]] > k:
-                    clusters[idx] = j
-                    cluster_sizes[j] += 1
-                    cluster_sizes[clusters[idx]] -= 1
-                    if cluster_sizes[j] >= k:
-                        break
-    
-    for j in range(k):
-        cluster_indices = np.where(clusters == j)[0]
-        if len(cluster_indices) > 0:
-            mean_host_number = int(np.mean([host_numbers[idx] for idx in cluster_indices]))
-            for idx in cluster_indices:
-                ip_parts = ip_addresses[idx].split('.')
-                epsilon = 1
-                ip_parts[-1] = str(add_laplace_noise(mean_host_number, scale=1.0/epsilon))
-                D[idx]['ip'] = '.'.join(ip_parts)
-    
-    return [record['ip'] for record in D]
+    codes, unique_ips = pd.factorize(pd.Series(list(ip_column), dtype=object), use_na_sentinel=False)
+    parsed = []
+    for ip in unique_ips:
+        try:
+            parsed.append(ipaddress.ip_address(ip))
+        except ValueError:
+            raise ValueError(f"Condensation needs IPv4 or IPv6 addresses, got {ip!r}") from None
+    versions = np.array([ip.version for ip in parsed], dtype=np.int8)
+    row_versions = versions[codes]
+
+    rng = np.random.default_rng(seed)
+    cryptopan = get_cryptopan(key)
+    result = np.empty(len(codes), dtype=object)
+    for version, network_bits in NETWORK_BITS.items():
+        rows = np.flatnonzero(row_versions == version)
+        if not len(rows):
+            continue
+        width = 32 if version == 4 else 128
+        host_bits = HOST_BITS[version]
+        host_mask = (1 << host_bits) - 1
+
+        # Anonymize each distinct address's network part once
+        batch = np.flatnonzero(versions == version)
+        networks = np.empty(len(parsed), dtype=object)
+        hosts = np.zeros(len(parsed), dtype=np.int64)
+        anonymized = cryptopan.anonymize_ints([int(parsed[i]) for i in batch], width, network_bits)
+        networks[batch] = [address & ~host_mask for address in anonymized]
+        hosts[batch] = [address & host_mask for address in anonymized]
+
+        row_codes = codes[rows]
+        noisy = condense(hosts[row_codes], k, epsilon, rng=rng)
+        condensed = np.clip(np.rint(noisy), 0, host_mask).astype(np.int64)
+
+        # Format every distinct (network, condensed host) pair once
+        pairs, inverse = np.unique(row_codes.astype(np.int64) * (host_mask + 1) + condensed, return_inverse=True)
+        address_class = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+        texts = np.array([str(address_class(networks[pair >> host_bits] | int(pair & host_mask)))
+                          for pair in pairs.tolist()], dtype=object)
+        result[rows] = texts[inverse]
+    return result.tolist()
 
 def anonymize_field(value, column_name):
     """Anonymize a field using salting."""
@@ -126,7 +210,7 @@ if __name__ == "__main__":
     print("Original IPs:")
     print(test_ips)
     
-    anonymized_ips = anonymize_ip_addresses(test_ips, k)
+    anonymized_ips = anonymize_ip_addresses(test_ips, k, key=os.urandom(16))
     
     print("Anonymized IPs:")
     print(anonymized_ips)
@@ -0,0 +1,463 @@
+import os
+import shutil
+import signal
+import threading
+import tempfile
+import time
+from contextlib import nullcontext
+from types import SimpleNamespace
+import pandas as pd
+from anonymizer.log_parser import parse_lines, iter_log_chunks, read_zeek
+from anonymizer.log_reconstructor import rewrite_lines
+from anonymizer.eve import parse_eve, rewrite_eve
+from anonymizer.plan import compile_plan
+from anonymizer.convert_to_ocsf import ocsf_settings, write_ocsf
+from anonymizer.mapping_store import MappingWriter
+from anonymizer.metrics import METRICS
+from anonymizer.vault import open_vault
+from anonymizer.io_utils import open_log, detect_compression
+from anonymizer.tail import LogFollower, DEFAULT_POLL_INTERVAL
+from anonymizer.defaults import DEFAULT_CHUNK_SIZE, DEFAULT_FLUSH_INTERVAL
+from anonymizer.defaults import DEFAULT_BATCH_SIZE, DEFAULT_BATCH_DELAY, DEFAULT_QUEUE_SIZE
+
+
+def anonymize_dataframe(df_logs, log_type, anonymization, SALT, vault=None):
+    """
+    Apply the anonymization strategies selected in the config to a parsed DataFrame.
+
+    When a KeyVault is given, salt-based IP pseudonyms are looked up in and
+    recorded to it. Loops over many chunks compile the plan once with
+    compile_plan and call its `apply` instead.
+    """
+    return compile_plan(log_type, anonymization).apply(df_logs, SALT, vault)
+
+
+def anonymized_fields(log_type, anonymization):
+    """Names of the parsed fields that the config's strategies read or rewrite."""
+    return compile_plan(log_type, anonymization).fields
+
+
+def stream_anonymize(config, SALT, chunk_size=DEFAULT_CHUNK_SIZE, keep_intermediates=False,
+                     temp_csv="temp_logs.csv", mapping_file="log_mapping.map",
+                     anonymized_csv="anonymized_logs.csv", vault=None):
+    """
+    Anonymize `log_file` into `output_log` in a single pass over the input.
+
+    The log is read `chunk_size` lines at a time; each chunk is parsed,
+    anonymized and rewritten in memory before the next one is read, so
+    memory stays bounded by the chunk size rather than the file size.
+    The intermediate CSVs are only written when `keep_intermediates` is set.
+
+    Strategies that look at the whole column (condensation, adaptive noise,
+    differential noise) only see one chunk at a time in this mode.
+    """
+    log_file = config["log_file"]
+    log_type = config["log_type"]
+    output_log = config["output_log"]
+
+    if log_type == "zeek":
+        return zeek_anonymize(config, SALT, chunk_size, keep_intermediates, temp_csv, anonymized_csv, vault)
+
+    with open_log(log_file, "r", config.get("input_compression"), errors="replace") as f_in, \
+            open_log(output_log, "w", config.get("output_compression")) as f_out, \
+            _open_ocsf(config, "w") as f_ocsf:
+        total_lines, total_parsed = _anonymize_stream(
+            f_in, f_out, config, SALT, chunk_size, keep_intermediates,
+            temp_csv, mapping_file, anonymized_csv, vault, f_ocsf)
+
+    print(f"✅ Streamed {total_parsed}/{total_lines} parsed lines into {output_log}")
+    return total_lines, total_parsed
+
+
+def parallel_anonymize(config, SALT, workers, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Anonymize `log_file` into `output_log` using a pool of `workers` processes.
+
+    The input is split into newline-aligned byte ranges; every worker streams
+    its range through parse, anonymize and rewrite into a shard file, and the
+    shards are concatenated in their original order. Salt-keyed mappings only
+    depend on `SALT`, so the output matches a serial run with the same salt.
+    Each worker opens the config's vault, if any, on its own connection.
+    """
+    log_file = config["log_file"]
+    log_type = config["log_type"]
+    output_log = config["output_log"]
+
+    # Neither a Zeek header nor a compressed stream can be split into byte ranges
+    if log_type == "zeek" or detect_compression(log_file, config.get("input_compression")) != "none":
+        print(f"⚠️ {log_file} is anonymized in a single process")
+        vault = open_vault(config)
+        try:
+            return stream_anonymize(config, SALT, chunk_size, vault=vault)
+        finally:
+            if vault is not None:
+                vault.close()
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    ranges = split_byte_ranges(log_file, workers)
+    shard_dir = tempfile.mkdtemp(prefix="anon_shards_", dir=os.path.dirname(os.path.abspath(output_log)))
+    shard_paths = [os.path.join(shard_dir, f"shard_{i:05d}.log") for i in range(len(ranges))]
+    ocsf = ocsf_settings(config)
+    ocsf_paths = [path[:-len(".log")] + ".ocsf" if ocsf else None for path in shard_paths]
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                _anonymize_shard,
+                [config] * len(ranges), [SALT] * len(ranges),
+                [start for start, _ in ranges], [end for _, end in ranges],
+                shard_paths, [chunk_size] * len(ranges), ocsf_paths, [METRICS.enabled] * len(ranges),
+            ))
+
+        _concatenate(shard_paths, output_log, config.get("output_compression"))
+        if ocsf:
+            _concatenate(ocsf_paths, ocsf["output"])
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+
+    total_lines = sum(lines for lines, _, _ in results)
+    total_parsed = sum(parsed for _, parsed, _ in results)
+    for _, _, snapshot in results:
+        if snapshot is not None:
+            METRICS.merge(snapshot)
+    print(f"✅ Anonymized {total_parsed}/{total_lines} parsed lines into {output_log} with {workers} workers")
+    return total_lines, total_parsed
+
+
+def follow_anonymize(config, SALT, chunk_size=DEFAULT_CHUNK_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                     checkpoint_file=None, vault=None, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    Tail `log_file` and append anonymized lines to `output_log` until SIGINT or SIGTERM.
+
+    New lines are collected for at most `flush_interval` seconds (or
+    `chunk_size` lines), anonymized as one batch with the vault's key and
+    mappings, and flushed to the output. The input offset is checkpointed
+    after every flushed batch, so a restart continues without reprocessing;
+    a crash between the write and the checkpoint repeats at most one batch.
+
+    A vault is required: the output is appended to across restarts, so the
+    pseudonyms must not change with a new salt.
+    """
+    log_file = config["log_file"]
+    output_log = config["output_log"]
+
+    if vault is None:
+        raise ValueError("Follow mode needs a vault (--vault or vault: in the config) to keep pseudonyms stable across restarts.")
+    if config["log_type"] == "zeek":
+        raise ValueError("Follow mode is not supported for zeek logs.")
+    if detect_compression(log_file, config.get("input_compression")) != "none":
+        raise ValueError("Follow mode needs an uncompressed log_file.")
+
+    # Stop between batches, never halfway through writing one
+    stopping = threading.Event()
+    previous_handlers = {}
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            previous_handlers[signum] = signal.signal(signum, lambda *_: stopping.set())
+
+    plan = compile_plan(config["log_type"], config.get("anonymization", {}))  # Once, so value caches span batches
+    follower = LogFollower(log_file, checkpoint_file)
+    total_lines = 0
+    print(f"✅ Following {log_file} from byte {follower.offset}; anonymized lines go to {output_log}")
+
+    try:
+        with open_log(output_log, "a", config.get("output_compression")) as f_out, _open_ocsf(config, "a") as f_ocsf:
+            pending = []
+            last_flush = time.monotonic()
+            while not stopping.is_set():
+                lines = follower.read_lines(chunk_size - len(pending))
+                pending += lines
+                if pending and (len(pending) >= chunk_size or time.monotonic() - last_flush >= flush_interval):
+                    _anonymize_stream(iter(pending), f_out, config, SALT, chunk_size, vault=vault, f_ocsf=f_ocsf,
+                                      plan=plan)
+                    f_out.flush()
+                    follower.save_checkpoint()
+                    total_lines += len(pending)
+                    pending = []
+                    last_flush = time.monotonic()
+                elif not lines:
+                    time.sleep(poll_interval)
+
+            if pending:
+                _anonymize_stream(iter(pending), f_out, config, SALT, chunk_size, vault=vault, f_ocsf=f_ocsf,
+                                  plan=plan)
+                total_lines += len(pending)
+            f_out.flush()
+            follower.save_checkpoint()
+    finally:
+        follower.close()
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+
+    print(f"✅ Stopped following {log_file} after {total_lines} lines")
+    return total_lines
+
+
+def receive_anonymize(config, SALT, listen, forward=None, chunk_size=DEFAULT_BATCH_SIZE,
+                      flush_interval=DEFAULT_BATCH_DELAY, queue_size=DEFAULT_QUEUE_SIZE, vault=None):
+    """
+    Receive syslog messages on `listen` (udp:// or tcp:// URLs), anonymize
+    them in flight and forward them until SIGINT or SIGTERM.
+
+    `forward` is a udp:// or tcp:// syslog server or a file to append to
+    (default: `output_log`). Messages are anonymized in batches of up to
+    `chunk_size`, gathered for at most `flush_interval` seconds, with the
+    same parse/anonymize/rewrite path as the file modes; lines that do not
+    parse are forwarded unchanged. Like follow mode this runs indefinitely,
+    so a vault is required to keep pseudonyms stable across restarts.
+    """
+    import asyncio  # Only listen mode needs an event loop
+    from anonymizer.syslog_receiver import SyslogReceiver, open_sink
+
+    log_type = config["log_type"]
+    forward = forward or config["output_log"]
+
+    if vault is None:
+        raise ValueError("Listen mode needs a vault (--vault or vault: in the config) to keep pseudonyms stable across restarts.")
+    if log_type == "zeek":
+        raise ValueError("Listen mode is not supported for zeek logs.")
+
+    plan = compile_plan(log_type, config.get("anonymization", {}))  # Once, not per batch
+
+    async def serve():
+        stopping = asyncio.Event()
+        if threading.current_thread() is threading.main_thread():
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, stopping.set)
+
+        sink = open_sink(forward, config.get("output_compression"))
+        with _open_ocsf(config, "a") as f_ocsf:
+            receiver = SyslogReceiver(lambda lines: _anonymize_lines(lines, config, SALT, vault, f_ocsf, plan),
+                                      sink, listen, queue_size, chunk_size, flush_interval)
+            try:
+                await receiver.start()
+                addresses = ", ".join(f"{scheme}://{host}:{port}" for scheme, host, port in receiver.addresses)
+                print(f"✅ Listening on {addresses}; anonymized messages go to {forward}")
+                await receiver.run(stopping)
+            finally:
+                await sink.close()
+        return receiver
+
+    receiver = asyncio.run(serve())
+    if receiver.dropped:
+        print(f"⚠️ Dropped {receiver.dropped} UDP messages that arrived while the queue was full")
+    print(f"✅ Stopped listening after {receiver.received} messages, {receiver.forwarded} forwarded")
+    return receiver.received, receiver.forwarded
+
+
+def zeek_anonymize(config, SALT, chunk_size=DEFAULT_CHUNK_SIZE, keep_intermediates=False,
+                   temp_csv="temp_logs.csv", anonymized_csv="anonymized_logs.csv", vault=None):
+    """
+    Anonymize a Zeek TSV log into `output_log` chunk by chunk.
+
+    The header is copied unchanged, each chunk of rows is anonymized as
+    columns and written back as TSV in the original column order, and the
+    trailing #close line is kept, so memory stays bounded by the chunk size.
+    """
+    log_type = config["log_type"]
+    output_log = config["output_log"]
+    anonymization = config.get("anonymization", {})
+
+    ocsf = ocsf_settings(config)
+
+    total_rows = 0
+    with open_log(config["log_file"], "r", config.get("input_compression"), errors="replace") as f_in, \
+            open_log(output_log, "w", config.get("output_compression")) as f_out, \
+            _open_ocsf(config, "w") as f_ocsf:
+        header, chunks = read_zeek(f_in, chunk_size)
+        f_out.writelines(header.lines)
+        plan = compile_plan(log_type, anonymization)
+        while True:
+            start = time.perf_counter()
+            df_logs = next(chunks, None)
+            if df_logs is None:
+                break
+            METRICS.add_stage("parse", time.perf_counter() - start, len(df_logs))
+            METRICS.observe(df_logs, plan.fields)
+            if keep_intermediates:
+                with METRICS.stage("intermediates", len(df_logs)):
+                    _append_csv(df_logs, temp_csv, first=total_rows == 0)
+            with METRICS.stage("anonymize", len(df_logs)):
+                df_logs = plan.apply(df_logs, SALT, vault)
+            if keep_intermediates:
+                with METRICS.stage("intermediates", len(df_logs)):
+                    _append_csv(df_logs, anonymized_csv, first=total_rows == 0)
+            if f_ocsf is not None:
+                with METRICS.stage("ocsf", len(df_logs)):
+                    write_ocsf(df_logs, log_type, f_ocsf, ocsf["batch_size"], anonymization.get("timestamp_format"))
+
+            with METRICS.stage("reconstruct", len(df_logs)):
+                columns = [df_logs[column].astype(str).tolist() for column in header.columns]
+                f_out.writelines(header.separator.join(row) + "\n" for row in zip(*columns))
+            total_rows += len(df_logs)
+            METRICS.count("lines_parsed", len(df_logs))
+            METRICS.maybe_write(vault)
+        f_out.writelines(header.trailer)
+
+    print(f"✅ Anonymized {total_rows} zeek records into {output_log}")
+    return total_rows, total_rows
+
+
+def split_byte_ranges(log_file, n_shards):
+    """Split a file into at most `n_shards` (start, end) byte ranges that begin and end on line boundaries."""
+    size = os.path.getsize(log_file)
+    if size == 0:
+        return [(0, 0)]
+
+    step = max(1, size // max(1, n_shards))
+    boundaries = [0]
+    with open(log_file, "rb") as f:
+        for i in range(1, n_shards):
+            target = max(i * step, boundaries[-1])
+            if target >= size:
+                break
+            f.seek(target)
+            f.readline()  # Advance to the start of the next line
+            position = f.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _anonymize_shard(config, SALT, start, end, shard_path, chunk_size, ocsf_path=None, collect_metrics=False):
+    """
+    Worker entry point: anonymize the lines in [start, end) of the log into `shard_path`.
+
+    Returns the line counts and, with `collect_metrics`, a metrics snapshot
+    of this shard for the parent to merge.
+    """
+    METRICS.reset()  # A forked worker inherits the parent's recorder; report only this shard
+    if collect_metrics:
+        METRICS.configure()
+    vault = open_vault(config)
+    try:
+        with open(config["log_file"], "rb") as f_in, open(shard_path, "w", encoding="utf-8") as f_out, \
+                (open(ocsf_path, "w", encoding="utf-8") if ocsf_path else nullcontext()) as f_ocsf:
+            f_in.seek(start)
+            total_lines, total_parsed = _anonymize_stream(_iter_range_lines(f_in, end), f_out, config, SALT,
+                                                          chunk_size, vault=vault, f_ocsf=f_ocsf)
+        return total_lines, total_parsed, METRICS.snapshot(vault) if collect_metrics else None
+    finally:
+        if vault is not None:
+            vault.close()
+
+
+def _concatenate(paths, output, compression=None):
+    """Copy the files in `paths`, in order, into `output` (compressed per `compression` or its extension)."""
+    with open_log(output, "wb", compression) as f_out:
+        for path in paths:
+            with open(path, "rb") as f_part:
+                shutil.copyfileobj(f_part, f_out, 1024 * 1024)
+
+
+def _iter_range_lines(f, end):
+    """Yield decoded lines from a binary file until the byte position reaches `end`."""
+    position = f.tell()
+    while position < end:
+        raw = f.readline()
+        if not raw:
+            return
+        position += len(raw)
+        line = raw.decode("utf-8", errors="replace")
+        if line.endswith("\r\n"):
+            line = line[:-2] + "\n"
+        yield line
+
+
+def _anonymize_stream(lines, f_out, config, SALT, chunk_size, keep_intermediates=False,
+                      temp_csv=None, mapping_file=None, anonymized_csv=None, vault=None, f_ocsf=None, plan=None):
+    """
+    Parse, anonymize and rewrite `lines` chunk by chunk into `f_out`.
+
+    When `f_ocsf` is given, every anonymized chunk is also written to it as
+    OCSF NDJSON. Callers that anonymize many batches pass their compiled
+    `plan`, so its value caches last for the whole run.
+    """
+    log_type = config["log_type"]
+    anonymization = config.get("anonymization", {})
+    ocsf = ocsf_settings(config)
+    ts_format = (anonymization.get("custom_format", {}) if log_type == "custom" else anonymization).get("timestamp_format")
+
+    total_lines = 0
+    total_parsed = 0
+
+    # Without intermediates or OCSF only the anonymized fields are ever looked at.
+    # EVE events are rewritten from the decoded JSON, so they only ever need those and no offsets.
+    eve = log_type == "eve"
+    if plan is None:
+        plan = compile_plan(log_type, anonymization)
+    fields = None if (keep_intermediates or f_ocsf is not None) and not eve else plan.fields
+
+    mapping_writer = None
+    if keep_intermediates and not eve and not mapping_file.endswith(".csv"):
+        mapping_writer = MappingWriter(mapping_file)
+
+    try:
+        for start_line_no, chunk in iter_log_chunks(lines, chunk_size):
+            with METRICS.stage("parse", len(chunk)):
+                if eve:
+                    events, logs = parse_eve(chunk, fields, start_line_no)
+                else:
+                    logs, mapping = parse_lines(chunk, log_type, config, start_line_no, fields)
+                df_logs = pd.DataFrame(logs)
+            METRICS.observe(df_logs, plan.fields)
+
+            if keep_intermediates:
+                with METRICS.stage("intermediates", len(df_logs)):
+                    _append_csv(df_logs, temp_csv, first=total_lines == 0)
+                    if mapping_writer is not None:
+                        mapping_writer.append(mapping)
+                    elif not eve:
+                        _append_csv(mapping.to_dataframe(), mapping_file, first=total_lines == 0)
+
+            with METRICS.stage("anonymize", len(df_logs)):
+                df_logs = plan.apply(df_logs, SALT, vault)
+
+            if keep_intermediates:
+                with METRICS.stage("intermediates", len(df_logs)):
+                    _append_csv(df_logs, anonymized_csv, first=total_lines == 0)
+            if f_ocsf is not None:
+                with METRICS.stage("ocsf", len(df_logs)):
+                    write_ocsf(df_logs, log_type, f_ocsf, ocsf["batch_size"], ts_format)
+
+            with METRICS.stage("reconstruct", len(chunk)):
+                if eve:
+                    f_out.writelines(rewrite_eve(chunk, events, logs, df_logs, start_line_no))
+                else:
+                    f_out.writelines(rewrite_lines(chunk, mapping, df_logs, start_line_no))
+
+            total_lines += len(chunk)
+            total_parsed += len(df_logs)
+            METRICS.count("lines_read", len(chunk))
+            METRICS.count("lines_parsed", len(df_logs))
+            METRICS.maybe_write(vault)
+    finally:
+        if mapping_writer is not None:
+            mapping_writer.close()
+
+    return total_lines, total_parsed
+
+
+def _anonymize_lines(lines, config, SALT, vault=None, f_ocsf=None, plan=None):
+    """Anonymize a list of lines as one chunk and return the rewritten lines."""
+    out = []
+    _anonymize_stream(lines, SimpleNamespace(writelines=out.extend), config, SALT, max(1, len(lines)),
+                      vault=vault, f_ocsf=f_ocsf, plan=plan)
+    return out
+
+
+def _open_ocsf(config, mode):
+    """Open the config's OCSF export for writing, or return a no-op context holding None when it is off."""
+    ocsf = ocsf_settings(config)
+    if ocsf is None:
+        return nullcontext()
+    return open_log(ocsf["output"], mode)
+
+def _append_csv(df, path, first):
+    """Write a chunk to `path`, truncating it and writing the header on the first chunk."""
+    df.to_csv(path, mode="w" if first else "a", header=first, index=False)
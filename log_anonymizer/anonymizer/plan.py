@@ -0,0 +1,269 @@
+import inspect
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from anonymizer.eve import eve_paths
+from anonymizer.metrics import METRICS
+from anonymizer.factorize import ValueCache, map_unique
+
+# (field kind, strategy name) -> (function(values, run, **params), shared)
+STRATEGIES = {}
+
+# Built-in log types: config key -> kind of its fields, and the fields
+BUILTIN_FIELDS = {
+    "timestamp": ("timestamp", ["timestamp"]),
+    "ip": ("ip", ["src_ip", "dest_ip"]),
+    "port": ("port", ["src_port", "dest_port"]),
+    "data": ("numeric", ["data"]),
+}
+EVE_KINDS = {"ip": "ip", "port": "port", "timestamp": "timestamp", "mask": "text"}
+CUSTOM_KINDS = {"condensation": "numeric", "differential": "numeric", "mask": "text"}
+
+
+def strategy(kind, name, shared=False):
+    """
+    Register `function(values, run, **params)` as the `name` strategy for `kind` fields.
+
+    The keyword arguments after `run` are the strategy's parameters and their
+    defaults. `shared` strategies map every distinct value on its own, the
+    same way in every field, so the fields of one domain (src and dest IP)
+    can be anonymized as one column; the others look at the whole column.
+
+    Strategy functions import their implementation when first called, so a
+    run only loads what its config selects (Crypto-PAn and the differential
+    privacy code are not imported for salt and round, for example).
+    """
+    def register(function):
+        STRATEGIES[(kind, name)] = (function, shared)
+        return function
+    return register
+
+
+@strategy("ip", "salt", shared=True)
+def _salt_ip(values, run):
+    from anonymizer.ip_anonymizer import anonymize_ip_column
+    return anonymize_ip_column(values, run.SALT, run.vault)
+
+@strategy("ip", "mask", shared=True)
+def _mask_ip(values, run, subnet_mask=24):
+    from anonymizer.ipmask import generalize_ip
+    return generalize_ip(values, subnet_mask)
+
+@strategy("ip", "condensation")
+def _condense_ip(values, run, k=5, epsilon=1.0, seed=None):
+    from anonymizer.paper_imple import anonymize_ip_addresses
+    return anonymize_ip_addresses(values, k, epsilon, seed, key=run.SALT)
+
+@strategy("port", "salt", shared=True)
+def _salt_port(values, run):
+    from anonymizer.port_anonymizer import anonymize_port_column
+    return anonymize_port_column(values, run.SALT)
+
+@strategy("timestamp", "round", shared=True)
+def _round_timestamps(values, run, bucket_minutes=15):
+    from anonymizer.timestamp_anonymizer import round_to_nearest_15_minutes_column
+    return round_to_nearest_15_minutes_column(values, bucket_minutes, log_type=run.log_type, fmt=run.fmt)
+
+@strategy("timestamp", "perturb")
+def _perturb_timestamps(values, run, window_minutes=5, seed=None):
+    from anonymizer.timestamp_anonymizer import perturb_time_column
+    return perturb_time_column(values, window_minutes, log_type=run.log_type, fmt=run.fmt, seed=seed)
+
+@strategy("timestamp", "random_shift")
+def _shift_timestamps(values, run, max_shift_hours=24):
+    from anonymizer.timestamp_anonymizer import random_time_shift_column
+    return random_time_shift_column(values, max_shift_hours, log_type=run.log_type, fmt=run.fmt)
+
+@strategy("timestamp", "bucketize", shared=True)
+def _bucketize_timestamps(values, run, resolution="day"):
+    from anonymizer.timestamp_anonymizer import bucketize_dates_column
+    return bucketize_dates_column(values, resolution, log_type=run.log_type, fmt=run.fmt)
+
+@strategy("timestamp", "adaptive")
+def _adaptive_timestamps(values, run, apply_global_offset=True, seed=None):
+    from anonymizer.timestamp_anonymizer import order_preserving_adaptive_noise
+    return order_preserving_adaptive_noise(values, apply_global_offset, log_type=run.log_type, fmt=run.fmt, seed=seed)
+
+@strategy("numeric", "condensation")
+def _condense_numbers(values, run, k=5, epsilon=1.0, sensitivity=1.0, seed=None):
+    from anonymizer.nonip_diff_priv import non_ip_diff_privacy
+    return non_ip_diff_privacy(values, k, epsilon, sensitivity, seed)
+
+@strategy("numeric", "differential")
+def _noisy_numbers(values, run, epsilon=1.0):
+    from anonymizer.differential import add_noise
+    return add_noise(values, epsilon)
+
+@strategy("text", "salt", shared=True)
+def _salt_text(values, run, digest_chars=16):
+    from anonymizer.hashing import salt_text_column
+    return salt_text_column(values, run.SALT, digest_chars)
+
+@strategy("text", "mask", shared=True)
+def _mask_text(values, run, mask_char="X", visible_chars=3):
+    from anonymizer.masking import mask_data
+    return mask_data(values.astype(str), mask_char, visible_chars)
+
+
+class Strategy:
+    """A registered strategy bound to its parameters from the config."""
+
+    def __init__(self, kind, name, params=None, cache_size=0):
+        if (kind, name) not in STRATEGIES:
+            names = sorted(n for k, n in STRATEGIES if k == kind)
+            raise ValueError(f"Unknown {kind} strategy {name!r}; expected one of {', '.join(names)}")
+        self.kind = kind
+        self.name = name
+        self.function, self.shared = STRATEGIES[(kind, name)]
+
+        defaults = {p.name: p.default for p in list(inspect.signature(self.function).parameters.values())[2:]}
+        unknown = set(params or {}) - set(defaults)
+        if unknown:
+            raise ValueError(f"Unknown parameter(s) for the {kind} strategy {name!r}: {', '.join(sorted(unknown))}; "
+                             f"expected {', '.join(defaults) or 'none'}")
+        self.params = {**defaults, **(params or {})}
+        # Per-value strategies can remember their results across chunks
+        self.cache = ValueCache(cache_size) if self.shared and cache_size else None
+
+    @property
+    def key(self):
+        """Strategies with equal keys transform values identically."""
+        return self.kind, self.name, tuple(sorted(self.params.items(), key=lambda item: item[0]))
+
+    def __call__(self, values, run):
+        return self.function(values, run, **self.params)
+
+
+class AnonymizationPlan:
+    """
+    The config's anonymization section compiled into steps, each one strategy over one or more fields.
+
+    Fields that a shared strategy anonymizes with the same parameters (src
+    and dest IPs, src and dest ports) form one step: their values are
+    stacked into one column, so each distinct value is transformed once.
+    Missing values are skipped and stay missing. With `value_cache: N` in
+    the config, each per-value strategy keeps the results for up to N
+    recently seen distinct values for the whole run.
+    """
+
+    def __init__(self, log_type, steps, fmt=None):
+        self.log_type = log_type
+        self.steps = steps  # [(Strategy, [field, ...]), ...]
+        self.fmt = fmt
+
+    @property
+    def fields(self):
+        """Names of the parsed fields the plan reads and rewrites, in step order."""
+        return [field for _, fields in self.steps for field in fields]
+
+    def apply(self, df_logs, SALT, vault=None):
+        """Anonymize the plan's fields of a parsed DataFrame in place and return it."""
+        if df_logs.empty:
+            return df_logs
+        run = SimpleNamespace(SALT=SALT, vault=vault, log_type=self.log_type, fmt=self.fmt)
+        for strategy, fields in self.steps:
+            fields = [field for field in fields if field in df_logs.columns]
+            if fields:
+                with METRICS.stage(f"anonymize.{strategy.kind}.{strategy.name}", len(df_logs)):
+                    _apply_step(df_logs, strategy, fields, run)
+        return df_logs
+
+
+def _apply_step(df_logs, strategy, fields, run):
+    columns = {}
+    for field in fields:
+        present = df_logs[field].notna().to_numpy()
+        if present.any():
+            columns[field] = present
+    if not columns:
+        return
+
+    values = [df_logs[field] if present.all() else df_logs[field][present] for field, present in columns.items()]
+    stacked = values[0] if len(values) == 1 else pd.concat(values, ignore_index=True)
+    cache = strategy.cache
+    if cache is not None:
+        hits, misses = cache.hits, cache.misses
+        result = map_unique(stacked, lambda uniques: strategy(pd.Series(uniques, dtype=object), run), cache)
+        METRICS.add_cache(f"values.{strategy.kind}.{strategy.name}", cache.hits - hits, cache.misses - misses)
+    else:
+        result = strategy(stacked, run)
+    if len(values) == 1:
+        results = [result]
+    else:
+        results = np.split(np.asarray(result, dtype=object), np.cumsum([len(v) for v in values])[:-1])
+
+    for (field, present), result in zip(columns.items(), results):
+        column = df_logs[field]
+        if present.all():
+            if not (isinstance(result, pd.Series) and result.index.equals(column.index)):
+                result = pd.Series(np.asarray(result, dtype=object), index=column.index, name=field)
+            df_logs[field] = result
+        else:
+            out = column.to_numpy(dtype=object, copy=True)
+            out[present] = np.asarray(result, dtype=object)
+            df_logs[field] = pd.Series(out, index=column.index, name=field)
+
+
+def strategy_spec(value):
+    """Split a config value, a strategy name or {"strategy": name, <parameter>: value}, into name and parameters."""
+    if isinstance(value, dict):
+        params = dict(value)
+        return params.pop("strategy", None), params
+    return value, {}
+
+
+def custom_field_kind(field, name):
+    """
+    Kind of a custom_format field: from its name for IPs, ports and timestamps, else from the strategy.
+
+    Other salted fields (users, hostnames) are text, so they are replaced by
+    keyed digests rather than passed through the port mapping unchanged.
+    """
+    if "ip" in field:
+        return "ip"
+    if "timestamp" in field:
+        return "timestamp"
+    if field == "port" or field.endswith("_port"):
+        return "port"
+    return CUSTOM_KINDS.get(name, "text")
+
+
+def compile_plan(log_type, anonymization):
+    """Compile the config's `anonymization` section for `log_type` into an AnonymizationPlan."""
+    cache_size = int(anonymization.get("value_cache") or 0)
+    if log_type == "custom":
+        custom_format = anonymization.get("custom_format", {})
+        fmt = custom_format.get("timestamp_format")
+        targets = []
+        for field in custom_format.get("fields", []):
+            if field in custom_format:
+                name, params = strategy_spec(custom_format[field])
+                targets.append((field, Strategy(custom_field_kind(field, name), name, params, cache_size)))
+    elif log_type == "eve":
+        fmt = anonymization.get("timestamp_format")
+        targets = []
+        for path, kind in eve_paths(anonymization).items():
+            name, params = strategy_spec(anonymization.get(kind))
+            if kind == "mask":  # Masked whatever the value of `mask:`
+                name = "mask"
+            targets.append((path, Strategy(EVE_KINDS[kind], name, params, cache_size)))
+    else:
+        fmt = anonymization.get("timestamp_format")
+        targets = []
+        for key, (kind, fields) in BUILTIN_FIELDS.items():
+            if key in anonymization:
+                name, params = strategy_spec(anonymization[key])
+                strategy = Strategy(kind, name, params, cache_size)
+                targets += [(field, strategy) for field in fields]
+
+    steps = []
+    groups = {}  # Strategy key -> its step, for shared strategies
+    for field, strategy in targets:
+        if strategy.shared and strategy.key in groups:
+            groups[strategy.key][1].append(field)
+            continue
+        step = (strategy, [field])
+        steps.append(step)
+        if strategy.shared:
+            groups[strategy.key] = step
+    return AnonymizationPlan(log_type, steps, fmt)
@@ -1,25 +1,58 @@
-import hashlib
 import os
+import numpy as np
 import pandas as pd
+from functools import lru_cache
+from anonymizer.hashing import keyed_permutation
 
-# Global port mapping
-port_map = {}
+PORT_COUNT = 65536
 
 
-def hash_with_salt(value,SALT):
-    """Hashes a value using SHA-256 with a salt and returns a full hex digest."""
-    salted_value = SALT + value.encode()
-    return hashlib.sha256(salted_value).hexdigest()
+@lru_cache(maxsize=None)
+def port_table(SALT):
+    """
+    Bijective 65536-entry port permutation for a salt.
+
+    The table depends only on the salt, so every run and every process that
+    uses the same salt (or vault key) maps ports identically, and no two
+    ports share an output.
+    """
+    return keyed_permutation(SALT, "port", PORT_COUNT).astype(np.uint16)
+
+@lru_cache(maxsize=None)
+def port_strings():
+    """"0" to "65535" as an object array, built on first use rather than at import."""
+    return np.array([str(i) for i in range(PORT_COUNT)], dtype=object)
+
+def port_to_int(port_values):
+    """
+    Convert port values (str from the regex parsers, int from Zeek) to uint16 in bulk.
+
+    Returns the ports and a boolean mask of the entries that were integers in 0–65535.
+    """
+    numbers = pd.to_numeric(pd.Series(port_values, dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+    valid = np.isfinite(numbers) & (numbers >= 0) & (numbers < PORT_COUNT) & (numbers == np.floor(numbers))
+    return np.where(valid, numbers, 0).astype(np.uint16), valid
 
 def anonymize_port_column(port_series: pd.Series,SALT) -> pd.Series:
-    """Anonymize a column of ports while ensuring stable one-to-one mapping."""
-    unique_ports = port_series.unique()
+    """
+    Anonymize a column of ports with a keyed one-to-one mapping.
+
+    Distinct ports are converted to uint16 once and mapped with a single
+    lookup into the salt's permutation table; results are port strings
+    whatever the input dtype. Values that are not ports are kept as is.
+    """
+    codes, unique_ports = pd.factorize(port_series)
+    unique_ports = np.asarray(unique_ports, dtype=object)
+
+    ports, valid = port_to_int(unique_ports)
+    anonymized_ports = unique_ports.copy()
+    anonymized_ports[valid] = port_strings()[port_table(SALT)[ports[valid]]]
+
+    values = np.append(anonymized_ports, np.nan)[codes]  # code -1 marks missing values
+    return pd.Series(values, index=port_series.index, name=port_series.name)
 
-    for port in unique_ports:
-        if port not in port_map:
-            hashed_value = hash_with_salt(str(port),SALT)
-            # Convert full hash to an integer and map to valid port range (1024–65535 to avoid reserved ports)
-            mapped_port = (int(hashed_value, 16) % (65535 - 1024)) + 1024
-            port_map[port] = str(mapped_port)
 
-    return port_series.map(port_map)
+if __name__ == "__main__":
+    SALT = os.urandom(16)
+    ports = pd.Series(["80", "443", 57621, "not-a-port"])
+    print(pd.DataFrame({"Original Port": ports, "Anonymized Port": anonymize_port_column(ports, SALT)}))
@@ -0,0 +1,249 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from anonymizer.io_utils import open_log
+from anonymizer.defaults import DEFAULT_QUEUE_SIZE, DEFAULT_BATCH_SIZE, DEFAULT_BATCH_DELAY
+
+DEFAULT_SYSLOG_PORT = 514
+MAX_LENGTH_DIGITS = 9  # Longest octet count accepted in TCP framing
+
+
+def parse_endpoint(url):
+    """Split "udp://host:port" or "tcp://host:port" into (scheme, host, port); return None for a file path."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("udp", "tcp"):
+        return None
+    return parts.scheme, parts.hostname or "0.0.0.0", parts.port or DEFAULT_SYSLOG_PORT
+
+def _to_line(data):
+    """Decode one received message into a single newline-terminated line."""
+    return data.decode("utf-8", errors="replace").rstrip("\r\n\x00") + "\n"
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    """One message per datagram. UDP senders cannot be slowed down, so a full queue drops."""
+
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def datagram_received(self, data, addr):
+        try:
+            self.receiver.queue.put_nowait(_to_line(data))
+            self.receiver.received += 1
+        except asyncio.QueueFull:
+            self.receiver.dropped += 1
+
+
+class SyslogReceiver:
+    """
+    Receives syslog messages over UDP and TCP and hands them to `process` in batches.
+
+    Messages are queued as they arrive; one consumer takes up to
+    `batch_size` of them at a time (waiting at most `batch_delay` for a
+    batch to fill), runs `process` on them in a worker thread so the event
+    loop keeps receiving, and sends the returned lines to `sink` in arrival
+    order. When the sink is slow the bounded queue fills up: TCP
+    connections then stop being read, which pushes back on the senders
+    through TCP flow control, while UDP messages beyond the queue are
+    dropped and counted.
+    """
+
+    def __init__(self, process, sink, listen, queue_size=DEFAULT_QUEUE_SIZE,
+                 batch_size=DEFAULT_BATCH_SIZE, batch_delay=DEFAULT_BATCH_DELAY):
+        self.process = process
+        self.sink = sink
+        self.listen = list(listen)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.queue = None
+        self.addresses = []
+        self.received = 0
+        self.dropped = 0
+        self.forwarded = 0
+        self._servers = []
+        self._transports = []
+        self._connections = set()
+
+    async def start(self):
+        """Bind every listen endpoint; `addresses` then holds the bound (scheme, host, port) tuples."""
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(self.queue_size)
+        for url in self.listen:
+            endpoint = parse_endpoint(url)
+            if endpoint is None:
+                raise ValueError(f"Listen address must be udp://host:port or tcp://host:port, got {url}")
+            scheme, host, port = endpoint
+            if scheme == "udp":
+                transport, _ = await loop.create_datagram_endpoint(lambda: _UdpProtocol(self),
+                                                                   local_addr=(host, port))
+                self._transports.append(transport)
+                sockets = [transport.get_extra_info("socket")]
+            else:
+                server = await asyncio.start_server(self._handle_tcp, host, port)
+                self._servers.append(server)
+                sockets = server.sockets
+            self.addresses.extend((scheme,) + tuple(sock.getsockname()[:2]) for sock in sockets)
+
+    async def _handle_tcp(self, reader, writer):
+        """Read one TCP connection's messages, in octet-counting or newline framing (RFC 6587)."""
+        self._connections.add(writer)
+        try:
+            while True:
+                head = await reader.read(1)
+                if not head:
+                    return
+                # Octet counting ("<length> <message>") starts with a short run of digits and a space
+                while head[-1:].isdigit() and len(head) <= MAX_LENGTH_DIGITS:
+                    byte = await reader.read(1)
+                    if not byte:
+                        break
+                    head += byte
+                if head[-1:] == b" " and head[:-1].isdigit():
+                    data = await reader.readexactly(int(head[:-1]))
+                else:
+                    data = head if head.endswith(b"\n") else head + await reader.readline()
+                    if not data.strip():
+                        continue
+                await self.queue.put(_to_line(data))  # Waits, and stops reading, while the queue is full
+                self.received += 1
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            return
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _next_batch(self, stop):
+        """Wait for a first message, then gather what arrives within batch_delay, up to batch_size."""
+        loop = asyncio.get_running_loop()
+        batch = []
+        while not batch:
+            if stop.is_set() and self.queue.empty():
+                return batch
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), 0.1))
+            except asyncio.TimeoutError:
+                continue
+
+        deadline = loop.time() + self.batch_delay
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        return batch
+
+    async def run(self, stop):
+        """Process batches until `stop` is set, then stop listening and drain the queue."""
+        loop = asyncio.get_running_loop()
+        stopping = asyncio.ensure_future(self._close_on(stop))
+        # One worker thread keeps batches in order and any vault on a single thread at a time
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            try:
+                while True:
+                    batch = await self._next_batch(stop)
+                    if not batch:
+                        break
+                    lines = await loop.run_in_executor(executor, self.process, batch)
+                    await self.sink.send(lines)
+                    self.forwarded += len(lines)
+            finally:
+                stop.set()
+                await stopping
+
+    async def _close_on(self, stop):
+        await stop.wait()
+        for transport in self._transports:
+            transport.close()
+        for server in self._servers:
+            server.close()
+        for writer in list(self._connections):
+            writer.close()
+        for server in self._servers:
+            await server.wait_closed()
+
+
+class FileSink:
+    """Appends forwarded lines to a log file, compressed per its extension or `compression`."""
+
+    def __init__(self, path, compression=None):
+        self.path = path
+        self._file = open_log(path, "a", compression)
+
+    async def send(self, lines):
+        self._file.writelines(lines)
+        self._file.flush()
+
+    async def close(self):
+        self._file.close()
+
+
+class UdpSink:
+    """Forwards each line as one datagram to a downstream syslog server."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._transport = None
+
+    async def send(self, lines):
+        if self._transport is None:
+            loop = asyncio.get_running_loop()
+            self._transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol,
+                                                                     remote_addr=(self.host, self.port))
+        for line in lines:
+            self._transport.sendto(line.rstrip("\n").encode("utf-8"))
+
+    async def close(self):
+        if self._transport is not None:
+            self._transport.close()
+
+
+class TcpSink:
+    """
+    Forwards newline-framed lines to a downstream syslog server over TCP.
+
+    Each batch waits until the connection has drained, so a slow server
+    slows the receiver down instead of buffering without bound. The
+    connection is reopened once if it was lost.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._writer = None
+
+    async def send(self, lines):
+        data = "".join(lines).encode("utf-8")
+        for attempt in range(2):
+            try:
+                if self._writer is None:
+                    _, self._writer = await asyncio.open_connection(self.host, self.port)
+                self._writer.write(data)
+                await self._writer.drain()
+                return
+            except ConnectionError:
+                self._writer = None
+                if attempt:
+                    raise
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+
+
+def open_sink(target, compression=None):
+    """Return the sink for `target`: a udp:// or tcp:// syslog server, or otherwise a file path."""
+    endpoint = parse_endpoint(target)
+    if endpoint is None:
+        return FileSink(target, compression)
+    scheme, host, port = endpoint
+    return UdpSink(host, port) if scheme == "udp" else TcpSink(host, port)
@@ -0,0 +1,99 @@
+import json
+import os
+
+DEFAULT_POLL_INTERVAL = 0.5
+
+
+class LogFollower:
+    """
+    Reads the complete lines appended to a growing log file.
+
+    The follower keeps its byte offset in a checkpoint file so a restart
+    resumes where the last saved batch ended. When the file is rotated
+    (a new file appears under the same name) the old one is drained first
+    and reading continues at the start of the new one; when it is
+    truncated, reading starts over from the beginning.
+    """
+
+    def __init__(self, path, checkpoint_file=None):
+        self.path = path
+        self.checkpoint_file = checkpoint_file
+        self._file = None
+        self.inode = None
+        self.offset = 0
+
+        checkpoint = self._load_checkpoint()
+        self._open()
+        if checkpoint and checkpoint.get("inode") == self.inode and checkpoint.get("offset", 0) <= self._size():
+            self.offset = checkpoint["offset"]
+            self._file.seek(self.offset)
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_file or not os.path.exists(self.checkpoint_file):
+            return None
+        with open(self.checkpoint_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_checkpoint(self):
+        """Atomically record the offset just past the last line returned."""
+        if not self.checkpoint_file:
+            return
+        temp_path = self.checkpoint_file + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"path": self.path, "inode": self.inode, "offset": self.offset}, f)
+        os.replace(temp_path, self.checkpoint_file)
+
+    def _open(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, "rb")
+        self.inode = os.fstat(self._file.fileno()).st_ino
+        self.offset = 0
+
+    def _size(self):
+        return os.fstat(self._file.fileno()).st_size
+
+    def read_lines(self, max_lines):
+        """Return up to `max_lines` new complete lines; an empty list means nothing is available yet."""
+        lines = []
+        while len(lines) < max_lines:
+            raw = self._file.readline()
+            if not raw:
+                break
+            if not raw.endswith(b"\n"):  # The writer is mid-line; pick it up on the next call
+                self._file.seek(self.offset)
+                break
+            self.offset += len(raw)
+            lines.append(_decode(raw))
+
+        if not lines:
+            lines = self._check_rotation()
+        return lines
+
+    def _check_rotation(self):
+        """Reopen the file after rotation or rewind it after truncation."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:  # Rotated away and not recreated yet
+            return []
+
+        if stat.st_ino != self.inode:
+            rest = self._file.read()  # An unterminated last line of the old file
+            self._open()
+            return [_decode(rest + b"\n")] if rest else []
+        if stat.st_size < self.offset:
+            self._file.seek(0)
+            self.offset = 0
+        return []
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _decode(raw):
+    line = raw.decode("utf-8", errors="replace")
+    if line.endswith("\r\n"):
+        line = line[:-2] + "\n"
+    return line
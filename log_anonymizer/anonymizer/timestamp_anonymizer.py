@@ -1,51 +1,386 @@
-from datetime import datetime, timedelta
-import pandas as pd
-
-from datetime import datetime, timedelta
 import pandas as pd
 import random
 import hashlib
-def random_time_shift_column(timestamp_series: pd.Series, max_shift_hours=24) -> pd.Series:
+import numpy as np
+from anonymizer.factorize import map_unique
+
+# Timestamp format per log_type; "epoch" means seconds since 1970 and
+# "ISO8601" covers RFC 3339 syslog timestamps. Formats without a year
+# ("%b %d ...") are parsed as if in NO_YEAR; their output has no year either.
+TIMESTAMP_FORMATS = {
+    "suricata": "%m/%d/%Y-%H:%M:%S.%f",
+    "custom": "%m/%d/%Y-%H:%M:%S.%f",
+    "firewall": "%b %d %H:%M:%S",
+    "pfsense": "%b %d %H:%M:%S",
+    "syslog": "ISO8601",
+    "eve": "ISO8601",
+    "zeek": "epoch",
+}
+DEFAULT_TIMESTAMP_FORMAT = "%m/%d/%Y-%H:%M:%S.%f"
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_MINUTE = 60 * NS_PER_SECOND
+NS_PER_DAY = 24 * 60 * NS_PER_MINUTE
+NAT = np.iinfo(np.int64).min
+NO_YEAR = 2000  # A leap year, so "Feb 29" parses
+
+# Pieces of an RFC 3339 timestamp that are copied from the original on output
+ISO_PARTS = r"^\d{4}-\d{2}-\d{2}(?P<sep>[Tt ])\d{2}:\d{2}:\d{2}(?:\.(?P<fraction>\d+))?(?P<zone>[Zz]|[+-]\d{2}(?::?\d{2})?)?$"
+ISO_MAX_LENGTH = 40  # Longer strings are never RFC 3339 timestamps
+
+
+def resolve_timestamp_format(log_type=None, fmt=None):
+    """Return the explicit format to use for a log type, or `fmt` if one is given."""
+    if fmt:
+        return fmt
+    return TIMESTAMP_FORMATS.get(log_type, DEFAULT_TIMESTAMP_FORMAT)
+
+# Position of each fixed-width strftime directive in "YYYY-MM-DDTHH:MM:SS.ffffff"
+ISO_POSITIONS = {"%Y": (0, 4), "%m": (5, 2), "%d": (8, 2), "%H": (11, 2), "%M": (14, 2), "%S": (17, 2), "%f": (20, 6)}
+ISO_TEMPLATE = "1900-01-01T00:00:00.000000"
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+def parse_timestamps(timestamp_series: pd.Series, fmt=DEFAULT_TIMESTAMP_FORMAT):
+    """
+    Parse a whole column of timestamps at once.
+
+    Only the distinct values are parsed and the results broadcast back, so
+    second-resolution syslog timestamps cost one parse per second of log.
+    Returns the int64 nanoseconds since the epoch (naive UTC for ISO 8601)
+    and a boolean mask of the rows that parsed.
+    """
+    codes, uniques = pd.factorize(pd.Series(timestamp_series))
+    ns, valid = _parse_column(pd.Series(uniques), fmt)
+    # code -1 marks missing values
+    return np.append(ns, NAT)[codes], np.append(valid, False)[codes]
+
+def _parse_column(timestamp_series, fmt):
+    if fmt == "epoch":
+        seconds = pd.to_numeric(timestamp_series, errors="coerce").to_numpy(dtype=np.float64)
+        valid = ~np.isnan(seconds)
+        ns = np.where(valid, np.round(np.nan_to_num(seconds) * NS_PER_SECOND), 0).astype(np.int64)
+        return ns, valid
+
+    if fmt == "ISO8601":
+        return _parse_iso(timestamp_series)
+
+    values = timestamp_series.to_numpy(dtype=object)
+    if "%Y" not in fmt and "%y" not in fmt:
+        values = np.array([f"{NO_YEAR} {value}" for value in values], dtype=object)
+        fmt = "%Y " + fmt
+    layout = _fixed_width_layout(fmt)
+    if layout is None:
+        ns = _parse_with_format(values, fmt)
+        return ns, ns != NAT
+
+    # Rearrange fixed-width rows into ISO strings, which pandas parses in C,
+    # and only fall back to strptime for the rows that do not fit the layout.
+    # A trailing %f is tried with microsecond and millisecond precision.
+    layouts = [layout, layout[:-3]] if fmt.endswith("%f") else [layout]
+    ns = np.full(len(values), NAT, dtype=np.int64)
+    remaining = np.ones(len(values), dtype=bool)
+    for candidate in layouts:
+        iso_strings, fits = _to_iso_strings(values[remaining], candidate)
+        rows = np.flatnonzero(remaining)[fits]
+        ns[rows] = _parse_with_format(iso_strings[fits], ISO_FORMAT)
+        remaining[rows] = False
+    if remaining.any():
+        ns[remaining] = _parse_with_format(values[remaining], fmt)
+    return ns, ns != NAT
+
+def format_timestamps(ns, fmt=DEFAULT_TIMESTAMP_FORMAT, like=None) -> np.ndarray:
+    """
+    Format int64 nanoseconds back into strings in one vectorized step.
+
+    `like` holds the original strings of the same rows. When it is given,
+    each value keeps its original's sub-second precision, a space-padded
+    "%b %d" day keeps its padding, and ISO 8601 values keep their separator
+    and UTC offset. Without it, sub-second values are written with
+    millisecond precision and ISO 8601 as UTC with a "Z".
+    """
+    ns = np.asarray(ns, dtype=np.int64)
+    if like is None:
+        if fmt == "ISO8601":
+            return _format_fixed(ns, ISO_FORMAT, 3) + "Z"
+        return _format_fixed(ns, fmt, 3 if fmt == "epoch" or fmt.endswith("%f") else 0)
+
+    like = pd.Series(np.asarray(like, dtype=object), dtype=object)
+    if fmt == "ISO8601":
+        return _format_iso_like(ns, like)
+
+    digits = np.zeros(len(ns), dtype=np.int64)
+    head = _fixed_width_layout(fmt[:-2]) if fmt.endswith("%f") else None
+    if head is not None:  # Everything before %f is fixed width, so the length gives the digits
+        lengths = np.fromiter(map(len, like.to_numpy()), dtype=np.int64, count=len(like))
+        digits = np.maximum(lengths - len(head), 0)
+    elif fmt == "epoch" or fmt.endswith("%f"):
+        dot = like.str.rfind(".").to_numpy(dtype=np.int64)
+        digits = np.where(dot >= 0, like.str.len().to_numpy(dtype=np.int64) - dot - 1, 0)
+    if fmt.endswith("%f"):
+        digits = np.maximum(digits, 1)  # %f needs at least one digit to parse again
+    strings = np.empty(len(ns), dtype=object)
+    for n in np.unique(digits):
+        rows = digits == n
+        strings[rows] = _format_fixed(ns[rows], fmt, int(n))
+
+    if "%b %d" in fmt:
+        if fmt.startswith("%b %d"):
+            padded = (like.str[4:5] == " ").to_numpy(dtype=bool)
+        else:
+            padded = like.str.contains(r"\b[A-Za-z]{3}  \d\b", regex=True, na=False).to_numpy(dtype=bool)
+        if padded.any():
+            strings[padded] = pd.Series(strings[padded], dtype=object).str.replace(
+                r"\b([A-Za-z]{3}) 0(\d)\b", r"\1  \2", n=1, regex=True).to_numpy(dtype=object)
+    return strings
+
+def _format_fixed(ns, fmt, digits):
+    """Format with `fmt`, writing `digits` fractional digits for epoch seconds or a trailing %f."""
+    if fmt == "epoch":
+        seconds = pd.Series(ns // NS_PER_SECOND).astype(str)
+        if not digits:
+            return seconds.to_numpy(dtype=object)
+        fraction = pd.Series(ns % NS_PER_SECOND).astype(str).str.zfill(9)
+        return (seconds + "." + _fraction(fraction, digits)).to_numpy(dtype=object)
+
+    layout = _fixed_width_layout(fmt)
+    if not fmt.endswith("%f"):
+        return _strftime(ns, fmt, layout)
+    if layout is not None and digits <= 6:  # Cut the microseconds of the ISO gather
+        return _strftime(ns, fmt, layout[:len(layout) - (6 - digits)])
+    head = _strftime(ns, fmt[:-2], _fixed_width_layout(fmt[:-2]))
+    fraction = pd.Series(ns % NS_PER_SECOND).astype(str).str.zfill(9)
+    return head + _fraction(fraction, digits).to_numpy(dtype=object)
+
+def _fraction(nine_digits, digits):
+    """Cut or zero-extend nine-digit fractions to `digits` digits."""
+    return nine_digits.str[:digits] + "0" * max(0, digits - 9)
+
+def _strftime(ns, fmt, layout):
+    if layout is not None:
+        return _from_iso_strings(np.datetime_as_string(ns.view("datetime64[ns]"), unit="us"), layout)
+    return pd.Series(ns.view("datetime64[ns]")).dt.strftime(fmt).to_numpy(dtype=object)
+
+def _iso_layouts(values):
+    """
+    Per-row layout of RFC 3339 strings: whether the row fits the pattern, its
+    separator, fractional digits, zone suffix and UTC offset in nanoseconds,
+    and a code shared by rows of the same shape.
+
+    Rows of the same length, separator and offset suffix share a layout, so
+    the pattern only runs on one representative of each shape.
+    """
+    values = pd.Series(np.asarray(values, dtype=object), dtype=object)
+    codes, _ = pd.factorize(_shape_keys(values.to_numpy()))
+    first_rows = np.unique(codes, return_index=True)[1]
+    parts = values.iloc[first_rows].str.extract(ISO_PARTS).reset_index(drop=True)
+
+    matched = parts["sep"].notna().to_numpy()
+    sep = parts["sep"].fillna("T").to_numpy(dtype=object, copy=True)
+    digits = parts["fraction"].str.len().fillna(0).to_numpy(dtype=np.int64, copy=True)
+    zone = parts["zone"].fillna("").to_numpy(dtype=object, copy=True)
+    offset = np.zeros(len(parts), dtype=np.int64)
+    for i, value in enumerate(zone):
+        if value[:1] in ("+", "-"):
+            hours_minutes = value[1:].replace(":", "")
+            seconds = int(hours_minutes[:2]) * 3600 + int(hours_minutes[2:4] or 0) * 60
+            offset[i] = (seconds if value[0] == "+" else -seconds) * NS_PER_SECOND
+
+    codes = np.asarray(codes)
+    return {"code": codes, "matched": matched[codes], "sep": sep[codes], "digits": digits[codes],
+            "zone": zone[codes], "offset": offset[codes]}
+
+def _shape_keys(values):
+    """
+    Pack each string's length, character 10 and last six characters into an
+    int64, with the digits before a UTC offset suffix masked so only the
+    offset tells rows apart. Strings that are too long, or not ASCII where
+    it matters, share the key -1: none of them can be an RFC 3339 timestamp.
+    """
+    width = ISO_MAX_LENGTH
+    chars = values.astype(f"U{width + 1}").view(np.uint32).reshape(-1, width + 1).astype(np.int64)
+    lengths = np.count_nonzero(chars, axis=1)
+    tail = np.take_along_axis(chars, np.clip(lengths[:, None] + np.arange(-6, 0), 0, width), axis=1)
+
+    # Where the offset starts in the tail: "+hh:mm", "+hhmm", "+hh" or "Z"; 6 when there is none.
+    # A sign before position 19 belongs to the date, not to an offset.
+    zone_start = np.full(len(values), 6)
+    for column in (3, 1, 0):
+        is_sign = (tail[:, column] == ord("+")) | (tail[:, column] == ord("-"))
+        zone_start = np.where(is_sign & (lengths - 6 + column >= 19), column, zone_start)
+    zone_start = np.where((tail[:, 5] == ord("Z")) | (tail[:, 5] == ord("z")), 5, zone_start)
+    is_digit = (tail >= ord("0")) & (tail <= ord("9"))
+    tail = np.where(is_digit & (np.arange(6) < zone_start[:, None]), ord("0"), tail)
+
+    key = lengths
+    for column in [chars[:, 10]] + list(tail.T):
+        key = (key << 7) | np.minimum(column, 127)
+    plain = (lengths <= width) & (chars[:, 10] < 127) & (tail < 127).all(axis=1)
+    return np.where(plain, key, -1)
+
+def _parse_iso(timestamp_series):
+    """
+    Parse RFC 3339 strings to UTC nanoseconds. Each shape of timestamp is
+    gathered into the plain ISO layout and parsed in C; anything else goes
+    through pandas' general ISO 8601 parser.
+    """
+    values = timestamp_series.to_numpy(dtype=object)
+    ns = np.full(len(values), NAT, dtype=np.int64)
+    if len(values) == 0:
+        return ns, ns != NAT
+
+    layouts = _iso_layouts(values)
+    remaining = np.ones(len(values), dtype=bool)
+    for code in np.unique(layouts["code"][layouts["matched"] & (layouts["digits"] <= 6)]):
+        rows = np.flatnonzero(layouts["code"] == code)
+        first = rows[0]
+        digits = layouts["digits"][first]
+        layout = _fixed_width_layout("%Y-%m-%d") + [layouts["sep"][first]] + _fixed_width_layout("%H:%M:%S")
+        if digits:
+            layout += ["."] + list(range(20, 20 + digits))
+        layout += list(layouts["zone"][first])
+
+        iso_strings, fits = _to_iso_strings(values[rows], layout)
+        rows, iso_strings = rows[fits], iso_strings[fits]
+        parsed = _parse_with_format(iso_strings, ISO_FORMAT)
+        ns[rows] = np.where(parsed != NAT, parsed - layouts["offset"][rows], NAT)
+        remaining[rows] = False
+
+    if remaining.any():
+        parsed = pd.to_datetime(pd.Series(values[remaining], dtype=object), format="ISO8601",
+                                errors="coerce", utc=True)
+        ns[remaining] = parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[ns]").view(np.int64)
+    return ns, ns != NAT
+
+def _format_iso_like(ns, like):
+    """Write UTC nanoseconds as RFC 3339 strings in each original's offset, separator and precision."""
+    layouts = _iso_layouts(like)
+    matched = layouts["matched"]
+    sep = layouts["sep"]
+    digits = np.where(matched, layouts["digits"], 3)
+    zone = np.where(matched, layouts["zone"], "Z").astype(object)
+
+    # Shift each instant to the wall-clock time of its original offset
+    local = ns + layouts["offset"]
+
+    strings = np.empty(len(ns), dtype=object)
+    for separator in pd.unique(sep):
+        for n in np.unique(digits[sep == separator]):
+            rows = (sep == separator) & (digits == n)
+            fmt = f"%Y-%m-%d{separator}%H:%M:%S" + (".%f" if n else "")
+            strings[rows] = _format_fixed(local[rows], fmt, int(n))
+    return strings + zone
+
+def _parse_with_format(values, fmt):
+    """pd.to_datetime with an explicit format, returned as int64 nanoseconds (NaT for failures)."""
+    parsed = pd.to_datetime(pd.Series(values, dtype=object), format=fmt, errors="coerce")
+    return parsed.to_numpy(dtype="datetime64[ns]").view(np.int64).copy()
+
+def _fixed_width_layout(fmt):
+    """
+    Describe a strftime format character by character: an int is a position
+    in the ISO template, a str is a literal. Returns None when the format
+    uses directives that are not fixed width.
+    """
+    layout = []
+    i = 0
+    while i < len(fmt):
+        if fmt[i] == "%":
+            directive = fmt[i:i + 2]
+            if directive not in ISO_POSITIONS:
+                return None
+            start, width = ISO_POSITIONS[directive]
+            layout.extend(range(start, start + width))
+            i += 2
+        else:
+            layout.append(fmt[i])
+            i += 1
+    return layout
+
+def _to_iso_strings(values, layout):
+    """Gather fixed-width timestamp strings into ISO strings; also returns which rows fit the layout."""
+    width = len(layout)
+    chars = np.asarray(values, dtype=object).astype(f"U{width + 1}").view(np.uint32).reshape(-1, width + 1)
+    chars = np.ascontiguousarray(chars.T)  # One contiguous row per character position
+    fits = chars[width] == 0
+
+    iso = np.repeat(np.array(list(ISO_TEMPLATE)).view(np.uint32)[:, None], chars.shape[1], axis=1)
+    for column, entry in enumerate(layout):
+        c = chars[column]
+        if isinstance(entry, str):
+            fits &= c == ord(entry)
+        else:
+            fits &= (c >= 48) & (c <= 57)
+            iso[entry] = c
+    return np.ascontiguousarray(iso.T).view(f"U{len(ISO_TEMPLATE)}").ravel(), fits
+
+def _from_iso_strings(iso_strings, layout):
+    """Gather ISO strings into the character layout of another fixed-width format."""
+    chars = iso_strings.astype(f"U{len(ISO_TEMPLATE)}").view(np.uint32).reshape(-1, len(ISO_TEMPLATE))
+    positions = [entry for entry in layout if not isinstance(entry, str)]
+    out = np.empty((len(chars), len(layout)), dtype=np.uint32)
+    out[:, [i for i, entry in enumerate(layout) if not isinstance(entry, str)]] = chars[:, positions]
+    for column, entry in enumerate(layout):
+        if isinstance(entry, str):
+            out[:, column] = ord(entry)
+    return out.view(f"U{len(layout)}").ravel().astype(object)
+
+
+def transform_timestamps(timestamp_series: pd.Series, transform, log_type=None, fmt=None, per_value=False) -> pd.Series:
+    """
+    Parse a column once, apply `transform` to the int64 nanoseconds of the
+    rows that parsed and format them back. Rows that fail to parse keep
+    their original value.
+
+    A `per_value` transform gives equal timestamps equal results (rounding,
+    bucketing, a fixed shift), so it is applied to the distinct values only;
+    missing values then stay missing.
+    """
+    fmt = resolve_timestamp_format(log_type, fmt)
+    if per_value:
+        return map_unique(timestamp_series, lambda values: _transform_values(values, transform, fmt))
+
+    result = _transform_values(timestamp_series.to_numpy(dtype=object), transform, fmt)
+    return pd.Series(result, index=timestamp_series.index, name=timestamp_series.name)
+
+def _transform_values(values, transform, fmt):
+    ns, valid = parse_timestamps(pd.Series(values, dtype=object), fmt)
+    result = np.array(values, dtype=object, copy=True)
+    if valid.any():
+        result[valid] = format_timestamps(transform(ns[valid]), fmt, like=result[valid])
+    return result
+
+def floor_to_bucket(ns, width_ns, origin_ns=0):
+    """Floor int64 nanoseconds to buckets of `width_ns` starting at `origin_ns`."""
+    return (ns - origin_ns) // width_ns * width_ns + origin_ns
+
+def random_time_shift_column(timestamp_series: pd.Series, max_shift_hours=24, log_type=None, fmt=None) -> pd.Series:
     """
     Applies consistent dataset-wide time shift to preserve temporal order.
     Uses hash-based seeding for reproducible shifts.
     """
     # Generate single shift value for entire dataset
-    seed = int(hashlib.sha256(timestamp_series.name.encode()).hexdigest(), 16) % 10**8
+    seed = int(hashlib.sha256(str(timestamp_series.name).encode()).hexdigest(), 16) % 10**8
     random.seed(seed)
-    dataset_shift = timedelta(seconds=random.randint(-max_shift_hours*3600, max_shift_hours*3600))
-
-    def apply_shift(ts):
-        try:
-            dt = pd.to_datetime(ts, errors='coerce')
-            if pd.isnull(dt):
-                return ts
-            return (dt + dataset_shift).strftime("%m/%d/%Y-%H:%M:%S.%f")[:-3]
-        except:
-            return ts
+    dataset_shift = random.randint(-max_shift_hours*3600, max_shift_hours*3600) * NS_PER_SECOND
 
-    return timestamp_series.map(apply_shift)
+    return transform_timestamps(timestamp_series, lambda ns: ns + dataset_shift, log_type, fmt, per_value=True)
 
-def perturb_time_column(timestamp_series: pd.Series, window_minutes=5) -> pd.Series:
+def perturb_time_column(timestamp_series: pd.Series, window_minutes=5, log_type=None, fmt=None, seed=None) -> pd.Series:
     """
-    Adds random perturbation within specified window while preserving 
-    microsecond resolution format.
+    Adds random perturbation within specified window, drawing whole-second
+    jitter for every row in one call.
     """
-    def add_perturbation(ts):
-        try:
-            dt = pd.to_datetime(ts, errors='coerce')
-            if pd.isnull(dt):
-                return ts
-                
-            jitter = random.randint(-window_minutes*60, window_minutes*60)
-            perturbed = dt + timedelta(seconds=jitter)
-            return perturbed.strftime("%m/%d/%Y-%H:%M:%S.%f")[:-3]
-        except:
-            return ts
+    rng = np.random.default_rng(seed)
+    window = window_minutes * 60
 
-    return timestamp_series.map(add_perturbation)
+    def add_perturbation(ns):
+        jitter = rng.integers(-window, window, size=len(ns), endpoint=True)
+        return ns + jitter * NS_PER_SECOND
 
-def bucketize_dates_column(timestamp_series: pd.Series, resolution='day') -> pd.Series:
+    return transform_timestamps(timestamp_series, add_perturbation, log_type, fmt)
+
+def bucketize_dates_column(timestamp_series: pd.Series, resolution='day', log_type=None, fmt=None) -> pd.Series:
     """
     Aggregates timestamps to broader time buckets:
     - 'day': YYYY-MM-DD 00:00:00
@@ -53,79 +388,64 @@ def bucketize_dates_column(timestamp_series: pd.Series, resolution='day') -> pd.
     - 'month': First day of month
     """
     resolutions = {
-        'day': lambda dt: dt.replace(hour=0, minute=0, second=0, microsecond=0),
-        'week': lambda dt: (dt - timedelta(days=dt.weekday())).replace(
-            hour=0, minute=0, second=0, microsecond=0),
-        'month': lambda dt: dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        'day': lambda ns: floor_to_bucket(ns, NS_PER_DAY),
+        # 1970-01-01 was a Thursday, so Mondays are 4 days after each 7-day boundary
+        'week': lambda ns: floor_to_bucket(ns, 7 * NS_PER_DAY, origin_ns=4 * NS_PER_DAY),
+        'month': lambda ns: ns.view("datetime64[ns]").astype("datetime64[M]").astype("datetime64[ns]").view(np.int64),
     }
-    
-    def bucketize(ts):
-        try:
-            dt = pd.to_datetime(ts, errors='coerce')
-            if pd.isnull(dt) or resolution not in resolutions:
-                return ts
-            return resolutions[resolution](dt).strftime("%m/%d/%Y-%H:%M:%S.000")
-        except:
-            return ts
+    if resolution not in resolutions:
+        return timestamp_series
 
-    return timestamp_series.map(bucketize)
+    return transform_timestamps(timestamp_series, resolutions[resolution], log_type, fmt, per_value=True)
 
 
 
-def round_to_nearest_15_minutes_column(timestamp_series: pd.Series) -> pd.Series:
-    """Rounds timestamps in a column to the nearest 15-minute mark."""
-    def round_time(ts):
-        try:
-            dt = datetime.strptime(ts, "%m/%d/%Y-%H:%M:%S.%f")
-            rounded_minute = (dt.minute // 15) * 15
-            rounded_time = dt.replace(minute=rounded_minute, second=0, microsecond=0)
-            return rounded_time.strftime("%m/%d/%Y-%H:%M:%S.000")
-        except ValueError:
-            return ts  # Keep as is if invalid
-    
-    return timestamp_series.map(round_time)
+def round_to_nearest_15_minutes_column(timestamp_series: pd.Series, bucket_minutes=15, log_type=None, fmt=None) -> pd.Series:
+    """Rounds timestamps in a column down to the nearest 15-minute (or `bucket_minutes`) mark."""
+    return transform_timestamps(
+        timestamp_series, lambda ns: floor_to_bucket(ns, bucket_minutes * NS_PER_MINUTE), log_type, fmt, per_value=True)
 
 
-def order_preserving_adaptive_noise(timestamp_series: pd.Series, apply_global_offset=True) -> pd.Series:
+def order_preserving_adaptive_noise(timestamp_series: pd.Series, apply_global_offset=True,
+                                    log_type=None, fmt=None, seed=None) -> pd.Series:
     """
-    Applies adaptive, order-preserving noise to sorted timestamps.
-    Each timestamp is perturbed within bounds that preserve order.
+    Applies adaptive, order-preserving noise to timestamps.
+    Each timestamp is perturbed within half the gap to its neighbours in
+    time order, so the order of the rows is preserved.
 
     Parameters:
-    - timestamp_series: A sorted pd.Series of timestamps in string format.
+    - timestamp_series: A pd.Series of timestamps in string format, in any row order.
     - apply_global_offset: Whether to apply a global random offset to all timestamps.
+    - log_type / fmt: Select the timestamp format (see TIMESTAMP_FORMATS).
+    - seed: Optional seed for the random generator.
 
     Returns:
-    - A pd.Series of obfuscated timestamps as strings.
+    - A pd.Series of obfuscated timestamps as strings, in the original row order.
+      Rows that fail to parse (e.g. the syslog NILVALUE "-") keep their value
+      and do not count as neighbours.
     """
-    # Convert to datetime
-    timestamps = pd.to_datetime(timestamp_series, errors='coerce')
-    if timestamps.isnull().any():
-        raise ValueError("Timestamp series contains invalid datetime entries.")
+    rng = np.random.default_rng(seed)
 
-    perturbed = []
+    def add_adaptive_noise(ns):
+        # Work in time order, then scatter back to the original rows
+        order = np.argsort(ns, kind="stable")
+        sorted_ns = ns[order]
 
-    for i in range(len(timestamps)):
-        Ti = timestamps[i]
+        half_gaps = np.diff(sorted_ns) / 2
+        before = np.concatenate(([np.inf], half_gaps))  # No neighbour before the first timestamp
+        after = np.concatenate((half_gaps, [np.inf]))   # No neighbour after the last timestamp
+        delta = np.minimum(before, after)
+        low = np.where(np.isinf(before), 0.0, -delta)
+        high = np.where(np.isinf(after), 0.0, delta)
 
-        if i == 0:
-            delta = (timestamps[i + 1] - Ti) / 2
-            low, high = timedelta(0), delta
-        elif i == len(timestamps) - 1:
-            delta = (Ti - timestamps[i - 1]) / 2
-            low, high = -delta, timedelta(0)
-        else:
-            delta1 = (Ti - timestamps[i - 1]) / 2
-            delta2 = (timestamps[i + 1] - Ti) / 2
-            delta = min(delta1, delta2)
-            low, high = -delta, delta
+        noise = rng.uniform(low, high)
+        perturbed = sorted_ns + np.round(noise).astype(np.int64)
 
-        noise = timedelta(seconds=random.uniform(low.total_seconds(), high.total_seconds()))
-        perturbed.append(Ti + noise)
+        if apply_global_offset:
+            perturbed += rng.integers(-3600, 3600, endpoint=True) * NS_PER_SECOND  # ±1 hour
 
-    if apply_global_offset:
-        global_offset = timedelta(seconds=random.randint(-3600, 3600))  # ±1 hour
-        perturbed = [ts + global_offset for ts in perturbed]
+        result = np.empty_like(perturbed)
+        result[order] = perturbed
+        return result
 
-    return pd.Series([ts.strftime("%m/%d/%Y-%H:%M:%S.%f")[:-3] for ts in perturbed],
-                     index=timestamp_series.index)
+    return transform_timestamps(timestamp_series, add_adaptive_noise, log_type, fmt)
@@ -1,4 +1,5 @@
 from urllib.parse import urlparse
+from anonymizer.factorize import map_unique
 
 def generalize_url(url_column):
     """
@@ -9,6 +10,8 @@ def generalize_url(url_column):
 
     Returns:
     Series: Generalized URLs.
+
+    Each distinct URL is parsed once; missing values stay missing.
     """
     def simplify_url(url):
         try:
@@ -17,4 +20,4 @@ def generalize_url(url_column):
         except:
             return "INVALID_URL"
 
-    return url_column.apply(simplify_url)
+    return map_unique(url_column, lambda urls: [simplify_url(url) for url in urls])
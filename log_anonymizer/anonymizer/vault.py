@@ -0,0 +1,189 @@
+import os
+import sqlite3
+import time
+import numpy as np
+
+KEY_FILE = "key.bin"
+DB_FILE = "mappings.sqlite"
+DEFAULT_MAX_ENTRIES = 5_000_000
+DEFAULT_WARM_ENTRIES = 100_000
+
+# SQLite limits the number of bound parameters per statement
+_BATCH = 500
+
+
+class KeyVault:
+    """
+    Persistent pseudonymization key plus an on-disk cache of value mappings.
+
+    The key file makes the salt, and therefore every salt-derived mapping,
+    stable across runs. The SQLite cache remembers mappings per domain
+    ("ip", "port", ...) so later runs can reuse them; the most recently
+    used entries are loaded into memory on open, and the cache is trimmed
+    to `max_entries` by evicting the least recently used rows.
+
+    The vault holds original identifiers and the key, so it must be
+    protected like the raw logs.
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES, warm_entries=DEFAULT_WARM_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(path, exist_ok=True)
+
+        self.salt = self._load_or_create_key(os.path.join(path, KEY_FILE))
+
+        # Not tied to the opening thread: listen mode uses the vault from its one worker thread
+        self._db = sqlite3.connect(os.path.join(path, DB_FILE), timeout=60, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS mappings ("
+            " domain TEXT NOT NULL, original TEXT NOT NULL, anonymized TEXT NOT NULL,"
+            " last_used INTEGER NOT NULL, PRIMARY KEY (domain, original)) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS mappings_last_used ON mappings (last_used)")
+        self._db.commit()
+
+        self._entries = self._db.execute("SELECT COUNT(*) FROM mappings").fetchone()[0]
+        self._memory = {}
+        self._touched = {}
+        self.hits = 0
+        self.misses = 0
+        self._warm_start(warm_entries)
+
+    @staticmethod
+    def _load_or_create_key(key_path):
+        if os.path.exists(key_path):
+            with open(key_path, "rb") as f:
+                return f.read()
+        key = os.urandom(16)
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+
+    def _warm_start(self, warm_entries):
+        """Load the most recently used mappings into memory."""
+        if not warm_entries:
+            return
+        rows = self._db.execute(
+            "SELECT domain, original, anonymized FROM mappings ORDER BY last_used DESC LIMIT ?",
+            (warm_entries,),
+        )
+        for domain, original, anonymized in rows:
+            self._memory.setdefault(domain, {})[original] = anonymized
+
+    def lookup(self, domain, originals):
+        """Return {original: anonymized} for the values the vault already knows."""
+        memory = self._memory.setdefault(domain, {})
+        touched = self._touched.setdefault(domain, set())
+        found = {}
+        missing = []
+        for original in originals:
+            anonymized = memory.get(original)
+            if anonymized is None:
+                missing.append(original)
+            else:
+                found[original] = anonymized
+                touched.add(original)
+
+        for start in range(0, len(missing), _BATCH):
+            batch = missing[start:start + _BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute(
+                f"SELECT original, anonymized FROM mappings WHERE domain = ? AND original IN ({placeholders})",
+                [domain, *batch],
+            )
+            for original, anonymized in rows:
+                found[original] = anonymized
+                memory[original] = anonymized
+                touched.add(original)
+
+        self.hits += len(found)
+        self.misses += len(originals) - len(found)
+        return found
+
+    def store(self, domain, mapping):
+        """Persist new {original: anonymized} pairs and trim the cache if it grew past max_entries."""
+        if not mapping:
+            return
+        now = int(time.time())
+        self._memory.setdefault(domain, {}).update(mapping)
+        before = self._db.total_changes
+        self._db.executemany(
+            "INSERT OR IGNORE INTO mappings (domain, original, anonymized, last_used) VALUES (?, ?, ?, ?)",
+            ((domain, original, anonymized, now) for original, anonymized in mapping.items()),
+        )
+        self._entries += self._db.total_changes - before
+        self._db.commit()
+        if self._entries > self.max_entries:
+            self.evict()
+
+    def evict(self):
+        """Drop the least recently used rows until the cache fits in max_entries."""
+        self._flush_touched()
+        excess = self._entries - self.max_entries
+        if excess <= 0:
+            return
+        self._db.execute(
+            "DELETE FROM mappings WHERE (domain, original) IN "
+            "(SELECT domain, original FROM mappings ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._db.commit()
+        self._entries = self._db.execute("SELECT COUNT(*) FROM mappings").fetchone()[0]
+        self._memory.clear()
+
+    def _flush_touched(self):
+        """Record the use time of mappings that were hit since the last flush."""
+        now = int(time.time())
+        for domain, originals in self._touched.items():
+            self._db.executemany(
+                "UPDATE mappings SET last_used = ? WHERE domain = ? AND original = ?",
+                ((now, domain, original) for original in originals),
+            )
+        self._touched = {}
+        self._db.commit()
+
+    def close(self):
+        self._flush_touched()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_vault(config):
+    """Open the vault configured under `vault:` in the config, or return None when there is none."""
+    settings = config.get("vault") or {}
+    if not settings.get("path"):
+        return None
+    return KeyVault(settings["path"],
+                    max_entries=settings.get("max_entries", DEFAULT_MAX_ENTRIES),
+                    warm_entries=settings.get("warm_entries", DEFAULT_WARM_ENTRIES))
+
+
+def map_with_vault(vault, domain, unique_values, transform):
+    """
+    Map an object array of distinct values through `transform`, reusing and
+    filling the vault's `domain` mappings when a vault is given.
+    """
+    if vault is None:
+        return transform(unique_values)
+
+    keys = [str(value) for value in unique_values]
+    known = vault.lookup(domain, keys)
+    result = np.empty(len(unique_values), dtype=object)
+    pending = np.array([key not in known for key in keys], dtype=bool)
+    result[~pending] = [known[key] for key, is_pending in zip(keys, pending) if not is_pending]
+
+    if pending.any():
+        computed = transform(unique_values[pending])
+        result[pending] = computed
+        vault.store(domain, {key: str(value) for key, value in
+                             zip((k for k, p in zip(keys, pending) if p), computed)})
+    return result
@@ -0,0 +1,55 @@
+"""
+Condensation throughput on synthetic flows and byte counts.
+
+Run from the log_anonymizer directory:
+
+    python benchmarks/bench_condensation.py --flows 1000000 --hosts 50000 --values 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anonymizer.nonip_diff_priv import non_ip_diff_privacy
+from anonymizer.paper_imple import anonymize_ip_addresses
+
+
+def synthetic_ips(flows, hosts, seed=7):
+    """`flows` addresses drawn with a skewed (Zipf-like) frequency from `hosts` distinct ones."""
+    rng = np.random.default_rng(seed)
+    pool = np.array([f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in rng.choice(1 << 24, hosts, replace=False)],
+                    dtype=object)
+    weights = 1.0 / np.arange(1, hosts + 1)
+    return pool[rng.choice(hosts, flows, p=weights / weights.sum())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IP and numeric condensation")
+    parser.add_argument("--flows", type=int, default=1_000_000, help="Addresses to condense")
+    parser.add_argument("--hosts", type=int, default=50_000, help="Distinct addresses among them")
+    parser.add_argument("--values", type=int, default=10_000_000, help="Numeric values (byte counts) to condense")
+    parser.add_argument("-k", type=int, default=5, help="Minimum records per group")
+    args = parser.parse_args()
+
+    ips = synthetic_ips(args.flows, args.hosts)
+    start = time.perf_counter()
+    anonymize_ip_addresses(ips, args.k, seed=0, key=os.urandom(16))
+    elapsed = time.perf_counter() - start
+    print(f"IP condensation: {args.flows:,} flows, {args.hosts:,} hosts in {elapsed:.2f}s: "
+          f"{args.flows / elapsed:,.0f} flows/sec")
+
+    byte_counts = pd.Series(np.random.default_rng(7).lognormal(8, 2, args.values).round())
+    start = time.perf_counter()
+    non_ip_diff_privacy(byte_counts, args.k, seed=0)
+    elapsed = time.perf_counter() - start
+    print(f"Numeric DP condensation: {args.values:,} values in {elapsed:.2f}s: "
+          f"{args.values / elapsed:,.0f} values/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+EVE JSON throughput: stream a synthetic eve.json through parse, anonymize and rewrite.
+
+Run from the log_anonymizer directory:
+
+    python benchmarks/bench_eve.py --events 2000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anonymizer import eve
+from anonymizer.pipeline import stream_anonymize
+
+ANONYMIZATION = {"ip": "salt", "port": "salt", "timestamp": "round",
+                 "eve_paths": {"http.hostname": "mask", "dns.rrname": "mask"}}
+
+
+def write_events(path, count, hosts=50_000, seed=7):
+    """Write `count` alert/http/dns/flow/stats events drawn from `hosts` distinct addresses."""
+    rng = random.Random(seed)
+    addresses = [f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}" for _ in range(hosts)]
+    names = [f"host{i}.example.com" for i in range(1_000)]
+    start = 1_742_251_687.0
+
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            seconds = start + i * 0.001
+            event = {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + f".{i % 1_000_000:06d}+0000",
+                "flow_id": i,
+                "event_type": ("alert", "http", "dns", "flow", "stats")[i % 5],
+            }
+            if event["event_type"] != "stats":
+                event.update(src_ip=rng.choice(addresses), src_port=rng.randrange(1024, 65536),
+                             dest_ip=rng.choice(addresses), dest_port=rng.choice((53, 80, 443, 8080)), proto="TCP")
+            if event["event_type"] == "http":
+                event["http"] = {"hostname": rng.choice(names), "url": "/index.html", "status": 200}
+            elif event["event_type"] == "dns":
+                event["dns"] = {"type": "query", "rrname": rng.choice(names), "rrtype": "A"}
+            elif event["event_type"] == "stats":
+                event["stats"] = {"uptime": i}
+            f.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark EVE JSON anonymization")
+    parser.add_argument("--events", type=int, default=2_000_000, help="Synthetic events to generate")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Events per streamed chunk")
+    parser.add_argument("--log", help="Benchmark an existing eve.json instead of generating one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = args.log
+        if log_file is None:
+            log_file = os.path.join(tmp, "eve.json")
+            write_events(log_file, args.events)
+        config = {"log_file": log_file, "log_type": "eve", "output_log": os.path.join(tmp, "anonymized.json"),
+                  "anonymization": ANONYMIZATION}
+
+        print(f"JSON backend: {'orjson' if eve.orjson is not None else 'json (install orjson for speed)'}")
+        start = time.perf_counter()
+        total_events, anonymized = stream_anonymize(config, os.urandom(16), chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+
+    print(f"{total_events:,} events ({anonymized:,} anonymized) in {elapsed:.2f}s: "
+          f"{total_events / elapsed:,.0f} events/sec")
+
+
+if __name__ == "__main__":
+    main()
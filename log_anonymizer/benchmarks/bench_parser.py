@@ -0,0 +1,66 @@
+"""
+Parser throughput: the old search/groupdict parser against the compiled extractors.
+
+Run from the log_anonymizer directory:
+
+    python benchmarks/bench_parser.py --scale 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anonymizer.log_parser import LOG_PATTERNS, MAPPING_FIELDS, parse_lines
+from anonymizer.mapping_store import MappingBuilder
+from anonymizer.pipeline import anonymized_fields
+
+
+def legacy_parse(lines, pattern, start_line_no=1):
+    """The pre-extractor parser: unanchored search and groupdict() for every line."""
+    logs = []
+    mapping = MappingBuilder()
+    for line_no, line in enumerate(lines, start=start_line_no):
+        match = pattern.search(line)
+        if match:
+            log_entry = match.groupdict()
+            log_entry["line_no"] = line_no
+            logs.append(log_entry)
+            for field in MAPPING_FIELDS:
+                if field in log_entry:
+                    offset = match.start(field) if field in match.re.groupindex else -1
+                    mapping.add(line_no, field, log_entry[field], offset)
+    return logs, mapping.build()
+
+
+def time_parser(name, parse, lines, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(lines)
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<28} {len(lines) / best:>12,.0f} lines/sec  ({best:.3f}s)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the log parser")
+    parser.add_argument("--log", default="suricata_logs.txt", help="Sample suricata log to scale up")
+    parser.add_argument("--scale", type=int, default=200, help="Times to repeat the sample")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per parser; the best is reported")
+    args = parser.parse_args()
+
+    with open(args.log, "r", encoding="utf-8", errors="replace") as f:
+        lines = f.readlines() * args.scale
+    print(f"{len(lines):,} suricata lines")
+
+    fields = anonymized_fields("suricata", {"ip": "salt", "port": "salt", "timestamp": "round"})
+    before = time_parser("legacy search + groupdict", lambda l: legacy_parse(l, LOG_PATTERNS["suricata"]), lines, args.repeat)
+    time_parser("extractor, all fields", lambda l: parse_lines(l, "suricata"), lines, args.repeat)
+    after = time_parser("extractor, anonymized only", lambda l: parse_lines(l, "suricata", fields=fields), lines, args.repeat)
+    print(f"Speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+CLI startup time, and the heavy modules each kind of run imports.
+
+Every case runs main.py in fresh interpreters on a small synthetic suricata
+log; the fastest of --repeat runs is reported:
+
+- "help": main.py --help, which must not import pandas or yaml.
+- "salt_round": salt IPs and ports, round timestamps, which must not import
+  pyarrow (Zeek only) or the condensation, Crypto-PAn or differential
+  privacy code.
+- "condensation": condensed IPs, which loads them.
+
+One more run of each case records the modules it imported. Results go to a
+JSON file. The exit status is 1 when a case imports a module it must not, or,
+with --baseline, when a case got slower than a previous results file by more
+than --tolerance.
+
+Run from the log_anonymizer directory:
+
+    python benchmarks/bench_startup.py --output startup_results.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(BENCH_DIR)
+MAIN = os.path.join(PACKAGE_DIR, "main.py")
+sys.path.insert(0, PACKAGE_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_suite import environment
+from synthetic_logs import write_log
+
+# Modules worth knowing about at startup
+HEAVY_MODULES = ["pandas", "numpy", "yaml", "pyarrow", "asyncio", "sklearn", "Crypto",
+                 "anonymizer.paper_imple", "anonymizer.nonip_diff_priv", "anonymizer.differential",
+                 "anonymizer.condensation"]
+# case -> (anonymization section or None for --help, modules it must not import)
+CASES = {
+    "help": (None, ["pandas", "numpy", "yaml"]),
+    "salt_round": ({"ip": "salt", "port": "salt", "timestamp": "round"},
+                   ["pyarrow", "sklearn", "Crypto", "anonymizer.paper_imple", "anonymizer.nonip_diff_priv",
+                    "anonymizer.differential", "anonymizer.condensation"]),
+    "condensation": ({"ip": {"strategy": "condensation", "seed": 1}, "port": "salt", "timestamp": "round"}, []),
+}
+# Runs main.py as `python main.py ...` would, then lists the modules it imported
+PROBE = """
+import json, os, runpy, sys
+out = sys.argv[1]
+sys.argv = sys.argv[2:]
+sys.path[0] = os.path.dirname(sys.argv[0])
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+except SystemExit:
+    pass
+with open(out, "w") as f:
+    json.dump(sorted(sys.modules), f)
+"""
+
+
+def case_command(case, tmp, lines):
+    """The main.py arguments of `case`, writing its config and input log to `tmp`."""
+    anonymization = CASES[case][0]
+    if anonymization is None:
+        return ["--help"]
+    import yaml
+    log_file = os.path.join(tmp, "input.log")
+    if not os.path.exists(log_file):
+        write_log(log_file, "suricata", lines, hosts=max(lines // 10, 1))
+    config = os.path.join(tmp, f"{case}.yaml")
+    with open(config, "w", encoding="utf-8") as f:
+        yaml.safe_dump({"log_file": log_file, "log_type": "suricata", "output_log": os.path.join(tmp, f"{case}.log"),
+                        "anonymization": anonymization}, f)
+    return ["--config", config]
+
+
+def time_run(args, cwd):
+    """Wall time of one main.py run in a fresh interpreter."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, MAIN, *args], cwd=cwd, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"main.py {' '.join(args)} failed:\n{result.stderr}")
+    return seconds
+
+
+def loaded_modules(args, cwd):
+    """The modules of HEAVY_MODULES (or their submodules) that one main.py run imports."""
+    out = os.path.join(cwd, "modules.json")
+    result = subprocess.run([sys.executable, "-c", PROBE, out, MAIN, *args], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"main.py {' '.join(args)} failed:\n{result.stderr}")
+    with open(out, "r", encoding="utf-8") as f:
+        modules = json.load(f)
+    os.remove(out)
+    return [name for name in HEAVY_MODULES if any(m == name or m.startswith(name + ".") for m in modules)]
+
+
+def measure(case, tmp, lines, repeat):
+    args = case_command(case, tmp, lines)
+    runs = sorted(time_run(args, tmp) for _ in range(repeat))
+    modules = loaded_modules(args, tmp)
+    return {"case": case, "lines": lines if CASES[case][0] else 0, "seconds": round(runs[0], 4),
+            "median_seconds": round(runs[len(runs) // 2], 4), "modules": modules,
+            "forbidden": [name for name in CASES[case][1] if name in modules]}
+
+
+def regressions(results, baseline, tolerance):
+    """Cases slower than in `baseline` by more than `tolerance` (a fraction)."""
+    previous = {r["case"]: r["seconds"] for r in baseline["results"]}
+    slower = []
+    for r in results:
+        before = previous.get(r["case"])
+        if before and r["seconds"] > before * (1 + tolerance):
+            slower.append(f"{r['case']}: {before:.3f}s -> {r['seconds']:.3f}s")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup time and the modules each run imports")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--lines", type=int, default=100, help="Lines of the synthetic log")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case; the fastest is reported")
+    parser.add_argument("--output", default="startup_results.json", help="JSON file for the results")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown against the baseline, as a fraction (default: 0.2)")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="anon_startup_") as tmp:
+        for case in args.cases:
+            result = measure(case, tmp, args.lines, args.repeat)
+            results.append(result)
+            print(f"{case:<13} {result['seconds']:>7.3f}s  (median {result['median_seconds']:.3f}s)"
+                  f"  imports: {', '.join(result['modules']) or '-'}")
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "environment": environment(),
+              "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Startup results saved in {args.output}")
+
+    failed = False
+    for r in results:
+        if r["forbidden"]:
+            print(f"⚠️ {r['case']} imports {', '.join(r['forbidden'])}")
+            failed = True
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            slower = regressions(results, json.load(f), args.tolerance)
+        for line in slower:
+            print(f"⚠️ Slower: {line}")
+        failed = failed or bool(slower)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
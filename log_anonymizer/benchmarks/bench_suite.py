@@ -0,0 +1,251 @@
+"""
+Throughput and memory benchmark of every pipeline stage, per log_type and size.
+
+For each log_type and line count a synthetic log is generated (see
+synthetic_logs.py) and measured in two fresh processes, so each reports its
+own peak RSS:
+
+- "stages": the log is read in chunks; parsing, every anonymization
+  strategy on its own, and reconstruction of the lines are timed separately.
+- "stream": an end-to-end stream_anonymize run, as --stream does it.
+
+Results go to a JSON file. With --baseline, stages that got slower than a
+previous results file by more than --tolerance are listed and the exit
+status is 1, so the suite can gate an upgrade.
+
+Run from the log_anonymizer directory:
+
+    python benchmarks/bench_suite.py --sizes 1k 100k 1M --output bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PACKAGE_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_logs import LOG_TYPES, parse_size, write_log
+
+SALT = b"benchmark-salt!!"
+ANONYMIZATION = {"ip": "salt", "port": "salt", "timestamp": "round"}
+# (field kind, strategy) pairs timed one at a time
+STRATEGIES = [
+    ("ip", "salt"), ("ip", "mask"), ("ip", "condensation"), ("port", "salt"),
+    ("timestamp", "round"), ("timestamp", "perturb"), ("timestamp", "bucketize"), ("timestamp", "adaptive"),
+]
+KIND_FIELDS = {"ip": ["src_ip", "dest_ip"], "port": ["src_port", "dest_port"], "timestamp": ["timestamp"]}
+CUSTOM_STRATEGIES = {"salt", "mask", "condensation", "round", "perturb", "adaptive"}
+
+
+def anonymization_for(log_type, strategies):
+    """The `anonymization` config section selecting `strategies` ({kind: name}) for `log_type`."""
+    if log_type != "custom":
+        return dict(strategies)
+    import yaml
+    with open(os.path.join(PACKAGE_DIR, "config.yaml"), "r") as f:
+        custom_format = dict(yaml.safe_load(f)["anonymization"]["custom_format"])
+    fields = []
+    for kind, name in strategies.items():
+        for field in KIND_FIELDS[kind]:
+            custom_format[field] = name
+            fields.append(field)
+    custom_format["fields"] = fields
+    return {"custom_format": custom_format}
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ru_maxrss is in KiB on Linux
+
+
+def run_stages(log_type, log_file, chunk_size):
+    """Time reading, parsing, each strategy and reconstruction over `log_file` chunk by chunk."""
+    import pandas as pd
+    from anonymizer.eve import parse_eve, rewrite_eve
+    from anonymizer.log_parser import iter_log_chunks, parse_lines, read_zeek
+    from anonymizer.log_reconstructor import rewrite_lines
+    from anonymizer.pipeline import anonymize_dataframe, anonymized_fields
+
+    seconds = defaultdict(float)
+    config = {"log_type": log_type, "anonymization": anonymization_for(log_type, ANONYMIZATION)}
+    anonymization = config["anonymization"]
+    fields = anonymized_fields(log_type, anonymization)
+    strategies = [(kind, name) for kind, name in STRATEGIES
+                  if log_type != "custom" or name in CUSTOM_STRATEGIES]
+    parsed = 0
+
+    def timed(stage, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        seconds[stage] += time.perf_counter() - start
+        return result
+
+    def time_strategies(df_logs):
+        for kind, name in strategies:
+            chunk_config = anonymization_for(log_type, {kind: name})
+            df_copy = df_logs.copy()
+            timed(f"anonymize.{kind}.{name}", anonymize_dataframe, df_copy, log_type, chunk_config, SALT)
+        return anonymize_dataframe(df_logs.copy(), log_type, anonymization, SALT)
+
+    with open(log_file, "r", encoding="utf-8", errors="replace") as f_in, open(os.devnull, "w") as f_null:
+        if log_type == "zeek":
+            header, chunks = read_zeek(f_in, chunk_size)
+            while True:
+                df_logs = timed("parse", next, chunks, None)
+                if df_logs is None:
+                    break
+                parsed += len(df_logs)
+                df_logs = time_strategies(df_logs)
+                timed("reconstruct", lambda: f_null.writelines(
+                    header.separator.join(row) + "\n"
+                    for row in zip(*[df_logs[c].astype(str).tolist() for c in header.columns])))
+        else:
+            chunk_iter = iter_log_chunks(f_in, chunk_size)
+            while True:
+                item = timed("read", next, chunk_iter, None)
+                if item is None:
+                    break
+                start_line_no, chunk = item
+                if log_type == "eve":
+                    events, logs = timed("parse", parse_eve, chunk, fields, start_line_no)
+                else:
+                    logs, mapping = timed("parse", parse_lines, chunk, log_type, config, start_line_no, fields)
+                df_logs = timed("parse", pd.DataFrame, logs)
+                parsed += len(df_logs)
+                df_logs = time_strategies(df_logs)
+                if log_type == "eve":
+                    timed("reconstruct", lambda: f_null.writelines(rewrite_eve(chunk, events, logs, df_logs, start_line_no)))
+                else:
+                    timed("reconstruct", lambda: f_null.writelines(rewrite_lines(chunk, mapping, df_logs, start_line_no)))
+
+    return dict(seconds), parsed
+
+
+def run_stream(log_type, log_file, chunk_size, output_dir):
+    """Time an end-to-end stream_anonymize run."""
+    from anonymizer.pipeline import stream_anonymize
+
+    config = {"log_file": log_file, "log_type": log_type, "output_log": os.path.join(output_dir, "anonymized.log"),
+              "anonymization": anonymization_for(log_type, ANONYMIZATION)}
+    start = time.perf_counter()
+    _, parsed = stream_anonymize(config, SALT, chunk_size=chunk_size)
+    return {"stream": time.perf_counter() - start}, parsed
+
+
+def run_case(mode, log_type, log_file, lines, chunk_size):
+    """Child process entry point: run one measurement and print its JSON result."""
+    output_dir = os.path.dirname(log_file)
+    if mode == "stages":
+        seconds, parsed = run_stages(log_type, log_file, chunk_size)
+    else:
+        seconds, parsed = run_stream(log_type, log_file, chunk_size, output_dir)
+    stages = {stage: {"seconds": round(value, 6), "lines_per_sec": round(lines / value) if value else None}
+              for stage, value in seconds.items()}
+    print(json.dumps({"parsed": parsed, "peak_rss_mb": round(peak_rss_mb(), 1), "stages": stages}))
+
+
+def measure(mode, log_type, log_file, lines, chunk_size):
+    """Run one measurement in a fresh interpreter so its peak RSS is its own."""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--case", mode, log_type, log_file, str(lines),
+         "--chunk-size", str(chunk_size)],
+        cwd=os.path.dirname(log_file), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{mode} benchmark of {log_type} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def environment():
+    import numpy
+    import pandas
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PACKAGE_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    optional = {}
+    for module in ("orjson", "pyarrow", "zstandard"):
+        try:
+            optional[module] = __import__(module).__version__
+        except ImportError:
+            optional[module] = None
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+            "numpy": numpy.__version__, "pandas": pandas.__version__, "optional": optional, "commit": commit}
+
+
+def regressions(results, baseline, tolerance):
+    """Stages slower than in `baseline` by more than `tolerance` (a fraction)."""
+    previous = {(r["log_type"], r["lines"], stage): values["lines_per_sec"]
+                for r in baseline["results"] for stage, values in r["stages"].items()}
+    slower = []
+    for r in results:
+        for stage, values in r["stages"].items():
+            before = previous.get((r["log_type"], r["lines"], stage))
+            after = values["lines_per_sec"]
+            if before and after and after < before * (1 - tolerance):
+                slower.append(f"{r['log_type']} {r['lines']:,} lines, {stage}: {before:,} -> {after:,} lines/sec")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic logs")
+    parser.add_argument("--log-types", nargs="+", choices=LOG_TYPES, default=list(LOG_TYPES))
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[1_000, 100_000],
+                        help="Line counts, e.g. 1k 100k 10M")
+    parser.add_argument("--hosts", type=int, default=10_000, help="Distinct IP addresses in the synthetic logs")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Lines per chunk")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file for the results")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown against the baseline, as a fraction (default: 0.2)")
+    parser.add_argument("--case", nargs=4, metavar=("MODE", "LOG_TYPE", "LOG_FILE", "LINES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        mode, log_type, log_file, lines = args.case
+        run_case(mode, log_type, log_file, int(lines), args.chunk_size)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="anon_bench_") as tmp:
+        for log_type in args.log_types:
+            for lines in args.sizes:
+                log_file = os.path.join(tmp, f"{log_type}_{lines}.log")
+                write_log(log_file, log_type, lines, args.hosts)
+                stages = measure("stages", log_type, log_file, lines, args.chunk_size)
+                stream = measure("stream", log_type, log_file, lines, args.chunk_size)
+                os.remove(log_file)
+
+                result = {"log_type": log_type, "lines": lines, "hosts": args.hosts, "chunk_size": args.chunk_size,
+                          "parsed": stages["parsed"], "stages": {**stages["stages"], **stream["stages"]},
+                          "peak_rss_mb": {"stages": stages["peak_rss_mb"], "stream": stream["peak_rss_mb"]}}
+                results.append(result)
+                print(f"{log_type:<9} {lines:>11,} lines  stream {result['stages']['stream']['lines_per_sec']:>10,} lines/sec"
+                      f"  parse {result['stages']['parse']['lines_per_sec']:>10,} lines/sec"
+                      f"  peak RSS {stream['peak_rss_mb']:,.0f} MB")
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "environment": environment(),
+              "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Benchmark results saved in {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            slower = regressions(results, json.load(f), args.tolerance)
+        for line in slower:
+            print(f"⚠️ Slower: {line}")
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
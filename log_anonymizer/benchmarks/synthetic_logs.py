@@ -0,0 +1,182 @@
+"""
+Synthetic logs for benchmarks, in the format of every supported log_type.
+
+Addresses are drawn from a fixed pool of `hosts` (internal 10.0.0.0/8 hosts
+plus about 10% external ones) with a Zipf-like skew, source ports are
+ephemeral and destination ports come from a short list of services, so the
+distinct-value counts the strategies see resemble real traffic.
+
+    python benchmarks/synthetic_logs.py suricata 1M suricata_1m.log --hosts 20000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+LOG_TYPES = ("suricata", "custom", "firewall", "pfsense", "syslog", "zeek", "eve")
+SERVICE_PORTS = np.array([443, 80, 53, 22, 123, 8080, 25, 3389, 445, 993, 5353, 1900, 161, 3306, 8443])
+ALERTS = [
+    ("1:2027397:1", "ET INFO Spotify P2P Client", "Not Suspicious Traffic", 3),
+    ("1:2010935:3", "ET SCAN Suspicious inbound to MSSQL port 1433", "Potentially Bad Traffic", 2),
+    ("1:2001219:20", "ET SCAN Potential SSH Scan", "Attempted Information Leak", 2),
+    ("1:2100498:7", "GPL ATTACK_RESPONSE id check returned root", "Potentially Bad Traffic", 1),
+]
+START = 1_742_251_687  # 2025-03-17 22:48:07 UTC
+BLOCK = 100_000  # Lines generated per vectorized block
+
+ZEEK_HEADER = (
+    "#separator \\x09\n#set_separator\t,\n#empty_field\t(empty)\n#unset_field\t-\n#path\tconn\n"
+    "#open\t2025-03-17-22-48-07\n"
+    "#fields\tts\tuid\tid.orig_h\tid.orig_p\tid.resp_h\tid.resp_p\tproto\tservice\tduration\torig_bytes\tresp_bytes\n"
+    "#types\ttime\tstring\taddr\tport\taddr\tport\tenum\tstring\tinterval\tcount\tcount\n"
+)
+ZEEK_TRAILER = "#close\t2025-03-18-00-00-00\n"
+
+
+def address_pool(hosts, rng):
+    """`hosts` distinct IPv4 addresses, ~90% internal, most frequent first."""
+    internal = rng.choice(1 << 24, hosts, replace=False) + (10 << 24)
+    external = rng.integers(1 << 24, 223 << 24, hosts)
+    values = np.where(rng.random(hosts) < 0.9, internal, external)
+    return np.array([f"{v >> 24}.{v >> 16 & 255}.{v >> 8 & 255}.{v & 255}" for v in values.tolist()], dtype=object)
+
+
+def zipf_choice(rng, n, size, exponent=1.1):
+    """Indices into a list of `n` items, item i drawn with weight 1 / (i + 1) ** exponent."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return rng.choice(n, size, p=weights / weights.sum())
+
+
+def generate_lines(log_type, count, hosts=10_000, seed=7):
+    """Yield `count` synthetic lines of `log_type` (plus the header and trailer for zeek)."""
+    if log_type not in LOG_TYPES:
+        raise ValueError(f"Unknown log_type {log_type}; expected one of {', '.join(LOG_TYPES)}")
+    rng = np.random.default_rng(seed)
+    pool = address_pool(hosts, rng)
+
+    if log_type == "zeek":
+        yield ZEEK_HEADER
+    for first in range(0, count, BLOCK):
+        n = min(BLOCK, count - first)
+        ns = (START * 1_000_000 + (first + np.arange(n)) * 1_000 + rng.integers(0, 1_000, n)) * 1_000
+        fields = {
+            "ns": ns,
+            "src_ip": pool[zipf_choice(rng, hosts, n)],
+            "dest_ip": pool[zipf_choice(rng, hosts, n)],
+            "src_port": rng.integers(1024, 65536, n),
+            "dest_port": SERVICE_PORTS[zipf_choice(rng, len(SERVICE_PORTS), n)],
+            "alert": rng.integers(0, len(ALERTS), n),
+            "udp": rng.random(n) < 0.3,
+            "seq": first + np.arange(n),
+        }
+        yield from FORMATTERS[log_type](fields)
+    if log_type == "zeek":
+        yield ZEEK_TRAILER
+
+
+def _datetimes(ns, unit):
+    return np.datetime_as_string(ns.astype("datetime64[ns]"), unit=unit)
+
+
+def _suricata(f):
+    times = [f"{t[5:7]}/{t[8:10]}/{t[:4]}-{t[11:]}" for t in _datetimes(f["ns"], "us")]
+    for t, src, sport, dst, dport, alert, udp in zip(times, f["src_ip"], f["src_port"].tolist(), f["dest_ip"],
+                                                   f["dest_port"].tolist(), f["alert"].tolist(), f["udp"].tolist()):
+        sid, msg, classification, priority = ALERTS[alert]
+        yield (f"{t}  [**] [{sid}] {msg} [**] [Classification: {classification}] [Priority: {priority}] "
+               f"{{{'UDP' if udp else 'TCP'}}} {src}:{sport} -> {dst}:{dport}\n")
+
+
+def _syslog_time(ns):
+    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    return [f"{months[int(t[5:7]) - 1]} {int(t[8:10]):2d} {t[11:19]}" for t in _datetimes(ns, "s")]
+
+
+def _firewall(f):
+    for t, src, sport, dst, dport in zip(_syslog_time(f["ns"]), f["src_ip"], f["src_port"].tolist(),
+                                         f["dest_ip"], f["dest_port"].tolist()):
+        yield f"{t} SRC={src} DST={dst} SPT={sport} DPT={dport}\n"
+
+
+def _pfsense(f):
+    for t, src, sport, dst, dport, udp, seq in zip(_syslog_time(f["ns"]), f["src_ip"], f["src_port"].tolist(),
+                                                   f["dest_ip"], f["dest_port"].tolist(), f["udp"].tolist(),
+                                                   f["seq"].tolist()):
+        action = "block" if seq % 7 == 0 else "pass"
+        proto = "UDP (17)" if udp else "TCP (6)"
+        yield (f"{t} pfsense filterlog: {1000 + seq % 50} rule {seq % 20}/0 (match) {action} in on em0: "
+               f"(proto {proto}) {src}:{sport} > {dst}:{dport}\n")
+
+
+def _syslog(f):
+    for t, src, sport, dst, dport, seq in zip(_datetimes(f["ns"], "ms"), f["src_ip"], f["src_port"].tolist(),
+                                              f["dest_ip"], f["dest_port"].tolist(), f["seq"].tolist()):
+        yield (f"<134>1 {t}Z fw{seq % 8} filterd {1000 + seq % 300} FLOW [meta sequenceId=\"{seq}\"] "
+               f"src_ip={src} src_port={sport} dest_ip={dst} dest_port={dport} action=ALLOW\n")
+
+
+def _zeek(f):
+    seconds = (f["ns"] // 1_000).tolist()
+    for us, src, sport, dst, dport, udp, seq in zip(seconds, f["src_ip"], f["src_port"].tolist(), f["dest_ip"],
+                                                    f["dest_port"].tolist(), f["udp"].tolist(), f["seq"].tolist()):
+        yield (f"{us // 1_000_000}.{us % 1_000_000:06d}\tC{seq:010x}\t{src}\t{sport}\t{dst}\t{dport}\t"
+               f"{'udp' if udp else 'tcp'}\t-\t{seq % 97 / 10:.6f}\t{seq % 1500}\t{seq % 9000}\n")
+
+
+def _eve(f):
+    times = _datetimes(f["ns"], "us")
+    for t, src, sport, dst, dport, udp, seq in zip(times, f["src_ip"], f["src_port"].tolist(), f["dest_ip"],
+                                                   f["dest_port"].tolist(), f["udp"].tolist(), f["seq"].tolist()):
+        event = {"timestamp": f"{t}+0000", "flow_id": seq, "event_type": ("flow", "dns", "http")[seq % 3],
+                 "src_ip": src, "src_port": sport, "dest_ip": dst, "dest_port": dport,
+                 "proto": "UDP" if udp else "TCP"}
+        if seq % 3 == 1:
+            event["dns"] = {"type": "query", "rrname": f"host{seq % 1000}.example.com", "rrtype": "A"}
+        elif seq % 3 == 2:
+            event["http"] = {"hostname": f"host{seq % 1000}.example.com", "url": "/index.html", "status": 200}
+        yield json.dumps(event, separators=(",", ":")) + "\n"
+
+
+FORMATTERS = {
+    "suricata": _suricata,
+    "custom": _suricata,  # config.yaml's custom_format parses the suricata fast.log layout
+    "firewall": _firewall,
+    "pfsense": _pfsense,
+    "syslog": _syslog,
+    "zeek": _zeek,
+    "eve": _eve,
+}
+
+
+def write_log(path, log_type, count, hosts=10_000, seed=7):
+    """Write `count` synthetic lines of `log_type` to `path`."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(generate_lines(log_type, count, hosts, seed))
+
+
+def parse_size(text):
+    """Parse a line count such as 1000, 10k or 10M."""
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    text = str(text).strip().lower()
+    if text[-1:] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic log")
+    parser.add_argument("log_type", choices=LOG_TYPES)
+    parser.add_argument("lines", type=parse_size, help="Number of lines, e.g. 1000, 10k or 10M")
+    parser.add_argument("output", help="File to write")
+    parser.add_argument("--hosts", type=int, default=10_000, help="Distinct IP addresses")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    write_log(args.output, args.log_type, args.lines, args.hosts, args.seed)
+    print(f"✅ Wrote {args.lines:,} {args.log_type} lines to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
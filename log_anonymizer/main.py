@@ -1,20 +1,16 @@
 import argparse
-import yaml
-import pandas as pd
-from anonymizer.log_parser import parse_logs
-from anonymizer.log_reconstructor import replace_anonymized_values
-from anonymizer.ip_anonymizer import anonymize_ip_column
-from anonymizer.port_anonymizer import anonymize_port_column
-from anonymizer.timestamp_anonymizer import round_to_nearest_15_minutes_column
-from anonymizer.timestamp_anonymizer import perturb_time_column, bucketize_dates_column, order_preserving_adaptive_noise
-from anonymizer.ipmask import generalize_ip
-from anonymizer.differential import add_noise
-from anonymizer.paper_imple import anonymize_ip_addresses
-from anonymizer.convert_to_ocsf import convert_to_ocsf
+import cProfile
+# Only light modules before the arguments are parsed: pandas, yaml and the
+# strategies are imported by the code that needs them, so --help, usage
+# errors and short runs do not pay for what they do not use.
+from anonymizer.defaults import DEFAULT_CHUNK_SIZE, DEFAULT_FLUSH_INTERVAL, DEFAULT_BATCH_SIZE, DEFAULT_BATCH_DELAY
+from anonymizer.metrics import METRICS, METRICS_FORMATS, DEFAULT_METRICS_INTERVAL
 import os
+import time
 
 def load_config(config_path):
     """Load anonymization settings from a YAML config file."""
+    import yaml
     with open(config_path, "r") as file:
         return yaml.safe_load(file)
 
@@ -22,102 +18,150 @@ def main():
     SALT = os.urandom(16)
     parser = argparse.ArgumentParser(description="Log Anonymization Tool")
     parser.add_argument("--config", required=True, help="Path to YAML config file")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read the log once in chunks and write anonymized lines directly to output_log")
+    parser.add_argument("--chunk-size", type=int,
+                        help=f"Lines per chunk in streaming mode (default: {DEFAULT_CHUNK_SIZE}; "
+                             f"{DEFAULT_BATCH_SIZE} messages per batch with --listen)")
+    parser.add_argument("--keep-intermediates", action="store_true",
+                        help="Also write the temp/mapping/anonymized CSVs in streaming mode (debug/audit)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Anonymize newline-aligned shards of the log in N processes")
+    parser.add_argument("--follow", action="store_true",
+                        help="Keep tailing log_file and append anonymized lines to output_log until interrupted")
+    parser.add_argument("--flush-interval", type=float,
+                        help=f"Seconds new lines may wait before being anonymized and flushed in follow mode "
+                             f"(default: {DEFAULT_FLUSH_INTERVAL}; {DEFAULT_BATCH_DELAY} with --listen)")
+    parser.add_argument("--checkpoint", help="Offset checkpoint for follow mode (default: <output_log>.checkpoint)")
+    parser.add_argument("--listen", action="append", metavar="URL",
+                        help="Receive syslog messages on udp://host:port or tcp://host:port (repeatable) "
+                             "and anonymize them in flight until interrupted")
+    parser.add_argument("--forward", metavar="URL_OR_PATH",
+                        help="Where --listen sends anonymized messages: udp://host:port, tcp://host:port "
+                             "or a file (default: output_log)")
+    parser.add_argument("--vault", help="Directory holding a persistent key and mapping cache, for pseudonyms that stay the same across runs")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Write stage timings, row and distinct-value counts, cache hit rates and peak memory "
+                             "to PATH at the end of the run")
+    parser.add_argument("--metrics-format", choices=METRICS_FORMATS,
+                        help="Format of --metrics (default: prometheus for .prom/.txt files, json otherwise)")
+    parser.add_argument("--metrics-interval", type=float, default=DEFAULT_METRICS_INTERVAL,
+                        help=f"Seconds between metrics writes during long runs (default: {DEFAULT_METRICS_INTERVAL:g})")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="Run under cProfile and dump the stats to PATH (read them with python -m pstats PATH)")
     args = parser.parse_args()
+    if args.keep_intermediates and args.workers > 1:
+        parser.error("--keep-intermediates is not supported with --workers; run with a single worker to keep them")
+
+    from anonymizer.plan import compile_plan
+    from anonymizer.vault import open_vault
 
     # Load configuration
     config = load_config(args.config)
-
+    if args.vault:
+        config["vault"] = {**(config.get("vault") or {}), "path": args.vault}
+
+    # Fail on an unknown strategy or parameter before any output is written
+    try:
+        compile_plan(config["log_type"], config.get("anonymization", {}))
+    except ValueError as e:
+        parser.error(str(e))
+
+    # A vault supplies a fixed key instead of the per-run random salt
+    vault = open_vault(config)
+    if (args.follow or args.listen) and vault is None:
+        parser.error("--follow and --listen need --vault (or vault: in the config) so pseudonyms survive restarts")
+    if vault is not None:
+        SALT = vault.salt
+    if args.metrics:
+        METRICS.configure(args.metrics, args.metrics_format, args.metrics_interval)
+    profiler = cProfile.Profile() if args.profile else None
+    try:
+        if profiler is not None:
+            profiler.enable()
+        run(args, config, SALT, vault)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"✅ Profile saved in {args.profile}")
+        if args.metrics:
+            METRICS.write(vault)
+            print(f"✅ Metrics saved in {args.metrics}")
+        if vault is not None:
+            if vault.hits + vault.misses:
+                print(f"✅ Vault {vault.path}: {vault.hits} cached, {vault.misses} new mappings")
+            vault.close()
+
+def run(args, config, SALT, vault):
+    """Run the selected pipeline mode."""
+    from anonymizer.log_parser import parse_logs
+    from anonymizer.log_reconstructor import replace_anonymized_values
+    from anonymizer.convert_to_ocsf import convert_to_ocsf, ocsf_settings
+    from anonymizer.pipeline import anonymize_dataframe, stream_anonymize, parallel_anonymize, follow_anonymize
+    from anonymizer.pipeline import receive_anonymize, anonymized_fields
+
+    if args.listen:  # Messages come from the network, not from log_file
+        receive_anonymize(config, SALT, args.listen, forward=args.forward,
+                          chunk_size=args.chunk_size or DEFAULT_BATCH_SIZE,
+                          flush_interval=DEFAULT_BATCH_DELAY if args.flush_interval is None else args.flush_interval,
+                          vault=vault)
+        return
+
+    chunk_size = args.chunk_size or DEFAULT_CHUNK_SIZE
     log_file = config["log_file"]
     log_type = config["log_type"]
     output_log = config["output_log"]
     anonymization = config.get("anonymization", {})
 
     temp_csv = "temp_logs.csv"
-    mapping_file = "log_mapping.csv"
+    mapping_file = "log_mapping.map"  # Binary sidecar; use a .csv name for the text layout
     anonymized_csv = "anonymized_logs.csv"
 
+    if args.follow:
+        follow_anonymize(config, SALT, chunk_size=chunk_size,
+                         flush_interval=DEFAULT_FLUSH_INTERVAL if args.flush_interval is None else args.flush_interval,
+                         checkpoint_file=args.checkpoint or output_log + ".checkpoint", vault=vault)
+        return
+
+    if args.workers > 1:
+        parallel_anonymize(config, SALT, args.workers, chunk_size=chunk_size)
+        return
+
+    if args.stream or log_type in ("zeek", "eve"):  # Zeek TSV and EVE JSON are always streamed and rewritten from columns
+        stream_anonymize(config, SALT, chunk_size=chunk_size,
+                         keep_intermediates=args.keep_intermediates,
+                         temp_csv=temp_csv, mapping_file=mapping_file,
+                         anonymized_csv=anonymized_csv, vault=vault)
+        return
+
     # Step 1: Parse logs
+    start = time.perf_counter()
     df_logs, df_mapping = parse_logs(log_file, log_type, temp_csv, mapping_file,config)
-    
-    ocsffile = "ocsf_logs.json"
-    # Convert to OCSF format
-    convert_to_ocsf(df_logs, log_type, ocsffile)
-
-    if log_type == "custom":
-        custom_format = anonymization.get("custom_format", {})
-        fields = custom_format.get("fields", [])  # Directly use the list
-
-        for field in fields:
-            if field in df_logs.columns and field in custom_format:
-                strategy = custom_format[field]
-
-                if strategy == "salt":
-                    if "ip" in field:
-                        df_logs[field] = anonymize_ip_column(df_logs[field], SALT)
-                    else:
-                        df_logs[field] = anonymize_port_column(df_logs[field], SALT)  # or another general salt-based strategy
-
-                elif strategy == "mask" and "ip" in field:
-                    df_logs[field] = generalize_ip(df_logs[field], 24)
-
-                elif strategy == "condensation" and "ip" in field:
-                    df_logs[field] = anonymize_ip_addresses(df_logs[field], 5)
-
-                elif strategy == "differential":
-                    df_logs[field] = add_noise(df_logs[field], epsilon=1.0)
-
-                elif strategy == "adaptive" and "timestamp" in field:
-                    df_logs[field] = order_preserving_adaptive_noise(df_logs[field], apply_global_offset=True)
-
-                elif strategy == "perturb" and "timestamp" in field:
-                    df_logs[field] = perturb_time_column(df_logs[field], window_minutes=5)
-
-                elif strategy == "round" and "timestamp" in field:
-                    df_logs[field] = round_to_nearest_15_minutes_column(df_logs[field])
-
-
-    else:
-
-        # Step 2: Apply anonymization methods based on config
-        if "timestamp" in anonymization:
-            if anonymization["timestamp"] == "round":
-                df_logs["timestamp"] = round_to_nearest_15_minutes_column(df_logs["timestamp"])
-            if anonymization["timestamp"] == "perturb":
-                df_logs["timestamp"] = perturb_time_column(df_logs["timestamp"], window_minutes=5)
-            if anonymization["timestamp"] == "bucketize":
-                df_logs["timestamp"] = bucketize_dates_column(df_logs["timestamp"], resolution="day")
-            if anonymization["timestamp"] == "adaptive":
-                df_logs["timestamp"] = order_preserving_adaptive_noise(df_logs["timestamp"], apply_global_offset=True)
-            
-
-        if "ip" in anonymization:
-            if anonymization["ip"] == "salt":
-                df_logs["src_ip"] = anonymize_ip_column(df_logs["src_ip"],SALT)
-                df_logs["dest_ip"] = anonymize_ip_column(df_logs["dest_ip"],SALT)
-            if anonymization["ip"] == "mask":
-                df_logs["src_ip"] = generalize_ip(df_logs["src_ip"], 24)
-                df_logs["dest_ip"] = generalize_ip(df_logs["dest_ip"], 24)
-            if anonymization["ip"] == "condensation" :
-                df_logs["src_ip"] = anonymize_ip_addresses(df_logs["src_ip"], 5)
-                df_logs["dest_ip"] = anonymize_ip_addresses(df_logs["dest_ip"], 5)
-
-            
-        if "port" in anonymization:
-            if anonymization["port"] == "salt":
-                df_logs["src_port"] = anonymize_port_column(df_logs["src_port"], SALT)
-                df_logs["dest_port"] = anonymize_port_column(df_logs["dest_port"], SALT)
-        
-        if "data" in anonymization:
-            if anonymization["data"] == "differential":
-                df_logs["data"] = add_noise(df_logs["data"], epsilon=1.0)
-        
+    METRICS.add_stage("parse", time.perf_counter() - start, len(df_logs))
+    METRICS.count("lines_parsed", len(df_logs))
+    METRICS.observe(df_logs, anonymized_fields(log_type, anonymization))
+
+    # Step 2: Apply anonymization methods based on config
+    with METRICS.stage("anonymize", len(df_logs)):
+        df_logs = anonymize_dataframe(df_logs, log_type, anonymization, SALT, vault)
 
     # Save anonymized CSV
-    df_logs.to_csv(anonymized_csv, index=False)
+    with METRICS.stage("intermediates", len(df_logs)):
+        df_logs.to_csv(anonymized_csv, index=False)
     print(f"✅ Anonymized logs saved in {anonymized_csv}")
 
+    # Optional: export the anonymized records as OCSF, so the export never holds raw identifiers
+    ocsf = ocsf_settings(config)
+    if ocsf is not None:
+        ts_format = (anonymization.get("custom_format", {}) if log_type == "custom" else anonymization).get("timestamp_format")
+        with METRICS.stage("ocsf", len(df_logs)):
+            convert_to_ocsf(df_logs, log_type, ocsf["output"], ocsf["batch_size"], ts_format)
+
     # Step 3: Replace anonymized values back into logs
-    replace_anonymized_values(mapping_file, anonymized_csv, log_file, output_log)
+    with METRICS.stage("reconstruct", len(df_logs)):
+        replace_anonymized_values(mapping_file, anonymized_csv, log_file, output_log,
+                                  config.get("input_compression"), config.get("output_compression"))
 
 if __name__ == "__main__":
     main()
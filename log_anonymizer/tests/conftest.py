@@ -0,0 +1,56 @@
+import os
+import sys
+
+import pytest
+
+# The package is imported as `anonymizer` from the log_anonymizer directory
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE_DIR)
+
+SAMPLE_LOG = os.path.join(PACKAGE_DIR, "suricata_logs.txt")
+
+
+@pytest.fixture
+def package_dir():
+    """The log_anonymizer directory, where main.py is run from."""
+    return PACKAGE_DIR
+
+
+@pytest.fixture
+def salt():
+    return b"0123456789abcdef"
+
+
+@pytest.fixture
+def anonymization():
+    """Salted IPs and ports and rounded timestamps, the config most pipeline tests run."""
+    return {"ip": "salt", "port": "salt", "timestamp": "round"}
+
+
+@pytest.fixture
+def sample_lines():
+    """Return a reader of the first `count` lines of the bundled Suricata log."""
+    def read(count=40):
+        with open(SAMPLE_LOG) as f:
+            return f.readlines()[:count]
+    return read
+
+
+@pytest.fixture
+def make_config(tmp_path, anonymization):
+    """
+    Return a factory that writes `lines` to `log_name` under tmp_path and returns a config reading it.
+
+    The config is a suricata one with the `anonymization` fixture unless
+    `log_type` or `anonymization` are given; a compression extension on
+    `log_name` compresses the log.
+    """
+    from anonymizer.io_utils import open_log
+
+    def make(lines, log_name="input.log", output_name="output.log", log_type="suricata", anonymization=anonymization):
+        log_file = str(tmp_path / log_name)
+        with open_log(log_file, "w") as f:
+            f.writelines(lines)
+        return {"log_file": log_file, "log_type": log_type, "output_log": str(tmp_path / output_name),
+                "anonymization": anonymization}
+    return make
@@ -0,0 +1,73 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+import yaml
+
+from anonymizer.eve import parse_eve
+from anonymizer.log_parser import parse_lines, read_zeek
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PACKAGE_DIR, "benchmarks"))
+
+from synthetic_logs import LOG_TYPES, generate_lines, parse_size  # noqa: E402
+
+
+@pytest.mark.parametrize("log_type", LOG_TYPES)
+def test_every_synthetic_line_parses(log_type):
+    lines = list(generate_lines(log_type, 300, hosts=50))
+    if log_type == "zeek":
+        _, chunks = read_zeek(io.StringIO("".join(lines)), 100)
+        assert sum(len(chunk) for chunk in chunks) == 300
+        return
+    if log_type == "eve":
+        events, _ = parse_eve(lines, ["src_ip"])
+        assert len(events) == 300
+        return
+    config = None
+    if log_type == "custom":
+        with open(os.path.join(PACKAGE_DIR, "config.yaml")) as f:
+            config = yaml.safe_load(f)
+    logs, _ = parse_lines(lines, log_type, config)
+    df_logs = pd.DataFrame(logs)
+    assert len(df_logs) == 300
+    assert df_logs["src_ip"].nunique() <= 50
+
+
+def test_parse_size():
+    assert [parse_size(s) for s in ("1000", "10k", "1.5M", "10M")] == [1_000, 10_000, 1_500_000, 10_000_000]
+
+
+def test_suite_writes_machine_readable_results(tmp_path):
+    output = tmp_path / "results.json"
+    result = subprocess.run([sys.executable, "benchmarks/bench_suite.py", "--log-types", "firewall",
+                             "--sizes", "200", "--output", str(output)],
+                            cwd=PACKAGE_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(output.read_text())
+    (case,) = report["results"]
+    assert case["log_type"] == "firewall" and case["parsed"] == 200
+    assert {"parse", "anonymize.ip.salt", "anonymize.timestamp.round", "reconstruct", "stream"} <= set(case["stages"])
+    assert case["peak_rss_mb"]["stream"] > 0
+
+    rerun = subprocess.run([sys.executable, "benchmarks/bench_suite.py", "--log-types", "firewall", "--sizes", "200",
+                            "--output", str(tmp_path / "again.json"), "--baseline", str(output), "--tolerance", "-1"],
+                           cwd=PACKAGE_DIR, capture_output=True, text=True)
+    assert rerun.returncode == 1 and "Slower" in rerun.stdout
+
+
+def test_startup_imports_only_what_the_config_selects(tmp_path):
+    output = tmp_path / "startup.json"
+    result = subprocess.run([sys.executable, "benchmarks/bench_startup.py", "--cases", "help", "salt_round",
+                             "--repeat", "1", "--output", str(output)],
+                            cwd=PACKAGE_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    help_run, salt_round = json.loads(output.read_text())["results"]
+    assert not {"pandas", "yaml"} & set(help_run["modules"])
+    assert "pandas" in salt_round["modules"]
+    assert not {"anonymizer.paper_imple", "pyarrow"} & set(salt_round["modules"])
+    assert help_run["forbidden"] == salt_round["forbidden"] == []
@@ -0,0 +1,77 @@
+import ipaddress
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from anonymizer.condensation import condensation_groups, condense
+from anonymizer.nonip_diff_priv import non_ip_diff_privacy
+from anonymizer.paper_imple import anonymize_ip_addresses
+
+
+def group_sizes(counts, starts):
+    return np.add.reduceat(np.asarray(counts), starts).tolist()
+
+
+@pytest.mark.parametrize("counts, k, expected", [
+    ([1] * 10, 3, [0, 3, 6]),         # The last run of one joins the group before it
+    ([1] * 9, 3, [0, 3, 6]),
+    ([9] + [1] * 9, 5, [0, 2]),       # A frequent value fills a group; the short runs around the next one merge back
+    ([9, 1, 1, 1, 1], 5, [0]),
+    ([2, 9, 1], 5, [0]),              # The run after it is too small and merges back
+    ([1, 1], 5, [0]),                 # Fewer than k records in total
+    ([], 5, []),
+])
+def test_groups_are_contiguous_and_hold_at_least_k_records(counts, k, expected):
+    starts = condensation_groups(counts, k)
+    assert starts.tolist() == expected
+    if len(counts) >= 1 and sum(counts) >= k:
+        assert min(group_sizes(counts, starts)) >= k
+
+
+def test_condense_uses_weighted_group_means_and_is_seeded():
+    values = np.array([4.0, 1.0, 2.0, 100.0, 101.0, 1.0, 102.0])
+    exact = condense(values, 3, epsilon=1e12, rng=np.random.default_rng(0))
+    # Sorted: [1, 1, 2 | 4, 100, 101, 102]; the trailing run of one joins the second group
+    assert np.allclose(exact, [76.75, 4 / 3, 4 / 3, 76.75, 76.75, 4 / 3, 76.75])
+
+    first = condense(values, 3, rng=np.random.default_rng(7))
+    assert np.array_equal(first, condense(values, 3, rng=np.random.default_rng(7)))
+    assert not np.allclose(first, exact)
+
+
+def test_ip_condensation_hides_every_host_among_k_records(salt):
+    rng = np.random.default_rng(1)
+    ips = [f"10.0.{rng.integers(4)}.{rng.integers(256)}" for _ in range(2_000)]
+    anonymized = anonymize_ip_addresses(ips, 5, epsilon=1e12, seed=3, key=salt)
+
+    hosts = Counter(int(ip.rsplit(".", 1)[1]) for ip in anonymized)
+    assert min(hosts.values()) >= 5
+    # Addresses sharing a /24 still share one after anonymization
+    networks = {ip.rsplit(".", 1)[0]: a.rsplit(".", 1)[0] for ip, a in zip(ips, anonymized)}
+    assert len(set(networks.values())) == len(networks) == 4
+
+
+def test_ip_condensation_is_reproducible_with_a_seed(salt):
+    ips = ["192.168.1.1", "192.168.1.7", "2001:db8::1", "2001:db8::2", "10.0.0.3", "::5"]
+    assert anonymize_ip_addresses(ips, 2, seed=5, key=salt) == anonymize_ip_addresses(ips, 2, seed=5, key=salt)
+    assert ipaddress.ip_address(anonymize_ip_addresses(ips, 2, seed=5, key=salt)[-1]).version == 6
+
+
+def test_numeric_condensation_keeps_index_and_non_numbers():
+    column = pd.Series([10, "n/a", 12, 11, None, 1000, 1001, 1002], index=list("abcdefgh"), name="bytes")
+    result = non_ip_diff_privacy(column, k=3, epsilon=1e12, seed=0)
+
+    assert result.index.equals(column.index) and result.name == "bytes"
+    assert result["b"] == "n/a" and result["e"] is None
+    assert np.allclose(result[["a", "c", "d"]].astype(float), 11.0)
+    assert np.allclose(result[["f", "g", "h"]].astype(float), 1001.0)
+
+
+def test_numeric_condensation_is_reproducible_with_a_seed():
+    column = pd.Series(np.arange(1_000, dtype=float))
+    first = non_ip_diff_privacy(column, k=10, seed=42)
+    assert first.equals(non_ip_diff_privacy(column, k=10, seed=42))
+    assert not first.equals(non_ip_diff_privacy(column, k=10, seed=43))
+    assert abs(first.mean() - column.mean()) < 1
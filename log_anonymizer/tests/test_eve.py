@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from anonymizer.eve import eve_paths, parse_eve
+from anonymizer.pipeline import _anonymize_lines, parallel_anonymize, stream_anonymize
+
+SALT = b"0123456789abcdef"
+ANONYMIZATION = {"ip": "salt", "port": "salt", "timestamp": "round",
+                 "eve_paths": {"http.hostname": "mask", "dns.rrname": "mask"}}
+
+ALERT = ('{"timestamp":"2025-03-17T22:48:07.698063+0000","flow_id":1,"event_type":"alert",'
+         '"src_ip":"10.0.0.5","src_port":51234,"dest_ip":"2001:db8::1","dest_port":443,"proto":"TCP",'
+         '"http":{"hostname":"intranet.example.com","url":"\\/login"}}\n')
+DNS = ('{"timestamp":"2025-03-17T22:49:08.000001+0000","event_type":"dns","src_ip":"10.0.0.6",'
+       '"src_port":53,"dest_ip":"8.8.8.8","dest_port":53,"dns":{"rrname":"example.org","type":"query"}}\n')
+STATS = '{"event_type":"stats",  "stats":{"uptime":5}}\n'
+
+
+def test_eve_paths_follow_the_configured_kinds():
+    assert eve_paths({"ip": "salt"}) == {"src_ip": "ip", "dest_ip": "ip"}
+    paths = eve_paths({"ip": "salt", "port": "salt", "eve_paths": {"dest_port": None, "dns.rrname": "mask"}})
+    assert paths == {"src_ip": "ip", "dest_ip": "ip", "src_port": "port", "dns.rrname": "mask"}
+    with pytest.raises(ValueError, match="hostname"):
+        eve_paths({"eve_paths": {"http.hostname": "hash"}})
+
+
+def test_parse_eve_keeps_only_events_with_targeted_values():
+    events, logs = parse_eve([ALERT, STATS, "not json\n", "[1, 2]\n", DNS], ["src_port", "http.hostname"], 10)
+    assert logs == {"src_port": [51234, 53], "http.hostname": ["intranet.example.com", None], "line_no": [10, 14]}
+    assert [event["event_type"] for event in events] == ["alert", "dns"]
+
+
+def test_events_are_anonymized_and_untargeted_lines_kept_byte_for_byte():
+    lines = [ALERT, STATS, "not json\n", DNS]
+    out = _anonymize_lines(lines, {"log_type": "eve", "anonymization": ANONYMIZATION}, SALT)
+
+    assert out[1:3] == [STATS, "not json\n"]
+    alert, dns = json.loads(out[0]), json.loads(out[3])
+    assert alert["timestamp"] == "2025-03-17T22:45:00.000000+0000"
+    assert alert["src_ip"] != "10.0.0.5" and ":" in alert["dest_ip"]
+    assert isinstance(alert["src_port"], int) and alert["src_port"] != 51234
+    assert alert["http"] == {"hostname": "intXXXXXXXXXXXXXXXXX", "url": "/login"}
+    assert dns["dns"]["rrname"] == "exaXXXXXXXX"
+    assert dns["src_port"] == dns["dest_port"]  # One keyed mapping for every port field
+    assert list(alert) == list(json.loads(ALERT))  # Key order survives re-encoding
+
+
+def test_events_without_a_change_are_not_re_encoded():
+    unchanged = '{"event_type": "flow", "src_ip": "not-an-ip"}\n'
+    out = _anonymize_lines([unchanged], {"log_type": "eve", "anonymization": {"ip": "salt"}}, SALT)
+    assert out == [unchanged]
+
+
+def test_eve_streams_and_shards_the_same(tmp_path):
+    log_file = tmp_path / "eve.json"
+    log_file.write_text((ALERT + STATS + DNS) * 200)
+    config = {"log_file": str(log_file), "log_type": "eve", "anonymization": ANONYMIZATION}
+
+    assert stream_anonymize({**config, "output_log": str(tmp_path / "stream.json")}, SALT, chunk_size=64) == (600, 400)
+    parallel_anonymize({**config, "output_log": str(tmp_path / "parallel.json")}, SALT, workers=3, chunk_size=64)
+    assert (tmp_path / "stream.json").read_text() == (tmp_path / "parallel.json").read_text()
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from anonymizer.factorize import ValueCache, map_unique
+from anonymizer.ipmask import generalize_ip
+from anonymizer.masking import mask_data
+from anonymizer.metrics import METRICS
+from anonymizer.pipeline import stream_anonymize
+from anonymizer.timestamp_anonymizer import round_to_nearest_15_minutes_column
+from anonymizer.urlgeneral import generalize_url
+
+SALT = b"0123456789abcdef"
+
+
+def test_transform_sees_each_distinct_value_once():
+    calls = []
+
+    def upper(values):
+        calls.append(list(values))
+        return [value.upper() for value in values]
+
+    column = pd.Series(["a", "b", None, "a", "b"], index=[10, 11, 12, 13, 14], name="alert")
+    result = map_unique(column, upper)
+    assert calls == [["a", "b"]]
+    assert result.tolist()[:2] == ["A", "B"] and result.tolist()[3:] == ["A", "B"]
+    assert np.isnan(result[12])
+    assert list(result.index) == [10, 11, 12, 13, 14] and result.name == "alert"
+
+
+def test_value_cache_persists_across_calls_and_evicts_least_recent():
+    cache = ValueCache(maxsize=2)
+    calls = []
+
+    def double(values):
+        calls.append(list(values))
+        return [value * 2 for value in values]
+
+    assert map_unique(pd.Series([1, 2, 1]), double, cache).tolist() == [2, 4, 2]
+    assert map_unique(pd.Series([2, 3]), double, cache).tolist() == [4, 6]
+    assert calls == [[1, 2], [3]]
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert list(cache.entries) == [2, 3]  # 1 was the least recently used
+
+
+def test_deterministic_strategies_keep_their_results():
+    ips = pd.Series(["192.168.1.10", "192.168.1.10", "not-an-ip", None])
+    assert generalize_ip(ips, 24).tolist()[:3] == ["192.168.1.0/24", "192.168.1.0/24", "INVALID_IP"]
+    assert mask_data(pd.Series(["secret", "ab", "secret"])).tolist() == ["secXXX", "ab", "secXXX"]
+    assert generalize_url(pd.Series(["https://example.com/a/b?q=1", "https://example.com/a/b?q=1"])).tolist() == [
+        "https://example.com/a"] * 2
+    times = pd.Series(["Mar 17 22:48:07", "Mar 17 22:48:07", "Mar  7 23:59:59", "garbage"])
+    assert round_to_nearest_15_minutes_column(times, log_type="firewall").tolist() == [
+        "Mar 17 22:45:00", "Mar 17 22:45:00", "Mar  7 23:45:00", "garbage"]
+
+
+def test_value_cache_spans_chunks_in_streaming_mode(tmp_path):
+    lines = [f"Mar 17 22:48:0{i % 3} SRC=10.0.0.{i % 4} DST=10.0.0.{(i + 1) % 4} SPT=5000{i % 2} DPT=443\n"
+             for i in range(40)]
+    (tmp_path / "in.log").write_text("".join(lines))
+    config = {"log_file": str(tmp_path / "in.log"), "log_type": "firewall",
+              "anonymization": {"ip": "mask", "port": "salt", "timestamp": "round"}}
+
+    stream_anonymize({**config, "output_log": str(tmp_path / "plain.log")}, SALT, chunk_size=8)
+    METRICS.reset()
+    cached = {**config, "anonymization": {**config["anonymization"], "value_cache": 100}}
+    stream_anonymize({**cached, "output_log": str(tmp_path / "cached.log")}, SALT, chunk_size=8)
+
+    assert (tmp_path / "cached.log").read_text() == (tmp_path / "plain.log").read_text()
+    caches = METRICS.snapshot()["caches"]
+    METRICS.reset()
+    assert caches["values.ip.mask"]["misses"] == 4  # Four distinct addresses over five chunks
+    assert caches["values.ip.mask"]["hits"] == 4 * 4
+    assert caches["values.timestamp.round"]["misses"] == 3
@@ -0,0 +1,131 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from anonymizer.pipeline import follow_anonymize
+from anonymizer.tail import LogFollower
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SURICATA_LINE = (
+    "03/17/2025-22:48:{second:02d}.698063  [**] [1:2027397:1] ET INFO Spotify P2P Client [**] "
+    "[Classification: Not Suspicious Traffic] [Priority: 3] {{UDP}} 10.22.65.{host}:57621 -> 10.22.67.255:57621\n"
+)
+
+FOLLOW_SCRIPT = """
+import sys
+from anonymizer.metrics import METRICS
+from anonymizer.pipeline import follow_anonymize
+from anonymizer.vault import KeyVault
+config = {"log_file": sys.argv[1], "log_type": "suricata", "output_log": sys.argv[2],
+          "anonymization": {"ip": "salt", "port": "salt", "value_cache": 1000}}
+METRICS.configure(sys.argv[5], interval=0)
+with KeyVault(sys.argv[3]) as vault:
+    follow_anonymize(config, vault.salt, flush_interval=0.1, checkpoint_file=sys.argv[4],
+                     vault=vault, poll_interval=0.05)
+"""
+
+
+def write_lines(path, start, count, mode="a"):
+    with open(path, mode) as f:
+        for i in range(start, start + count):
+            f.write(SURICATA_LINE.format(second=i % 60, host=i % 250))
+
+
+def wait_for_lines(path, expected, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if os.path.exists(path):
+            with open(path) as f:
+                if sum(1 for _ in f) >= expected:
+                    return
+        time.sleep(0.1)
+    raise AssertionError(f"{path} did not reach {expected} lines")
+
+
+def start_follower(tmp_path):
+    paths = [str(tmp_path / name) for name in ("live.log", "out.log", "vault", "out.checkpoint", "metrics.json")]
+    return subprocess.Popen([sys.executable, "-c", FOLLOW_SCRIPT, *paths], cwd=PACKAGE_DIR,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+
+def stop_follower(process):
+    process.send_signal(signal.SIGTERM)
+    output, _ = process.communicate(timeout=60)
+    assert process.returncode == 0, output
+    return output
+
+
+def test_follow_writes_each_line_once_and_resumes_from_checkpoint(tmp_path):
+    log_file, out_file = tmp_path / "live.log", tmp_path / "out.log"
+    write_lines(log_file, 0, 13, mode="w")
+
+    process = start_follower(tmp_path)
+    wait_for_lines(out_file, 13)
+    write_lines(log_file, 13, 7)
+    wait_for_lines(out_file, 20)
+    output = stop_follower(process)
+
+    assert "Stopped following" in output
+    assert len(out_file.read_text().splitlines()) == 20
+    checkpoint = json.loads((tmp_path / "out.checkpoint").read_text())
+    assert checkpoint["offset"] == os.path.getsize(log_file)
+
+    # A restart picks up only the lines appended while it was down
+    write_lines(log_file, 20, 5)
+    process = start_follower(tmp_path)
+    wait_for_lines(out_file, 25)
+    stop_follower(process)
+
+    out_lines = out_file.read_text().splitlines()
+    assert len(out_lines) == 25
+    assert "10.22.65." not in "".join(out_lines)
+
+
+def test_value_caches_span_follow_batches(tmp_path):
+    log_file, out_file = tmp_path / "live.log", tmp_path / "out.log"
+    write_lines(log_file, 0, 10, mode="w")
+
+    process = start_follower(tmp_path)
+    wait_for_lines(out_file, 10)
+    write_lines(log_file, 0, 10)  # The same hosts and ports again, in a later batch
+    wait_for_lines(out_file, 20)
+    stop_follower(process)
+
+    caches = json.loads((tmp_path / "metrics.json").read_text())["caches"]
+    assert caches["values.port.salt"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+    assert caches["values.ip.salt"]["hits"] == 11 and caches["values.ip.salt"]["misses"] == 11
+
+
+def test_follow_requires_a_vault(tmp_path):
+    config = {"log_file": str(tmp_path / "live.log"), "log_type": "suricata",
+              "output_log": str(tmp_path / "out.log"), "anonymization": {}}
+    with pytest.raises(ValueError, match="vault"):
+        follow_anonymize(config, b"0" * 16)
+
+
+def test_follower_handles_partial_lines_rotation_and_truncation(tmp_path):
+    path = tmp_path / "live.log"
+    path.write_text("a\nb")
+    follower = LogFollower(str(path))
+
+    assert follower.read_lines(10) == ["a\n"]  # "b" is still being written
+    with open(path, "a") as f:
+        f.write("\n")
+    assert follower.read_lines(10) == ["b\n"]
+
+    os.rename(path, tmp_path / "live.log.1")
+    path.write_text("c\n")
+    assert follower.read_lines(10) == []  # Switches to the new file
+    assert follower.read_lines(10) == ["c\n"]
+
+    path.write_text("")
+    assert follower.read_lines(10) == []  # Truncated: rewinds
+    path.write_text("d\n")
+    assert follower.read_lines(10) == ["d\n"]
+    follower.close()
@@ -0,0 +1,59 @@
+import pytest
+
+from anonymizer.io_utils import detect_compression, open_log
+from anonymizer.pipeline import parallel_anonymize, stream_anonymize
+
+SAMPLE = "".join(f"line {i} héllo\n" for i in range(1000))
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("a.log", "none"), ("a.log.gz", "gzip"), ("a.LOG.BZ2", "bz2"), ("a.xz", "xz"), ("a.zst", "zstd"),
+])
+def test_compression_follows_the_extension(name, expected):
+    assert detect_compression(name) == expected
+    assert detect_compression(name, "auto") == expected
+    assert detect_compression(name, "gzip") == "gzip"
+
+
+def test_unknown_compression_is_rejected():
+    with pytest.raises(ValueError):
+        detect_compression("a.log", "lz4")
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".bz2", ".xz", ".log"])
+def test_text_round_trip(tmp_path, suffix):
+    path = str(tmp_path / f"sample{suffix}")
+    with open_log(path, "w") as f:
+        f.write(SAMPLE)
+    with open_log(path, "r") as f:
+        assert f.read() == SAMPLE
+    with open(path, "rb") as f:
+        assert (f.read() == SAMPLE.encode()) == (suffix == ".log")
+
+
+def test_compression_setting_overrides_the_extension(tmp_path):
+    path = str(tmp_path / "sample.log")
+    with open_log(path, "wb", "gzip") as f:
+        f.write(SAMPLE.encode())
+    with open(path, "rb") as f:
+        assert f.read(2) == b"\x1f\x8b"
+    with open_log(path, "rb", "gzip") as f:
+        assert f.read() == SAMPLE.encode()
+
+
+def test_stream_reads_and_writes_compressed_logs(tmp_path, salt, make_config):
+    line = ("03/17/2025-22:48:07.698063  [**] [1:2027397:1] ET INFO Spotify P2P Client [**] "
+            "[Classification: Not Suspicious Traffic] [Priority: 3] {UDP} 10.22.65.178:57621 -> 10.22.67.255:57621\n")
+    plain = make_config([line] * 20, "plain.log", "plain_out.log")
+    packed = make_config([line] * 20, "packed.log.gz", "packed_out.log.bz2")
+
+    stream_anonymize(plain, salt, chunk_size=3)
+    stream_anonymize(packed, salt, chunk_size=3)
+    with open(plain["output_log"]) as f, open_log(packed["output_log"]) as g:
+        assert g.read() == f.read()
+
+    # Compressed input cannot be split into byte ranges, so the workers fall back to streaming
+    packed["output_log"] = str(tmp_path / "parallel.log.xz")
+    parallel_anonymize(packed, salt, workers=2, chunk_size=3)
+    with open(plain["output_log"]) as f, open_log(packed["output_log"]) as g:
+        assert g.read() == f.read()
@@ -0,0 +1,66 @@
+import ipaddress
+
+import numpy as np
+import pandas as pd
+
+from anonymizer.ip_anonymizer import anonymize_ip_column, int_to_ip, ip_octet_tables, ip_to_int
+from anonymizer.vault import KeyVault
+
+SALT = b"0123456789abcdef"
+
+
+def test_ip_to_int_parses_dotted_quads():
+    ints, valid = ip_to_int(["0.0.0.0", "10.22.65.178", "255.255.255.255", "1.2.3.4"])
+    assert valid.all()
+    assert ints.tolist() == [0, (10 << 24) | (22 << 16) | (65 << 8) | 178, 0xFFFFFFFF, 0x01020304]
+    assert int_to_ip(ints).tolist() == ["0.0.0.0", "10.22.65.178", "255.255.255.255", "1.2.3.4"]
+
+
+def test_ip_to_int_rejects_malformed_values():
+    bad = ["256.1.1.1", "1.2.3", "1.2.3.4.5", "1..2.3", ".1.2.3", "1.2.3.", "1.2.3.0004",
+           "a.b.c.d", "1.2.3.4 ", "", "1234.1.1.1", "::1", "2001:db8::1", "1.2.3.4/24"]
+    ints, valid = ip_to_int(bad)
+    assert not valid.any()
+    assert (ints == 0).all()
+
+
+def test_octet_tables_are_bijective_and_salt_keyed():
+    tables = ip_octet_tables(SALT)
+    assert tables.shape == (4, 256)
+    for row in tables:
+        assert sorted(row.tolist()) == list(range(256))
+    assert not np.array_equal(tables, ip_octet_tables(b"another salt...."))
+
+
+def test_anonymize_ip_column_preserves_prefixes_and_passes_through_the_rest():
+    ips = pd.Series(["10.0.0.1", "10.0.0.2", "10.0.1.1", "10.0.0.1", None, "not-an-ip"], name="src_ip")
+    anonymized = anonymize_ip_column(ips, SALT)
+
+    assert anonymized.name == "src_ip"
+    assert anonymized[0] == anonymized[3]
+    assert anonymized[0] != "10.0.0.1"
+    assert anonymized[0].rsplit(".", 1)[0] == anonymized[1].rsplit(".", 1)[0]
+    assert anonymized[0].rsplit(".", 2)[0] == anonymized[2].rsplit(".", 2)[0]
+    assert pd.isna(anonymized[4])
+    assert anonymized[5] == "not-an-ip"
+    assert anonymized.equals(anonymize_ip_column(ips, SALT))
+
+
+def test_ipv6_addresses_are_anonymized_per_hextet():
+    ips = pd.Series(["2001:db8::1", "2001:db8::2", "2001:DB8:0:0:0:0:0:1", "fe80::1%eth0", "10.0.0.1", "a:b:c"])
+    anonymized = anonymize_ip_column(ips, SALT)
+
+    assert anonymized[0] == anonymized[2]  # Same address, whatever its spelling
+    assert anonymized[0] != anonymized[1]
+    first, second = (ipaddress.IPv6Address(value) for value in anonymized[:2])
+    assert first.packed[:14] == second.packed[:14]  # Shared prefix hextets stay shared
+    assert anonymized[3].endswith("%eth0") and anonymized[3] != "fe80::1%eth0"
+    assert anonymized[5] == "a:b:c"
+
+
+def test_ipv6_pseudonyms_go_through_the_vault(tmp_path):
+    ips = pd.Series(["2001:db8::1", "10.0.0.1"])
+    with KeyVault(str(tmp_path)) as vault:
+        first = anonymize_ip_column(ips, vault.salt, vault)
+    with KeyVault(str(tmp_path), warm_entries=0) as vault:
+        assert vault.lookup("ip", ["2001:db8::1"]) == {"2001:db8::1": first[0]}
@@ -0,0 +1,99 @@
+import io
+
+import pytest
+
+from anonymizer.log_parser import iter_log_chunks, parse_lines, read_zeek
+
+SURICATA = (
+    "03/17/2025-22:48:07.698063  [**] [1:2027397:1] ET INFO Spotify P2P Client [**] "
+    "[Classification: Not Suspicious Traffic] [Priority: 3] {UDP} 10.22.65.178:57621 -> 10.22.67.255:57622\n"
+)
+FIREWALL = "Mar 17 22:48:07 fw kernel: IN=eth0 SRC=10.0.0.1 DST=10.0.0.2 SPT=1234 DPT=80\n"
+
+
+def test_suricata_fields_and_offsets():
+    logs, mapping = parse_lines([SURICATA], "suricata")
+    assert logs["line_no"] == [1]
+    assert logs["src_ip"] == ["10.22.65.178"] and logs["dest_port"] == ["57622"]
+    for field, value, offset in mapping.to_dataframe()[["field", "original_value", "offset"]].itertuples(index=False):
+        assert SURICATA[offset:offset + len(value)] == value
+        assert logs[field] == [value]
+
+
+def test_prefilter_skips_lines_and_keeps_line_numbers():
+    lines = ["noise\n", SURICATA, "[**] but not an alert\n", SURICATA]
+    logs, mapping = parse_lines(lines, "suricata", start_line_no=10)
+    assert logs["line_no"] == [11, 13]
+    assert sorted(set(mapping.line_no.tolist())) == [11, 13]
+
+
+def test_unanchored_lines_fall_back_to_search():
+    # The firewall pattern does not match at the start of a line with a prefix it cannot span
+    line = "<4>" + FIREWALL.replace("Mar 17", "Mar-17")
+    logs, mapping = parse_lines([line], "firewall")
+    assert logs["src_ip"] == ["10.0.0.1"] and logs["dest_port"] == ["80"]
+    offsets = dict(zip(mapping.to_dataframe()["field"], mapping.to_dataframe()["offset"]))
+    assert line[offsets["src_ip"]:].startswith("10.0.0.1")
+
+
+def test_fields_restrict_the_parsed_columns():
+    logs, mapping = parse_lines([SURICATA], "suricata", fields=["src_ip", "timestamp"])
+    assert set(logs) == {"timestamp", "src_ip", "line_no"}
+    assert set(mapping.fields) == {"timestamp", "src_ip"}
+
+
+def test_custom_format_uses_its_configured_fields_and_prefilter():
+    config = {"anonymization": {"custom_format": {
+        "pattern": r"user=(?P<user>\w+) ip=(?P<src_ip>[\d.]+)",
+        "fields": ["src_ip"],
+        "prefilter": "user=",
+    }}}
+    logs, mapping = parse_lines(["x user=bob ip=1.2.3.4\n", "ip=5.6.7.8\n"], "custom", config)
+    assert logs == {"user": ["bob"], "src_ip": ["1.2.3.4"], "line_no": [1]}
+    assert mapping.fields == ["src_ip"] and mapping.offset.tolist() == [14]
+
+
+def test_custom_format_without_a_pattern_fails():
+    with pytest.raises(ValueError):
+        parse_lines([], "custom", {"anonymization": {}})
+
+
+def test_chunks_number_lines_across_boundaries():
+    chunks = list(iter_log_chunks(["a\n", "b\n", "c\n"], 2))
+    assert chunks == [(1, ["a\n", "b\n"]), (3, ["c\n"])]
+
+
+def test_zeek_header_drives_the_columns():
+    log = io.StringIO(
+        "#separator \\x09\n#fields\tts\tid.orig_h\tid.orig_p\tnote\n#types\ttime\taddr\tport\tstring\n"
+        "1742251844.1\t10.0.0.1\t5353\t-\n1742251845.2\t10.0.0.2\t53\t(empty)\n#close\t2025-03-17\n"
+    )
+    header, chunks = read_zeek(log, 1)
+    frames = list(chunks)
+    assert header.columns == ["timestamp", "src_ip", "src_port", "note"]
+    assert header.types == ["time", "addr", "port", "string"]
+    assert [frame["src_ip"].tolist() for frame in frames] == [["10.0.0.1"], ["10.0.0.2"], []]
+    assert frames[1]["note"].tolist() == ["(empty)"]
+    assert header.trailer == ["#close\t2025-03-17\n"]
+
+
+def test_syslog_offsets_cover_header_structured_data_and_message():
+    line = ('<34>1 2025-04-13T14:07:15+02:00 host2 su - ID47 [origin ip="10.1.1.1"][meta src_ip="172.16.0.9" '
+            'note="a ] b \\"q\\""] login dest_ip=\'10.0.0.5\' dest_port=22\n')
+    logs, mapping = parse_lines(["junk\n", line], "syslog", start_line_no=5)
+    assert len(logs) == 1 and logs[0]["line_no"] == 6
+    entry = logs[0]
+    assert entry["structured_data"].endswith('note="a ] b \\"q\\""]')
+    assert entry["note"] == 'a ] b \\"q\\"' and entry["ip"] == "10.1.1.1"
+    assert entry["message"] == "login dest_ip='10.0.0.5' dest_port=22"
+
+    frame = mapping.to_dataframe()
+    assert set(frame["field"]) == {"timestamp", "hostname", "app_name", "src_ip", "dest_ip", "dest_port"}
+    for value, offset in zip(frame["original_value"], frame["offset"]):
+        assert offset >= 0 and line[offset:offset + len(value)] == value
+
+
+def test_syslog_fields_restrict_columns_but_keep_missing_ones():
+    logs, mapping = parse_lines(["<13>1 - host app - - -\n"], "syslog", fields=["timestamp", "src_ip"])
+    assert logs == [{"timestamp": "-", "src_ip": None, "line_no": 1}]
+    assert mapping.fields == ["timestamp"]
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from anonymizer.mapping_store import NO_OFFSET, MappingBuilder, MappingTable, MappingWriter, load_mapping, save_mapping
+
+
+def _table(rows):
+    builder = MappingBuilder()
+    for row in rows:
+        builder.add(*row)
+    return builder.build()
+
+
+ROWS = [
+    (1, "src_ip", "10.0.0.1", 30),
+    (1, "dest_ip", "10.0.0.2", 45),
+    (2, "src_ip", "10.0.0.1", 30),
+    (2, "message", "héllo wörld", -1),
+]
+
+
+def _frame(table):
+    return table.to_dataframe().reset_index(drop=True)
+
+
+def test_builder_interns_fields_and_values():
+    table = _table(ROWS)
+    assert table.fields == ["src_ip", "dest_ip", "message"]
+    assert len(table.values) == 3
+    assert table.offset[-1] == NO_OFFSET
+    assert table.length.tolist() == [8, 8, 8, 11]
+
+
+def test_binary_sidecar_round_trip(tmp_path):
+    table = _table(ROWS)
+    save_mapping(table, str(tmp_path / "log_mapping.map"))
+    for mmap in (True, False):
+        loaded = MappingTable.load(str(tmp_path / "log_mapping.map"), mmap=mmap)
+        pd.testing.assert_frame_equal(_frame(loaded), _frame(table))
+        assert np.array_equal(loaded.length, table.length)
+
+
+def test_csv_layout_round_trip(tmp_path):
+    table = _table(ROWS)
+    save_mapping(table, str(tmp_path / "log_mapping.csv"))
+    saved = pd.read_csv(tmp_path / "log_mapping.csv")
+    assert list(saved.columns) == ["line_no", "field", "original_value", "offset"]
+    assert saved["offset"].tolist() == [30, 45, 30, -1]
+    pd.testing.assert_frame_equal(_frame(load_mapping(str(tmp_path / "log_mapping.csv"))), _frame(table))
+
+
+def test_writer_appends_chunks_with_their_own_dictionaries(tmp_path):
+    path = str(tmp_path / "chunks.map")
+    first = _table(ROWS[:2])
+    second = _table([(3, "dest_ip", "10.0.0.9", 12), (3, "src_ip", "10.0.0.1", 4)])
+    with MappingWriter(path) as writer:
+        writer.append(first)
+        writer.append(_table([]))
+        writer.append(second)
+
+    loaded = load_mapping(path)
+    expected = pd.concat([_frame(first), _frame(second)], ignore_index=True)
+    pd.testing.assert_frame_equal(_frame(loaded), expected)
+    assert loaded.fields == ["src_ip", "dest_ip"]
+
+
+def test_empty_sidecar(tmp_path):
+    path = str(tmp_path / "empty.map")
+    save_mapping(_table([]), path)
+    assert len(load_mapping(path)) == 0
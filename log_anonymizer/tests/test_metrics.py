@@ -0,0 +1,116 @@
+import json
+import os
+import pstats
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from anonymizer.metrics import METRICS, metrics_format, to_prometheus
+from anonymizer.pipeline import parallel_anonymize, stream_anonymize
+
+
+@pytest.fixture
+def write_sample(sample_lines):
+    """Write `count` sample lines and one that does not parse to `path`; return the sample lines."""
+    def write(path, count):
+        lines = sample_lines(count)
+        path.write_text("".join(lines) + "not a suricata line\n")
+        return lines
+    return write
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    METRICS.reset()
+    yield
+    METRICS.reset()
+
+
+def test_stream_reports_stages_rows_and_distinct_values(tmp_path, salt, anonymization, write_sample):
+    lines = write_sample(tmp_path / "input.log", 40)
+    METRICS.configure(str(tmp_path / "metrics.json"))
+    stream_anonymize({"log_file": str(tmp_path / "input.log"), "log_type": "suricata",
+                      "output_log": str(tmp_path / "out.log"), "anonymization": anonymization}, salt, chunk_size=7)
+    METRICS.write()
+
+    report = json.loads((tmp_path / "metrics.json").read_text())
+    assert report["counters"] == {"lines_read": 41, "lines_parsed": 40}
+    stages = report["stages"]
+    assert stages["parse"]["rows"] == 41 and stages["parse"]["calls"] == 6
+    assert stages["anonymize"]["rows"] == stages["anonymize.ip.salt"]["rows"] == 40
+    assert {"anonymize.port.salt", "anonymize.timestamp.round", "reconstruct"} <= set(stages)
+
+    raw = pd.Series([line.split()[-3].rsplit(":", 1)[0] for line in lines])
+    src_ip = report["fields"]["src_ip"]
+    assert src_ip["rows"] == 40 and src_ip["unique_values"] == raw.nunique()
+    assert src_ip["repeat_rate"] == round(1 - raw.nunique() / 40, 6)
+    assert not src_ip["upper_bound"] and not src_ip["lower_bound"]
+    assert report["peak_rss_bytes"] > 0
+
+
+def test_parallel_workers_report_to_the_parent(tmp_path, salt, anonymization, write_sample):
+    write_sample(tmp_path / "input.log", 200)
+    METRICS.configure()
+    parallel_anonymize({"log_file": str(tmp_path / "input.log"), "log_type": "suricata",
+                        "output_log": str(tmp_path / "out.log"), "anonymization": anonymization}, salt,
+                       workers=3, chunk_size=16)
+
+    snapshot = METRICS.snapshot()
+    assert snapshot["counters"] == {"lines_read": 201, "lines_parsed": 200}
+    assert snapshot["stages"]["anonymize"]["rows"] == 200
+    assert snapshot["fields"]["dest_port"]["rows"] == 200
+    assert snapshot["fields"]["dest_port"]["upper_bound"]  # Ports seen by several workers are counted once by each
+    assert snapshot["worker_peak_rss_bytes"] > 0
+    assert "log_anonymizer_worker_peak_rss_bytes" in to_prometheus(snapshot)
+
+
+def test_vault_hits_become_a_cache_hit_rate():
+    class Vault:
+        hits, misses = 3, 1
+
+    caches = METRICS.snapshot(Vault())["caches"]
+    assert caches["vault"] == {"hits": 3, "misses": 1, "hit_rate": 0.75}
+
+
+def test_prometheus_text_format():
+    METRICS.configure()
+    METRICS.add_stage("parse", 0.5, 100)
+    METRICS.count("lines_read", 100)
+    METRICS.observe(pd.DataFrame({"src_ip": ["1.1.1.1", "1.1.1.1", None]}), ["src_ip"])
+    text = to_prometheus(METRICS.snapshot())
+
+    assert "# TYPE log_anonymizer_stage_seconds_total counter" in text
+    assert 'log_anonymizer_stage_rows_total{stage="parse"} 100' in text
+    assert 'log_anonymizer_lines_total{outcome="lines_read"} 100' in text
+    assert 'log_anonymizer_field_unique_values{field="src_ip"} 1' in text
+    assert 'log_anonymizer_field_rows_total{field="src_ip"} 2' in text
+    assert metrics_format("run.prom") == "prometheus" and metrics_format("run.json") == "json"
+
+
+def test_metrics_are_rewritten_periodically(tmp_path, salt, anonymization, write_sample):
+    write_sample(tmp_path / "input.log", 20)
+    METRICS.configure(str(tmp_path / "metrics.prom"), interval=0)
+    stream_anonymize({"log_file": str(tmp_path / "input.log"), "log_type": "suricata",
+                      "output_log": str(tmp_path / "out.log"), "anonymization": anonymization}, salt, chunk_size=7)
+
+    assert 'log_anonymizer_lines_total{outcome="lines_parsed"} 20' in (tmp_path / "metrics.prom").read_text()
+    assert not (tmp_path / "metrics.prom.tmp").exists()
+
+
+def test_cli_writes_metrics_and_profile(tmp_path, package_dir, write_sample):
+    write_sample(tmp_path / "input.log", 10)
+    config = tmp_path / "config.yaml"
+    config.write_text(f"log_file: {tmp_path / 'input.log'}\nlog_type: suricata\noutput_log: {tmp_path / 'out.log'}\n"
+                      f"anonymization:\n  ip: mask\n")
+
+    result = subprocess.run([sys.executable, os.path.join(package_dir, "main.py"), "--config", str(config),
+                             "--metrics", str(tmp_path / "metrics.json"), "--profile", str(tmp_path / "run.prof")],
+                            cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+    report = json.loads((tmp_path / "metrics.json").read_text())
+    assert {"parse", "anonymize", "anonymize.ip.mask", "reconstruct"} <= set(report["stages"])
+    assert report["fields"]["src_ip"]["rows"] == 10
+    assert pstats.Stats(str(tmp_path / "run.prof")).total_calls > 0
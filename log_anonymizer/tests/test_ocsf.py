@@ -0,0 +1,102 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+from anonymizer.convert_to_ocsf import convert_to_ocsf, ocsf_settings
+from anonymizer.pipeline import parallel_anonymize, stream_anonymize
+
+
+def read_ndjson(path):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_ocsf_is_off_unless_configured():
+    assert ocsf_settings({}) is None
+    assert ocsf_settings({"ocsf": {"enabled": False, "output": "x.ndjson"}}) is None
+    assert ocsf_settings({"ocsf": True}) == {"output": "ocsf_logs.ndjson", "batch_size": 10_000}
+    assert ocsf_settings({"ocsf": {"output": "o.ndjson.gz", "batch_size": 5}})["output"] == "o.ndjson.gz"
+
+
+def test_rows_become_network_activity_events(tmp_path):
+    df = pd.DataFrame({
+        "timestamp": ["03/17/2025-22:45:00.000000", "bad"],
+        "alert": ["ET SCAN", None],
+        "priority": ["1", "3"],
+        "protocol": ["TCP", "UDP"],
+        "src_ip": ["1.2.3.4", "5.6.7.8"],
+        "src_port": ["80", None],
+        "dest_ip": ["9.9.9.9", None],
+        "dest_port": ["443", "53"],
+        "classification": ["Attempted Recon", ""],
+        "line_no": [1, 2],
+    })
+    path = tmp_path / "ocsf.ndjson.gz"
+    assert convert_to_ocsf(df, "suricata", str(path), batch_size=1) == 2
+
+    first, second = read_ndjson(path)
+    assert first["class_uid"] == 4001 and first["type_uid"] == 400106
+    assert first["time"] == 1742251500000
+    assert first["severity_id"] == 4 and second["severity_id"] == 2
+    assert first["src_endpoint"] == {"ip": "1.2.3.4", "port": 80}
+    assert first["dst_endpoint"] == {"ip": "9.9.9.9", "port": 443}
+    assert first["connection_info"] == {"protocol_name": "tcp"}
+    assert first["message"] == "ET SCAN"
+    assert first["unmapped"] == {"classification": "Attempted Recon"}
+    assert first["metadata"]["product"]["name"] == "Suricata"
+    assert "time" not in second and "message" not in second and "unmapped" not in second
+    assert second["src_endpoint"] == {"ip": "5.6.7.8"} and second["dst_endpoint"] == {"port": 53}
+
+
+def test_stream_exports_anonymized_records_only_when_enabled(tmp_path, monkeypatch, salt, anonymization, sample_lines):
+    monkeypatch.chdir(tmp_path)
+    log_file = tmp_path / "input.log"
+    log_file.write_text("".join(sample_lines(40)) + "not a suricata line\n")
+    config = {"log_file": str(log_file), "log_type": "suricata", "output_log": str(tmp_path / "out.log"),
+              "anonymization": anonymization}
+
+    stream_anonymize(config, salt, chunk_size=7)
+    assert not (tmp_path / "ocsf_logs.ndjson").exists()
+
+    ocsf_file = tmp_path / "ocsf.ndjson"
+    stream_anonymize({**config, "ocsf": {"output": str(ocsf_file)}}, salt, chunk_size=7)
+    events = read_ndjson(ocsf_file)
+    assert len(events) == 40
+    raw = "".join(sample_lines(40))
+    anonymized = (tmp_path / "out.log").read_text()
+    for event in events:
+        assert event["src_endpoint"]["ip"] not in raw and event["src_endpoint"]["ip"] in anonymized
+        assert event["message"]  # Fields outside the anonymized set are still exported
+        assert event["time"] % (15 * 60 * 1000) == 0
+
+
+def test_parallel_export_matches_stream(tmp_path, salt, anonymization, sample_lines):
+    log_file = tmp_path / "input.log"
+    log_file.write_text("".join(sample_lines(200)))
+    config = {"log_file": str(log_file), "log_type": "suricata", "anonymization": anonymization}
+
+    stream_anonymize({**config, "output_log": str(tmp_path / "s.log"),
+                      "ocsf": {"output": str(tmp_path / "s.ndjson")}}, salt, chunk_size=16)
+    parallel_anonymize({**config, "output_log": str(tmp_path / "p.log"),
+                        "ocsf": {"output": str(tmp_path / "p.ndjson.gz")}}, salt, workers=3, chunk_size=16)
+    assert read_ndjson(tmp_path / "p.ndjson.gz") == read_ndjson(tmp_path / "s.ndjson")
+
+
+def test_batch_cli_exports_after_anonymization(tmp_path, package_dir, sample_lines):
+    log_file = tmp_path / "input.log"
+    log_file.write_text("".join(sample_lines(10)))
+    config = tmp_path / "config.yaml"
+    config.write_text(f"log_file: {log_file}\nlog_type: suricata\noutput_log: {tmp_path / 'out.log'}\n"
+                      f"anonymization:\n  ip: salt\nocsf:\n  output: {tmp_path / 'ocsf.ndjson'}\n")
+
+    result = subprocess.run([sys.executable, os.path.join(package_dir, "main.py"), "--config", str(config)],
+                            cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    events = read_ndjson(tmp_path / "ocsf.ndjson")
+    assert len(events) == 10
+    assert not any(event["src_endpoint"]["ip"] in log_file.read_text() for event in events)
@@ -0,0 +1,63 @@
+import ipaddress
+
+import pandas as pd
+import pytest
+
+from anonymizer.paper_imple import CryptoPAn, anonymize_ip_addresses
+from anonymizer.plan import compile_plan
+
+
+def common_prefix(a, b, width):
+    diff = int(ipaddress.ip_address(a)) ^ int(ipaddress.ip_address(b))
+    return width - diff.bit_length()
+
+
+@pytest.mark.parametrize("first, second, width", [
+    ("192.168.1.10", "192.168.1.200", 32),
+    ("10.1.2.3", "10.200.2.3", 32),
+    ("2001:db8::1", "2001:db8::ffff", 128),
+    ("2001:db8:1::1", "2001:db9::1", 128),
+])
+def test_cryptopan_preserves_shared_prefix_lengths(first, second, width):
+    cryptopan = CryptoPAn("test key")
+    anonymized = cryptopan.anonymize_ips([first, second])
+    assert anonymized[0] != first
+    assert common_prefix(*anonymized, width) == common_prefix(first, second, width)
+
+
+def test_cryptopan_keeps_host_bits_beyond_prefix_and_reuses_cached_prefixes():
+    cryptopan = CryptoPAn("test key")
+    first = cryptopan.anonymize_ip("192.168.1.10", 24)
+    assert first.endswith(".10")
+
+    calls = cryptopan.aes_calls
+    assert cryptopan.anonymize_ip("192.168.1.99", 24).rsplit(".", 1)[0] == first.rsplit(".", 1)[0]
+    assert cryptopan.aes_calls == calls
+    assert cryptopan.cache_hits >= 24
+
+
+def test_condensation_handles_ipv4_and_ipv6(salt):
+    ips = ["192.168.1.1", "192.168.1.2", "2001:db8::1", "2001:db8::2", "10.0.0.3", "2001:db8::1"]
+    anonymized = anonymize_ip_addresses(ips, 2, key=salt)
+
+    assert len(anonymized) == len(ips)
+    for original, result in zip(ips, anonymized):
+        assert ipaddress.ip_address(result).version == ipaddress.ip_address(original).version
+    # The /64 network of the IPv6 addresses is anonymized consistently
+    v6_networks = {int(ipaddress.ip_address(anonymized[i])) >> 64 for i in (2, 3, 5)}
+    assert len(v6_networks) == 1 and v6_networks != {int(ipaddress.ip_address("2001:db8::")) >> 64}
+
+
+def test_condensation_rejects_values_that_are_not_addresses(salt):
+    with pytest.raises(ValueError, match="not-an-ip"):
+        anonymize_ip_addresses(["10.0.0.1", "not-an-ip"], 2, key=salt)
+
+
+def test_condensation_networks_are_keyed_by_the_run_key(salt):
+    ips = ["192.168.1.1", "192.168.1.2", "10.0.0.3"]
+    plan = compile_plan("suricata", {"ip": {"strategy": "condensation", "k": 2, "seed": 1}})
+    df = plan.apply(pd.DataFrame({"src_ip": ips}), salt)
+    assert df["src_ip"].tolist() == anonymize_ip_addresses(ips, 2, seed=1, key=salt)
+
+    other = anonymize_ip_addresses(ips, 2, seed=1, key=b"fedcba9876543210")
+    assert [ip.rsplit(".", 1)[0] for ip in other] != [ip.rsplit(".", 1)[0] for ip in df["src_ip"]]
@@ -0,0 +1,152 @@
+import os
+import subprocess
+import sys
+
+from anonymizer.log_parser import parse_logs
+from anonymizer.log_reconstructor import replace_anonymized_values
+from anonymizer.pipeline import anonymize_dataframe, parallel_anonymize, split_byte_ranges, stream_anonymize, zeek_anonymize
+
+
+def batch_output(config, tmp_path, salt):
+    df_logs, _ = parse_logs(config["log_file"], config["log_type"], str(tmp_path / "temp.csv"),
+                            str(tmp_path / "mapping.map"), config)
+    df_logs = anonymize_dataframe(df_logs, config["log_type"], config["anonymization"], salt)
+    df_logs.to_csv(tmp_path / "anonymized.csv", index=False)
+    batch_log = str(tmp_path / "batch.log")
+    replace_anonymized_values(str(tmp_path / "mapping.map"), str(tmp_path / "anonymized.csv"),
+                              config["log_file"], batch_log)
+    with open(batch_log) as f:
+        return f.read()
+
+
+def test_stream_matches_batch_and_keeps_every_line(tmp_path, salt, make_config, sample_lines):
+    lines = sample_lines()
+    config = make_config(lines)
+
+    total_lines, total_parsed = stream_anonymize(config, salt, chunk_size=7)
+
+    with open(config["output_log"]) as f:
+        streamed = f.read()
+    assert (total_lines, total_parsed) == (len(lines), len(lines))
+    assert streamed == batch_output(config, tmp_path, salt)
+    assert streamed.count("\n") == len(lines)
+    assert "10.22.65.178" not in streamed
+
+
+def test_batch_and_stream_replace_undecodable_bytes_alike(tmp_path, salt, make_config, sample_lines):
+    lines = sample_lines(6)
+    config = make_config(lines)
+    with open(config["log_file"], "ab") as f:
+        f.write(b"not utf-8 \xff\xfe\n")
+
+    stream_anonymize(config, salt, chunk_size=4)
+    with open(config["output_log"]) as f:
+        streamed = f.read()
+    assert streamed == batch_output(config, tmp_path, salt)
+    assert streamed.endswith("not utf-8 \ufffd\ufffd\n")
+
+
+def test_stream_passes_through_chunks_without_matching_lines(tmp_path, salt, make_config, sample_lines):
+    junk = [f"not a log line {i}\n" for i in range(5)]
+    lines = junk + sample_lines(4)
+    config = make_config(lines)
+
+    total_lines, total_parsed = stream_anonymize(config, salt, chunk_size=3)
+
+    with open(config["output_log"]) as f:
+        output = f.readlines()
+    assert (total_lines, total_parsed) == (9, 4)
+    assert output[:5] == junk
+    assert all("10.22." not in line for line in output[5:])
+
+
+SYSLOG_LINES = [
+    "<13>1 2025-04-13T14:02:15.123Z host1 app 1234 ID1 - src_ip=192.168.1.4 dest_ip=10.0.0.4\n",
+    '<34>1 2025-04-13T14:07:15+02:00 host2 su - ID47 [origin ip="10.1.1.1"][meta src_ip="172.16.0.9" '
+    'note="a ] b \\"quoted\\""] BOM login dest_ip=\'10.0.0.5\' dest_port=22\n',
+    "not syslog\n",
+    "<13>1 - host3 app - - -\n",
+]
+
+
+def test_syslog_streams_like_batch(tmp_path, salt, make_config):
+    config = make_config(SYSLOG_LINES, log_type="syslog")
+
+    total_lines, total_parsed = stream_anonymize(config, salt, chunk_size=2)
+    with open(config["output_log"]) as f:
+        streamed = f.read()
+    assert (total_lines, total_parsed) == (4, 3)
+    assert streamed == batch_output(config, tmp_path, salt)
+    for original in ("192.168.1.4", "10.0.0.4", "172.16.0.9", "10.0.0.5", "14:02:15", "14:07:15", "=22"):
+        assert original not in streamed
+    assert 'origin ip="10.1.1.1"' in streamed and "host2 su" in streamed
+    assert streamed.splitlines()[2:] == ["not syslog", "<13>1 - host3 app - - -"]
+
+
+def test_cli_help_runs_without_the_batch_only_imports(package_dir):
+    result = subprocess.run([sys.executable, "main.py", "--help"], cwd=package_dir,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "--stream" in result.stdout
+
+
+def test_byte_ranges_cover_the_file_on_line_boundaries(tmp_path):
+    log_file = tmp_path / "input.log"
+    log_file.write_bytes(b"".join(b"x" * (i % 17) + b"\n" for i in range(500)) + b"no trailing newline")
+    data = log_file.read_bytes()
+
+    for n_shards in (1, 2, 7, 64, 5000):
+        ranges = split_byte_ranges(str(log_file), n_shards)
+        assert len(ranges) <= n_shards
+        assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+        assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+        assert all(data[start - 1:start] == b"\n" for start, _ in ranges[1:])
+
+
+def test_byte_ranges_of_an_empty_file(tmp_path):
+    log_file = tmp_path / "empty.log"
+    log_file.write_bytes(b"")
+    assert split_byte_ranges(str(log_file), 4) == [(0, 0)]
+
+
+def test_parallel_matches_stream(tmp_path, salt, make_config, sample_lines):
+    config = make_config(sample_lines(200))
+    stream_anonymize(config, salt, chunk_size=16)
+    with open(config["output_log"]) as f:
+        streamed = f.read()
+
+    assert parallel_anonymize(config, salt, workers=3, chunk_size=16) == (200, 200)
+    with open(config["output_log"]) as f:
+        assert f.read() == streamed
+
+
+def test_cli_rejects_intermediates_with_workers(tmp_path, package_dir):
+    config = tmp_path / "config.yaml"
+    log_file = os.path.join(package_dir, "suricata_logs.txt")
+    config.write_text(f"log_file: {log_file}\nlog_type: suricata\noutput_log: {tmp_path / 'out.log'}\n")
+    result = subprocess.run([sys.executable, os.path.join(package_dir, "main.py"), "--config", str(config),
+                             "--workers", "2", "--keep-intermediates"], cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "--keep-intermediates is not supported with --workers" in result.stderr
+    assert not (tmp_path / "out.log").exists()
+
+
+def test_zeek_salt_anonymizes_ipv4_and_ipv6(tmp_path, salt, make_config):
+    log = (
+        "#separator \\x09\n#fields\tts\tuid\tid.orig_h\tid.orig_p\tid.resp_h\tid.resp_p\tproto\n"
+        "#types\ttime\tstring\taddr\tport\taddr\tport\tenum\n"
+        "1742251844.123456\tC1\t10.0.0.1\t5353\t2001:db8::1\t53\tudp\n"
+        "1742251845.000000\tC2\tfe80::1\t546\t10.0.0.2\t547\tudp\n"
+        "#close\t2025-03-17-22-48-07\n"
+    )
+    config = make_config([log], log_type="zeek", anonymization={"ip": "salt"})
+    total_rows, _ = zeek_anonymize(config, salt, chunk_size=1)
+
+    with open(config["output_log"]) as f:
+        output = f.read().splitlines()
+    assert total_rows == 2
+    assert output[:3] == log.splitlines()[:3] and output[-1] == log.splitlines()[-1]
+    rows = [line.split("\t") for line in output[3:5]]
+    assert [row[1] for row in rows] == ["C1", "C2"]
+    for original in ("10.0.0.1", "2001:db8::1", "fe80::1", "10.0.0.2"):
+        assert original not in {value for row in rows for value in row}
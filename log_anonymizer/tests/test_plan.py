@@ -0,0 +1,111 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from anonymizer import ip_anonymizer
+from anonymizer.ip_anonymizer import anonymize_ip_column
+from anonymizer.plan import compile_plan
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SALT = b"0123456789abcdef"
+
+
+def flows():
+    return pd.DataFrame({
+        "timestamp": ["03/17/2025-22:48:07.123456", "03/17/2025-22:51:00.000000", "03/17/2025-23:01:00.000000"],
+        "src_ip": ["10.0.0.1", "10.0.0.2", "192.168.1.7"],
+        "dest_ip": ["192.168.1.7", "10.0.0.1", None],
+        "src_port": ["51000", "443", "53"],
+        "dest_port": ["443", "51000", "53"],
+    })
+
+
+def test_src_and_dest_are_transformed_as_one_domain(monkeypatch):
+    calls = []
+
+    def counting(values, SALT, vault=None):
+        calls.append(list(values))
+        return anonymize_ip_column(values, SALT, vault)
+    monkeypatch.setattr(ip_anonymizer, "anonymize_ip_column", counting)
+
+    plan = compile_plan("suricata", {"ip": "salt", "port": "salt", "timestamp": "round"})
+    assert [(strategy.kind, fields) for strategy, fields in plan.steps] == [
+        ("timestamp", ["timestamp"]), ("ip", ["src_ip", "dest_ip"]), ("port", ["src_port", "dest_port"])]
+
+    df = plan.apply(flows(), SALT)
+    assert calls == [["10.0.0.1", "10.0.0.2", "192.168.1.7", "192.168.1.7", "10.0.0.1"]]
+    assert df["src_ip"][0] == df["dest_ip"][1] and df["dest_ip"][0] == df["src_ip"][2]
+    assert df["dest_ip"].isna()[2]
+    assert df["src_ip"].tolist() == anonymize_ip_column(flows()["src_ip"], SALT).tolist()
+    assert df["src_port"][0] == df["dest_port"][1]
+    assert df["timestamp"].tolist() == ["03/17/2025-22:45:00.000000", "03/17/2025-22:45:00.000000",
+                                        "03/17/2025-23:00:00.000000"]
+
+
+def test_parameters_come_from_the_config():
+    plan = compile_plan("suricata", {"ip": {"strategy": "mask", "subnet_mask": 16},
+                                     "timestamp": {"strategy": "round", "bucket_minutes": 60}})
+    df = plan.apply(flows(), SALT)
+    assert df["src_ip"].tolist() == ["10.0.0.0/16", "10.0.0.0/16", "192.168.0.0/16"]
+    assert df["timestamp"][2] == "03/17/2025-23:00:00.000000" and df["timestamp"][0] == "03/17/2025-22:00:00.000000"
+
+
+def test_unknown_strategies_and_parameters_are_rejected():
+    with pytest.raises(ValueError, match="Unknown ip strategy 'truncate'"):
+        compile_plan("suricata", {"ip": "truncate"})
+    with pytest.raises(ValueError, match="epsilon"):
+        compile_plan("suricata", {"ip": {"strategy": "salt", "epsilon": 2}})
+
+
+def test_custom_fields_share_steps_by_strategy_and_parameters():
+    custom_format = {"fields": ["src_ip", "dest_ip", "bytes", "alert", "timestamp"],
+                     "src_ip": "salt", "dest_ip": "salt", "bytes": {"strategy": "condensation", "k": 2, "seed": 1},
+                     "alert": "mask", "timestamp": "perturb"}
+    plan = compile_plan("custom", {"custom_format": custom_format})
+    assert [(strategy.kind, strategy.name, fields) for strategy, fields in plan.steps] == [
+        ("ip", "salt", ["src_ip", "dest_ip"]), ("numeric", "condensation", ["bytes"]),
+        ("text", "mask", ["alert"]), ("timestamp", "perturb", ["timestamp"])]
+
+    df = pd.DataFrame({"src_ip": ["10.0.0.1", "10.0.0.2"], "dest_ip": ["10.0.0.2", "10.0.0.1"],
+                       "bytes": [100.0, 200.0], "alert": ["ET SCAN", "GPL"]})
+    df = plan.apply(df, SALT)
+    assert df["src_ip"][0] == df["dest_ip"][1]
+    assert df["alert"].tolist() == ["ET XXXX", "GPL"]
+    assert np.issubdtype(df["bytes"].dtype, np.floating)
+
+
+def test_eve_paths_of_one_kind_share_a_step():
+    plan = compile_plan("eve", {"ip": "salt", "eve_paths": {"dns.answer": "ip", "http.hostname": "mask"}})
+    assert [(strategy.kind, fields) for strategy, fields in plan.steps] == [
+        ("ip", ["src_ip", "dest_ip", "dns.answer"]), ("text", ["http.hostname"])]
+
+
+def test_cli_rejects_an_unknown_strategy_before_writing(tmp_path):
+    config = tmp_path / "config.yaml"
+    config.write_text(f"log_file: {tmp_path / 'in.log'}\nlog_type: suricata\noutput_log: {tmp_path / 'out.log'}\n"
+                      f"anonymization:\n  ip: truncate\n")
+    result = subprocess.run([sys.executable, os.path.join(PACKAGE_DIR, "main.py"), "--config", str(config)],
+                            cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "Unknown ip strategy 'truncate'" in result.stderr
+    assert not (tmp_path / "out.log").exists()
+
+
+def test_salted_custom_text_fields_are_replaced_by_keyed_digests():
+    custom_format = {"fields": ["user", "src_port"], "user": "salt", "src_port": "salt"}
+    plan = compile_plan("custom", {"custom_format": custom_format})
+    assert [(strategy.kind, strategy.name) for strategy, _ in plan.steps] == [("text", "salt"), ("port", "salt")]
+
+    df = plan.apply(pd.DataFrame({"user": ["alice", "bob", "alice", None], "src_port": ["443", "80", "443", "22"]}),
+                    SALT)
+    users = df["user"].tolist()
+    assert "alice" not in users and "bob" not in users
+    assert users[0] == users[2] != users[1] and pd.isna(users[3])
+    assert df["src_port"].str.isdigit().all()
+    other_key = compile_plan("custom", {"custom_format": custom_format}).apply(
+        pd.DataFrame({"user": ["alice"], "src_port": ["443"]}), b"fedcba9876543210")
+    assert other_key["user"][0] != users[0]
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from anonymizer.port_anonymizer import anonymize_port_column, port_table, port_to_int
+
+SALT = b"0123456789abcdef"
+
+
+def test_port_table_is_a_salt_keyed_bijection():
+    table = port_table(SALT)
+    assert table.dtype == np.uint16
+    assert np.array_equal(np.sort(table), np.arange(65536))
+    assert not np.array_equal(table, port_table(b"another salt...."))
+
+
+def test_string_and_integer_ports_map_alike():
+    from_strings = anonymize_port_column(pd.Series(["80", "443", "0", "65535"]), SALT)
+    from_ints = anonymize_port_column(pd.Series([80, 443, 0, 65535]), SALT)
+    assert from_strings.tolist() == from_ints.tolist()
+    assert all(isinstance(port, str) for port in from_strings)
+    assert len(set(from_strings)) == 4
+
+
+def test_values_that_are_not_ports_pass_through():
+    ports = pd.Series(["80", "65536", "-1", "8.5", "http", None, "80"], index=list("abcdefg"))
+    anonymized = anonymize_port_column(ports, SALT)
+    assert anonymized.index.tolist() == list("abcdefg")
+    assert anonymized.iloc[1:5].tolist() == ["65536", "-1", "8.5", "http"]
+    assert pd.isna(anonymized.iloc[5])
+    assert anonymized.iloc[0] == anonymized.iloc[6] == str(port_table(SALT)[80])
+
+
+def test_port_to_int_validates_the_range():
+    ports, valid = port_to_int(["0", 65535, "65536", "22", "x"])
+    assert valid.tolist() == [True, True, False, True, False]
+    assert ports[valid].tolist() == [0, 65535, 22]
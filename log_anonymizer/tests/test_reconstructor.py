@@ -0,0 +1,70 @@
+import pandas as pd
+
+from anonymizer.log_reconstructor import build_replacements, rewrite_lines
+from anonymizer.mapping_store import MappingBuilder
+
+LINES = [
+    "03/17/2025-22:50:44.123 {UDP} 10.1.2.3:33506 -> 10.9.8.7:80\n",
+    "no fields on this line\n",
+    "03/17/2025-22:50:45.000 {TCP} 192.168.100.200:5 -> 10.0.0.1:65535\n",
+]
+
+
+def _mapping(lines, fields=("src_ip", "src_port", "dest_ip", "dest_port")):
+    builder = MappingBuilder()
+    for line_no, line in enumerate(lines, start=1):
+        if "->" not in line:
+            continue
+        src, dest = line.split("} ")[1].strip().split(" -> ")
+        values = dict(zip(fields, src.split(":") + dest.split(":")))
+        for field, value in values.items():
+            builder.add(line_no, field, value, line.index(value, line.index("}")))
+    return builder.build()
+
+
+def test_replacements_of_any_length_land_at_their_offsets():
+    anonymized = pd.DataFrame({
+        "line_no": [1, 3],
+        "src_ip": ["1.1.1.1", "203.0.113.254"],
+        "src_port": ["7", "40000"],
+        "dest_ip": ["172.16.254.254", "8.8.8.8"],
+        "dest_port": ["65000", "1"],
+    })
+    assert list(rewrite_lines(LINES, _mapping(LINES), anonymized)) == [
+        "03/17/2025-22:50:44.123 {UDP} 1.1.1.1:7 -> 172.16.254.254:65000\n",
+        "no fields on this line\n",
+        "03/17/2025-22:50:45.000 {TCP} 203.0.113.254:40000 -> 8.8.8.8:1\n",
+    ]
+
+
+def test_lines_that_no_longer_hold_the_original_are_left_alone():
+    mapping = _mapping(LINES)
+    changed = [LINES[0].replace("10.1.2.3", "10.1.2.4"), LINES[1], LINES[2]]
+    anonymized = pd.DataFrame({"line_no": [1, 3], "src_ip": ["1.1.1.1", "2.2.2.2"]})
+    rewritten = list(rewrite_lines(changed, mapping, anonymized))
+    assert rewritten[0] == changed[0]
+    assert rewritten[2].startswith("03/17/2025-22:50:45.000 {TCP} 2.2.2.2:5 ")
+
+
+def test_start_line_no_addresses_a_chunk():
+    anonymized = pd.DataFrame({"line_no": [3], "dest_port": ["22"]})
+    rewritten = list(rewrite_lines(LINES[2:], _mapping(LINES), anonymized, start_line_no=3))
+    assert rewritten == ["03/17/2025-22:50:45.000 {TCP} 192.168.100.200:5 -> 10.0.0.1:22\n"]
+
+
+def test_unplaced_values_are_warned_about_only_when_changed(capsys):
+    builder = MappingBuilder()
+    builder.add(1, "timestamp", "Apr  3 14:02:15")
+    builder.add(1, "hostname", "fw01")
+    anonymized = pd.DataFrame({"line_no": [1], "timestamp": ["Apr  3 14:00:00"], "hostname": ["fw01"]})
+
+    replacements = build_replacements(builder.build(), anonymized)
+    assert len(replacements["line_no"]) == 0
+    out = capsys.readouterr().out
+    assert "timestamp" in out and "hostname" not in out
+
+
+def test_chunk_without_parsed_lines():
+    replacements = build_replacements(MappingBuilder().build(), pd.DataFrame())
+    assert len(replacements["offset"]) == 0
+    assert list(rewrite_lines(LINES, MappingBuilder().build(), pd.DataFrame())) == LINES
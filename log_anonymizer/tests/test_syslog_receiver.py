@@ -0,0 +1,203 @@
+import asyncio
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from anonymizer.pipeline import _anonymize_lines, receive_anonymize, stream_anonymize
+from anonymizer.syslog_receiver import FileSink, SyslogReceiver, UdpSink, parse_endpoint
+
+class ListSink:
+    """Collects forwarded lines, optionally taking `delay` seconds per batch."""
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.lines = []
+        self.batches = 0
+
+    async def send(self, lines):
+        await asyncio.sleep(self.delay)
+        self.lines.extend(lines)
+        self.batches += 1
+
+    async def close(self):
+        pass
+
+
+async def receive(process, sink, listen, send, **options):
+    """Start a receiver, run `send(addresses)` against it, then stop it and return it."""
+    receiver = SyslogReceiver(process, sink, listen, **options)
+    await receiver.start()
+    stop = asyncio.Event()
+    task = asyncio.ensure_future(receiver.run(stop))
+    await send(dict((scheme, (host, port)) for scheme, host, port in receiver.addresses))
+    stop.set()
+    await task
+    return receiver
+
+
+async def send_tcp(address, payload):
+    _, writer = await asyncio.open_connection(*address)
+    writer.write(payload)
+    await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+
+def test_parse_endpoint():
+    assert parse_endpoint("udp://127.0.0.1:5514") == ("udp", "127.0.0.1", 5514)
+    assert parse_endpoint("tcp://[::1]") == ("tcp", "::1", 514)
+    assert parse_endpoint("anonymized.log") is None
+
+
+def test_tcp_messages_are_anonymized_like_the_file_modes(tmp_path, salt, sample_lines, anonymization):
+    config = {"log_type": "suricata", "anonymization": anonymization}
+    lines = sample_lines(50) + ["not a suricata line\n"]
+    log_file = tmp_path / "input.log"
+    log_file.write_text("".join(lines))
+    stream_anonymize({**config, "log_file": str(log_file), "output_log": str(tmp_path / "expected.log")}, salt)
+
+    def process(batch):
+        return _anonymize_lines(batch, config, salt)
+
+    sink = ListSink()
+
+    async def send(addresses):
+        await send_tcp(addresses["tcp"], "".join(lines).encode())
+        await wait_for(lambda: len(sink.lines) == len(lines))
+
+    receiver = asyncio.run(receive(process, sink, ["tcp://127.0.0.1:0"], send, batch_size=8))
+    assert "".join(sink.lines) == (tmp_path / "expected.log").read_text()
+    assert receiver.received == receiver.forwarded == len(lines)
+    assert sink.batches > 1
+
+
+def test_tcp_octet_counting_and_udp_datagrams():
+    sink = ListSink()
+    messages = ["<134>1 2025-03-17T22:48:07Z host app - - - first", "12 digits then text\nnot framed"]
+
+    async def send(addresses):
+        framed = "".join(f"{len(m.encode())} {m}" for m in messages)
+        await send_tcp(addresses["tcp"], framed.encode())
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+            udp.sendto(b"<13>over udp\r\n", addresses["udp"])
+        await wait_for(lambda: len(sink.lines) == 3)
+
+    asyncio.run(receive(list, sink, ["tcp://127.0.0.1:0", "udp://127.0.0.1:0"], send))
+    assert sorted(sink.lines) == sorted(m + "\n" for m in messages + ["<13>over udp"])
+
+
+def test_a_slow_sink_pushes_back_on_tcp_senders_without_losing_messages():
+    sink = ListSink(delay=0.01)
+    lines = [f"message {i}\n" for i in range(300)]
+
+    async def send(addresses):
+        await send_tcp(addresses["tcp"], "".join(lines).encode())
+        await wait_for(lambda: len(sink.lines) == len(lines), timeout=20)
+
+    receiver = asyncio.run(receive(list, sink, ["tcp://127.0.0.1:0"], send, queue_size=4, batch_size=4))
+    assert sink.lines == lines
+    assert receiver.dropped == 0
+
+
+def test_udp_sink_forwards_one_datagram_per_message():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        received = []
+
+        class Collector(asyncio.DatagramProtocol):
+            def datagram_received(self, data, addr):
+                received.append(data)
+
+        transport, _ = await loop.create_datagram_endpoint(Collector, local_addr=("127.0.0.1", 0))
+        sink = UdpSink(*transport.get_extra_info("sockname")[:2])
+        await sink.send(["<13>one\n", "<13>two\n"])
+        await wait_for(lambda: len(received) == 2)
+        await sink.close()
+        transport.close()
+        return received
+
+    assert asyncio.run(scenario()) == [b"<13>one", b"<13>two"]
+
+
+def test_file_sink_appends(tmp_path):
+    path = tmp_path / "out.log"
+    path.write_text("kept\n")
+
+    async def scenario():
+        sink = FileSink(str(path))
+        await sink.send(["a\n", "b\n"])
+        await sink.close()
+
+    asyncio.run(scenario())
+    assert path.read_text() == "kept\na\nb\n"
+
+
+def test_listen_mode_needs_a_vault(salt, anonymization):
+    with pytest.raises(ValueError, match="vault"):
+        receive_anonymize({"log_type": "suricata", "anonymization": anonymization, "output_log": "x"}, salt,
+                          ["udp://127.0.0.1:0"])
+
+
+def test_rfc5424_messages_are_rewritten_in_flight(salt):
+    config = {"log_type": "syslog", "anonymization": {"ip": "salt"}}
+    message = '<34>1 2025-04-13T14:07:15Z host2 su - ID47 [meta src_ip="172.16.0.9"] dest_ip=10.0.0.5'
+    sink = ListSink()
+
+    async def send(addresses):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+            udp.sendto(message.encode(), addresses["udp"])
+        await wait_for(lambda: sink.lines)
+
+    asyncio.run(receive(lambda batch: _anonymize_lines(batch, config, salt), sink, ["udp://127.0.0.1:0"], send))
+    assert len(sink.lines) == 1
+    forwarded = sink.lines[0]
+    assert forwarded.startswith("<34>1 2025-04-13T14:07:15Z host2 su - ID47 [meta src_ip=\"")
+    assert "172.16.0.9" not in forwarded and "10.0.0.5" not in forwarded
+
+
+def test_cli_listens_until_sigterm(tmp_path, package_dir, sample_lines):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    config = tmp_path / "config.yaml"
+    output = tmp_path / "received.log"
+    config.write_text(f"log_type: suricata\noutput_log: {output}\nanonymization:\n  ip: salt\n")
+    process = subprocess.Popen(
+        [sys.executable, "main.py", "--config", str(config), "--vault", str(tmp_path / "vault"),
+         "--listen", f"tcp://127.0.0.1:{port}"],
+        cwd=package_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        lines = sample_lines(5)
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                with socket.create_connection(("127.0.0.1", port)) as client:
+                    client.sendall("".join(lines).encode())
+                break
+            except ConnectionRefusedError:
+                assert time.monotonic() < deadline and process.poll() is None
+                time.sleep(0.1)
+
+        deadline = time.monotonic() + 20
+        while (not output.exists() or output.read_text().count("\n") < len(lines)) and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        stdout, _ = process.communicate(timeout=20)
+
+    assert process.returncode == 0, stdout
+    written = output.read_text().splitlines()
+    assert len(written) == len(lines)
+    assert "10.22.65.178" not in output.read_text()
+    assert "Stopped listening after 5 messages" in stdout
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from anonymizer.timestamp_anonymizer import (
+    order_preserving_adaptive_noise,
+    parse_timestamps,
+    random_time_shift_column,
+    round_to_nearest_15_minutes_column,
+)
+
+
+def test_iso8601_keeps_offset_separator_and_precision():
+    timestamps = pd.Series([
+        "2025-04-13T14:02:15.123+02:00",
+        "2025-04-13T14:07:15.123456-0500",
+        "2025-04-13 14:02:15Z",
+        "2025-04-13T14:02:15.123456789+01",
+        "not a timestamp",
+    ])
+    rounded = round_to_nearest_15_minutes_column(timestamps, log_type="syslog")
+    assert rounded.tolist() == [
+        "2025-04-13T14:00:00.000+02:00",
+        "2025-04-13T14:00:00.000000-0500",
+        "2025-04-13 14:00:00Z",
+        "2025-04-13T14:00:00.000000000+01",
+        "not a timestamp",
+    ]
+
+
+def test_iso8601_parses_to_utc_like_pandas():
+    timestamps = pd.Series([
+        "2025-04-13T14:02:15.123+02:00", "2025-04-13T14:02:15Z", "2025-04-13 14:02:15",
+        "2025-04-13T14:07:15.123456-0500", "2025-04-13", "2025-13-13T14:02:15Z", "junk",
+    ])
+    ns, valid = parse_timestamps(timestamps, "ISO8601")
+    expected = pd.to_datetime(timestamps, format="ISO8601", utc=True, errors="coerce")
+    assert valid.tolist() == expected.notna().tolist()
+    expected_ns = expected.dt.tz_localize(None).to_numpy(dtype="datetime64[ns]").view(np.int64)
+    assert ns[valid].tolist() == expected_ns[valid].tolist()
+
+
+def test_shift_round_trips_through_the_original_offset():
+    timestamps = pd.Series(["2025-04-13T23:59:59.5+05:30"] * 3)
+    shifted = random_time_shift_column(timestamps, max_shift_hours=1, log_type="syslog")
+    before, _ = parse_timestamps(timestamps, "ISO8601")
+    after, valid = parse_timestamps(shifted, "ISO8601")
+    assert valid.all()
+    assert all(value.endswith("+05:30") and len(value) == 27 for value in shifted)
+    assert (np.abs(after - before) <= 3600 * 10**9).all()
+
+
+def test_space_padded_days_stay_padded():
+    timestamps = pd.Series(["Apr  3 14:02:15", "Apr 13 14:02:15", "Apr 03 14:02:15"])
+    rounded = round_to_nearest_15_minutes_column(timestamps, log_type="firewall")
+    assert rounded.tolist() == ["Apr  3 14:00:00", "Apr 13 14:00:00", "Apr 03 14:00:00"]
+
+
+def test_timestamps_without_a_year_accept_feb_29():
+    rounded = round_to_nearest_15_minutes_column(pd.Series(["Feb 29 23:58:00"]), log_type="pfsense")
+    assert rounded.tolist() == ["Feb 29 23:45:00"]
+
+
+@pytest.mark.parametrize("log_type, timestamps, expected", [
+    ("suricata", ["03/17/2025-22:50:44.123456", "03/17/2025-22:50:44.1"],
+     ["03/17/2025-22:45:00.000000", "03/17/2025-22:45:00.0"]),
+    ("zeek", ["1742251844.123456", "1742251844"], ["1742251500.000000", "1742251500"]),
+])
+def test_fraction_digits_follow_the_original(log_type, timestamps, expected):
+    assert round_to_nearest_15_minutes_column(pd.Series(timestamps), log_type=log_type).tolist() == expected
+
+
+def test_adaptive_noise_preserves_order_and_format():
+    timestamps = pd.Series([
+        "2025-04-13T14:02:15.123+02:00", "2025-04-13T12:02:16.000Z",
+        "2025-04-13T14:02:18.500+02:00", "2025-04-13T12:02:14.250Z",
+    ])
+    noisy = order_preserving_adaptive_noise(timestamps, log_type="syslog", seed=7)
+    before, _ = parse_timestamps(timestamps, "ISO8601")
+    after, valid = parse_timestamps(noisy, "ISO8601")
+    assert valid.all()
+    assert np.array_equal(np.argsort(before), np.argsort(after))
+    assert [len(value) for value in noisy] == [len(value) for value in timestamps]
+    assert [value.endswith("Z") for value in noisy] == [False, True, False, True]
+
+
+def test_adaptive_noise_keeps_the_rank_of_unsorted_rows_and_ties():
+    rng = np.random.default_rng(0)
+    seconds = rng.integers(0, 86400, 2000)
+    seconds[:50] = seconds[50]  # A run of identical timestamps
+    timestamps = pd.Series(pd.to_datetime(seconds, unit="s").strftime("%m/%d/%Y-%H:%M:%S.%f"))
+
+    noisy = order_preserving_adaptive_noise(timestamps, apply_global_offset=False, log_type="suricata", seed=1)
+    before, _ = parse_timestamps(timestamps)
+    after, _ = parse_timestamps(noisy)
+    assert (np.sign(np.subtract.outer(before, before)) == np.sign(np.subtract.outer(after, after))).all()
+    assert len(set(noisy[:51])) == 1
+    assert noisy.equals(order_preserving_adaptive_noise(timestamps, apply_global_offset=False,
+                                                        log_type="suricata", seed=1))
+
+
+def test_adaptive_noise_passes_unparseable_rows_through():
+    times = pd.Series(["2025-03-17T22:50:44Z", "-", "2025-03-17T22:51:44Z", "2025-03-17T22:52:44Z"])
+    result = order_preserving_adaptive_noise(times, apply_global_offset=False, log_type="syslog", seed=3)
+    assert result[1] == "-"
+    parsed = pd.to_datetime(result[[0, 2, 3]])
+    assert parsed.is_monotonic_increasing
+    assert parsed.min() >= pd.Timestamp("2025-03-17T22:50:44Z") and parsed.max() <= pd.Timestamp("2025-03-17T22:52:44Z")
@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from anonymizer import vault as vault_module
+from anonymizer.ip_anonymizer import anonymize_ip_column
+from anonymizer.vault import KeyVault, map_with_vault, open_vault
+
+
+def test_key_persists_across_runs(tmp_path):
+    with KeyVault(str(tmp_path)) as first:
+        salt = first.salt
+    with KeyVault(str(tmp_path)) as second:
+        assert second.salt == salt
+    assert len(salt) == 16
+    assert os.stat(tmp_path / vault_module.KEY_FILE).st_mode & 0o077 == 0
+
+
+def test_pseudonyms_are_reused_across_runs(tmp_path):
+    ips = pd.Series(["10.0.0.1", "192.168.1.20", "10.0.0.1"])
+    with KeyVault(str(tmp_path)) as vault:
+        first = anonymize_ip_column(ips, vault.salt, vault)
+        assert (vault.hits, vault.misses) == (0, 2)
+    with KeyVault(str(tmp_path), warm_entries=0) as vault:
+        second = anonymize_ip_column(ips, vault.salt, vault)
+        assert (vault.hits, vault.misses) == (2, 0)
+    assert first.equals(second)
+    assert first.iloc[0] == first.iloc[2] != first.iloc[1]
+
+
+def test_map_with_vault_only_computes_unknown_values(tmp_path):
+    calls = []
+
+    def transform(values):
+        calls.append(list(values))
+        return np.array([value.upper() for value in values], dtype=object)
+
+    with KeyVault(str(tmp_path)) as vault:
+        map_with_vault(vault, "host", np.array(["a", "b"], dtype=object), transform)
+        result = map_with_vault(vault, "host", np.array(["b", "c", "a"], dtype=object), transform)
+    assert result.tolist() == ["B", "C", "A"]
+    assert calls == [["a", "b"], ["c"]]
+
+
+def test_eviction_drops_the_least_recently_used(tmp_path, monkeypatch):
+    now = [100]
+    monkeypatch.setattr(vault_module.time, "time", lambda: now[0])
+
+    with KeyVault(str(tmp_path), max_entries=3) as vault:
+        vault.store("ip", {"a": "1", "b": "2"})
+        now[0] = 150
+        vault.store("ip", {"c": "3"})
+        now[0] = 200
+        assert vault.lookup("ip", ["a"]) == {"a": "1"}
+        vault._flush_touched()
+        now[0] = 300
+        vault.store("ip", {"d": "4"})  # Over max_entries: "b" is the least recently used
+        rows = dict(vault._db.execute("SELECT original, anonymized FROM mappings").fetchall())
+    assert rows == {"a": "1", "c": "3", "d": "4"}
+
+
+def test_open_vault_needs_a_path(tmp_path):
+    assert open_vault({}) is None
+    assert open_vault({"vault": {}}) is None
+    vault = open_vault({"vault": {"path": str(tmp_path / "v"), "max_entries": 10}})
+    assert vault.max_entries == 10
+    vault.close()
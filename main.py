@@ -3,14 +3,8 @@ import yaml
 import pandas as pd
 from anonymizer.log_parser import parse_logs
 from anonymizer.log_reconstructor import replace_anonymized_values
-from anonymizer.ip_anonymizer import anonymize_ip_column
-from anonymizer.port_anonymizer import anonymize_port_column
-from anonymizer.timestamp_anonymizer import round_to_nearest_15_minutes_column
-from anonymizer.timestamp_anonymizer import perturb_time_column, bucketize_dates_column, order_preserving_adaptive_noise
-from anonymizer.ipmask import generalize_ip
-from anonymizer.differential import add_noise
-from anonymizer.paper_imple import anonymize_ip_addresses
-from anonymizer.convert_to_ocsf import convert_to_ocsf
+from anonymizer.plan import compile_plan
+from anonymizer.convert_to_ocsf import convert_to_ocsf, ocsf_settings
 import os
 
 def load_config(config_path):
@@ -38,50 +32,20 @@ def main():
 
     # Step 1: Parse logs
     df_logs, df_mapping = parse_logs(log_file, log_type, temp_csv, mapping_file,config)
-    
-    ocsffile = "ocsf_logs.json"
-    # Convert to OCSF format
-    convert_to_ocsf(df_logs, log_type, ocsffile)
 
 
     # Step 2: Apply anonymization methods based on config
-    if "timestamp" in anonymization:
-        if anonymization["timestamp"] == "round":
-            df_logs["timestamp"] = round_to_nearest_15_minutes_column(df_logs["timestamp"])
-        if anonymization["timestamp"] == "perturb":
-            df_logs["timestamp"] = perturb_time_column(df_logs["timestamp"], window_minutes=5)
-        if anonymization["timestamp"] == "bucketize":
-            df_logs["timestamp"] = bucketize_dates_column(df_logs["timestamp"], resolution="day")
-        if anonymization["timestamp"] == "adaptive":
-            df_logs["timestamp"] = order_preserving_adaptive_noise(df_logs["timestamp"], apply_global_offset=True)
-        
-
-    if "ip" in anonymization:
-        if anonymization["ip"] == "salt":
-            df_logs["src_ip"] = anonymize_ip_column(df_logs["src_ip"],SALT)
-            df_logs["dest_ip"] = anonymize_ip_column(df_logs["dest_ip"],SALT)
-        if anonymization["ip"] == "mask":
-            df_logs["src_ip"] = generalize_ip(df_logs["src_ip"], 24)
-            df_logs["dest_ip"] = generalize_ip(df_logs["dest_ip"], 24)
-        if anonymization["ip"] == "condensation" :
-            df_logs["src_ip"] = anonymize_ip_addresses(df_logs["src_ip"], 5)
-            df_logs["dest_ip"] = anonymize_ip_addresses(df_logs["dest_ip"], 5)
-
-        
-    if "port" in anonymization:
-        if anonymization["port"] == "salt":
-            df_logs["src_port"] = anonymize_port_column(df_logs["src_port"], SALT)
-            df_logs["dest_port"] = anonymize_port_column(df_logs["dest_port"], SALT)
-    
-    if "data" in anonymization:
-        if anonymization["data"] == "differential":
-            df_logs["data"] = add_noise(df_logs["data"], epsilon=1.0)
-        
+    df_logs = compile_plan(log_type, anonymization).apply(df_logs, SALT)
 
     # Save anonymized CSV
     df_logs.to_csv(anonymized_csv, index=False)
     print(f"✅ Anonymized logs saved in {anonymized_csv}")
 
+    # Optional: export the anonymized records as OCSF, so the export never holds raw identifiers
+    ocsf = ocsf_settings(config)
+    if ocsf is not None:
+        convert_to_ocsf(df_logs, log_type, ocsf["output"], ocsf["batch_size"])
+
     # Step 3: Replace anonymized values back into logs
     replace_anonymized_values(mapping_file, anonymized_csv, log_file, output_log)
 